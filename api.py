@@ -1,76 +1,345 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, abort, jsonify, request, send_from_directory, stream_with_context
 from flask_cors import CORS
-from vn_news_crawler import VnExpressCrawler, VietnamNetCrawler
+from vn_news_crawler import VnExpressCrawler, VietnamNetCrawler, create_parse_pool
+from http_cache import HttpCache
+from seen_index import SeenUrlIndex
+from crawl_jobs import JobManager, QueueFullError
+from result_cache import ResultCache
+from rate_limiter import AdaptiveRateLimiter
+from exporters import create_exporter
+from dedup import NearDuplicateIndex
+from image_store import ImageStore
+from metrics import REGISTRY as metrics
+import atexit
 import json
-from datetime import datetime
 import os
 
 app = Flask(__name__)
 # Enable CORS for all routes
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
+# Number of article detail pages fetched concurrently per request
+MAX_WORKERS = 5
+# Maximum simultaneous connections to a single news site
+MAX_PER_HOST = 5
+# Upper bounds for num_pages and num_articles accepted by /api/news and /api/jobs
+MAX_PAGES = 10
+MAX_ARTICLES = 100
+# HTML parser backend; falls back to html.parser when lxml is not installed
+PARSER = 'lxml'
+# How article URLs of a category are found: 'html' reads the listing pages, 'feed' reads the
+# category's RSS feed (a fraction of the bytes) and falls back to the listing pages without it
+DISCOVERY = 'html'
+# Processes that parse and clean article pages, so parsing is not serialized by the GIL
+# in the fetch threads; 0 parses in the fetch threads
+PARSE_WORKERS = min(4, os.cpu_count() or 1)
+# Background crawl jobs: number run at once and how many may wait in the queue
+JOB_WORKERS = 2
+JOB_QUEUE_SIZE = 10
+# /api/news results are reused for this many seconds, keeping at most RESULT_CACHE_SIZE entries
+RESULT_CACHE_TTL = 120
+RESULT_CACHE_SIZE = 64
+# Where crawled articles are saved: 'sqlite' (news_data/articles.db, one row per URL),
+# 'json' (one timestamped file per crawl) or 'jsonl' (gzipped JSON Lines in news_data/jsonl,
+# each article appended as soon as it is parsed, files rotated by size and age)
+EXPORTER = 'sqlite'
+# Print a line for every fetched page and parsed article; too noisy for a server under load
+VERBOSE = False
+# Download article images into news_data/images and serve them under /images, so the frontend
+# does not hotlink the publishers' CDNs; thumbnails need Pillow
+DOWNLOAD_IMAGES = False
+IMAGE_WORKERS = 8
+# Upper bound on image bytes being downloaded at once
+IMAGE_BYTES_IN_FLIGHT = 32 * 1024 * 1024
+
+# Parse process pool shared by both crawlers. Its workers are forked here, before any request thread
+# exists and before the SQLite connections below are opened: a forked child must not inherit them
+parse_pool = create_parse_pool(PARSE_WORKERS) if PARSE_WORKERS else None
+
+# Content-addressed image store shared by both crawlers; its thumbnail pool is forked before the store
+# opens its own index, so it also comes ahead of the other connections
+image_store = ImageStore(os.path.join('news_data', 'images'), url_prefix='/images', max_workers=IMAGE_WORKERS,
+                         max_bytes_in_flight=IMAGE_BYTES_IN_FLIGHT) if DOWNLOAD_IMAGES else None
+
+# On-disk HTTP cache shared by both crawlers (listing and article pages)
+http_cache = HttpCache(os.path.join('news_data', '.cache'))
+
+# Persistent index of already crawled article URLs (used by incremental mode)
+seen_index = SeenUrlIndex(os.path.join('news_data', 'seen_urls.db'))
+
+# Near-duplicate index shared by both sources, so the same story from VnExpress
+# and VietnamNet ends up in one cluster (articles get a 'duplicate_of' field)
+dedup_index = NearDuplicateIndex(os.path.join('news_data', 'dedup.db'))
+
+# Storage for crawled articles
+exporter = create_exporter(EXPORTER, 'news_data')
+
+# Per-host token buckets shared by every request and job; each crawler sets its own site's rate
+rate_limiter = AdaptiveRateLimiter()
+
 # Initialize crawlers
-vnexpress_crawler = VnExpressCrawler()
-vietnamnet_crawler = VietnamNetCrawler()
+vnexpress_crawler = VnExpressCrawler(max_workers=MAX_WORKERS, max_per_host=MAX_PER_HOST, rate_limiter=rate_limiter,
+                                     cache=http_cache, seen_index=seen_index, parser=PARSER,
+                                     dedup_index=dedup_index, verbose=VERBOSE, parse_pool=parse_pool,
+                                     image_store=image_store, discovery=DISCOVERY)
+vietnamnet_crawler = VietnamNetCrawler(max_workers=MAX_WORKERS, max_per_host=MAX_PER_HOST, rate_limiter=rate_limiter,
+                                       cache=http_cache, seen_index=seen_index, parser=PARSER,
+                                       dedup_index=dedup_index, verbose=VERBOSE, parse_pool=parse_pool,
+                                       image_store=image_store, discovery=DISCOVERY)
+
+crawlers = {
+    'vnexpress': vnexpress_crawler,
+    'vietnamnet': vietnamnet_crawler
+}
+
+# In-process cache of /api/news results; identical concurrent requests share one crawl
+result_cache = ResultCache(ttl=RESULT_CACHE_TTL, max_entries=RESULT_CACHE_SIZE)
+
+# Bounded worker pool for crawl jobs submitted through /api/jobs
+job_manager = JobManager(max_workers=JOB_WORKERS, max_queued=JOB_QUEUE_SIZE)
+
+# Close pooled HTTP connections on shutdown
+atexit.register(job_manager.shutdown)
+atexit.register(vnexpress_crawler.close)
+atexit.register(vietnamnet_crawler.close)
+atexit.register(seen_index.close)
+atexit.register(exporter.close)
+atexit.register(dedup_index.close)
+if parse_pool is not None:
+    atexit.register(parse_pool.shutdown)
+if image_store is not None:
+    atexit.register(image_store.close)
+
+def get_int(values, key, default=None):
+    """Read an integer parameter, falling back to the default when missing or invalid"""
+    try:
+        return int(values.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+def parse_crawl_params(values):
+    """Validate crawl parameters from query args or a JSON body.
+
+    Returns (params, None) on success or (None, error message).
+    """
+    source = values.get('source', 'vnexpress')  # Default to vnexpress
+    category_id = get_int(values, 'category_id')
+    num_pages = get_int(values, 'num_pages', 1)
+    num_articles = get_int(values, 'num_articles', 10)
+    # Only fetch articles that were not crawled before
+    incremental = str(values.get('incremental', 'false')).lower() in ('1', 'true', 'yes')
+
+    if num_pages is None or not 1 <= num_pages <= MAX_PAGES:
+        return None, f'num_pages must be between 1 and {MAX_PAGES}'
+    if num_articles is None or not 1 <= num_articles <= MAX_ARTICLES:
+        return None, f'num_articles must be between 1 and {MAX_ARTICLES}'
 
-@app.route('/api/news', methods=['GET'])
-def get_news():
-    # Get query parameters
-    source = request.args.get('source', 'vnexpress')  # Default to vnexpress
-    category_id = request.args.get('category_id', type=int)
-    num_pages = request.args.get('num_pages', 1, type=int)
-    num_articles = request.args.get('num_articles', 10, type=int)
-    
     # Validate source
-    if source not in ['vnexpress', 'vietnamnet']:
-        return jsonify({'error': 'Invalid source. Must be either vnexpress or vietnamnet'}), 400
-        
-    # Select crawler based on source
-    crawler = vnexpress_crawler if source == 'vnexpress' else vietnamnet_crawler
-    
+    if source not in crawlers:
+        return None, 'Invalid source. Must be either vnexpress or vietnamnet'
+
     # Find category name from ID
+    crawler = crawlers[source]
     category_name = None
     for cat_name, cat_id in crawler.categories.items():
         if cat_id == category_id:
             category_name = cat_name
             break
-            
+
     if not category_name:
-        return jsonify({'error': f'Invalid category ID for {source}'}), 400
+        return None, f'Invalid category ID for {source}'
+
+    return {
+        'source': source,
+        'category_id': category_id,
+        'category_name': category_name,
+        'num_pages': num_pages,
+        'num_articles': num_articles,
+        'incremental': incremental
+    }, None
+
+def save_articles(source, category_name, articles):
+    """Save crawled articles through the configured exporter"""
+    with metrics.serialize_seconds.time(format=exporter.name):
+        return exporter.export(articles, crawlers[source].source_name, category_name)
+
+def save_article(source, category_name, article):
+    """Write a single article as soon as it is parsed (streaming exporters only)"""
+    with metrics.serialize_seconds.time(format=exporter.name):
+        return exporter.write(article, crawlers[source].source_name, category_name)
+
+def run_crawl_job(job):
+    """Run a crawl job in the background, publishing articles as they are parsed"""
+    params = job.params
+    crawler = crawlers[params['source']]
+    output = None
+    for article in crawler.iter_crawl(params['category_name'], params['num_pages'], params['num_articles'],
+                                      callback=job.log, incremental=params['incremental'],
+                                      should_stop=job.is_cancelled):
+        job.add_article(article)
+        if exporter.streaming:
+            output = save_article(params['source'], params['category_name'], article)
+
+    if not job.articles:
+        return None
+    if not exporter.streaming:
+        output = save_articles(params['source'], params['category_name'], job.articles)
+    return {'exporter': exporter.name, 'output': output}
+
+# Response formats of /api/news: buffered JSON array or one article per event as it is parsed
+STREAM_MIMETYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream'
+}
+
+def get_response_format():
+    """Pick the /api/news response format from ?format= or the Accept header"""
+    fmt = request.args.get('format')
+    if fmt:
+        return fmt if fmt in STREAM_MIMETYPES else None
+
+    best = request.accept_mimetypes.best_match(list(STREAM_MIMETYPES.values()))
+    for name, mimetype in STREAM_MIMETYPES.items():
+        if mimetype == best:
+            return name
+    return 'json'
+
+def stream_articles(crawler, params, fmt):
+    """Stream each article as soon as it is parsed, as NDJSON lines or SSE events"""
+    def encode(event, data):
+        with metrics.serialize_seconds.time(format=fmt):
+            payload = json.dumps(data, ensure_ascii=False)
+        if fmt == 'sse':
+            return f"event: {event}\ndata: {payload}\n\n"
+        return payload + "\n"
+
+    def generate():
+        # Streamed articles are already marked in the seen index, so they must be stored too or a
+        # later incremental crawl would skip them; batch exporters get whatever was crawled, even
+        # if the client disconnects mid-stream
+        crawled = []
+        try:
+            for article in crawler.iter_crawl(params['category_name'], params['num_pages'],
+                                              params['num_articles'], incremental=params['incremental']):
+                if exporter.streaming:
+                    save_article(params['source'], params['category_name'], article)
+                crawled.append(article)
+                yield encode('article', article)
+        except Exception as e:
+            yield encode('error', {'error': str(e)})
+            return
+        finally:
+            if crawled and not exporter.streaming:
+                save_articles(params['source'], params['category_name'], crawled)
+        if fmt == 'sse':
+            yield encode('end', {'count': len(crawled)})
+
+    response = Response(stream_with_context(generate()), mimetype=STREAM_MIMETYPES[fmt])
+    response.headers['Cache-Control'] = 'no-cache'
+    # Ask reverse proxies not to buffer the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/news', methods=['GET'])
+def get_news():
+    params, error = parse_crawl_params(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+
+    fmt = get_response_format()
+    if fmt is None:
+        return jsonify({'error': 'Invalid format. Must be one of json, ndjson or sse'}), 400
+
+    crawler = crawlers[params['source']]
+    if fmt != 'json':
+        return stream_articles(crawler, params, fmt)
+
+    def crawl():
+        if exporter.streaming:
+            # Write each article as soon as it is parsed instead of after the whole crawl
+            detailed_articles = []
+            for article in crawler.iter_crawl(params['category_name'], params['num_pages'],
+                                              params['num_articles'], incremental=params['incremental']):
+                save_article(params['source'], params['category_name'], article)
+                detailed_articles.append(article)
+            return detailed_articles
+
+        # Crawl listing pages and article details as a pipeline
+        detailed_articles = crawler.crawl_pipeline(params['category_name'], params['num_pages'],
+                                                   params['num_articles'], incremental=params['incremental'])
+        save_articles(params['source'], params['category_name'], detailed_articles)
+        return detailed_articles
     
     try:
-        # Crawl articles
-        articles = crawler.crawl_category(category_name, num_pages)
-        
-        # Get detailed articles
-        detailed_articles = crawler.crawl_article_details(articles, num_articles)
-        
-        # Generate filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{source}_{category_name}_{timestamp}.json"
-        
-        # Create news_data directory if it doesn't exist
-        os.makedirs('news_data', exist_ok=True)
-        
-        # Save to file in news_data directory
-        filepath = os.path.join('news_data', filename)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(detailed_articles, f, ensure_ascii=False, indent=4)
+        if params['incremental']:
+            # Incremental results depend on what was crawled before, so they are never cached
+            detailed_articles, cache_status, age = crawl(), 'BYPASS', 0
+        else:
+            key = (params['source'], params['category_id'], params['num_pages'], params['num_articles'])
+            detailed_articles, cache_status, age = result_cache.get_or_compute(key, crawl)
             
         # Return just the array of articles
-        return jsonify(detailed_articles)
+        with metrics.serialize_seconds.time(format='json'):
+            response = jsonify(detailed_articles)
+        response.headers['X-Cache'] = cache_status
+        response.headers['Age'] = str(int(age))
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    # Accept parameters as a JSON body, form data or query string
+    values = request.get_json(silent=True) or request.values
+    params, error = parse_crawl_params(values)
+    if error:
+        return jsonify({'error': error}), 400
+
+    try:
+        job = job_manager.submit(run_crawl_job, params)
+    except QueueFullError as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '30'
+        return response, 429
+
+    response = jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': f'/api/jobs/{job.id}'
+    })
+    response.headers['Location'] = f'/api/jobs/{job.id}'
+    return response, 202
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    return jsonify([job.to_dict(include_articles=False) for job in job_manager.list()])
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+
+    include_articles = request.args.get('include_articles', 'true').lower() in ('1', 'true', 'yes')
+    return jsonify(job.to_dict(include_articles=include_articles))
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict(include_articles=False))
+
 @app.route('/api/categories', methods=['GET'])
 def get_categories():
     source = request.args.get('source', 'vnexpress')
     
-    if source not in ['vnexpress', 'vietnamnet']:
+    if source not in crawlers:
         return jsonify({'error': 'Invalid source. Must be either vnexpress or vietnamnet'}), 400
         
-    crawler = vnexpress_crawler if source == 'vnexpress' else vietnamnet_crawler
+    crawler = crawlers[source]
     
     categories = {
         'categories': crawler.categories,
@@ -79,5 +348,23 @@ def get_categories():
     
     return jsonify(categories)
 
+@app.route('/api/cache', methods=['GET'])
+def get_cache_stats():
+    stats = http_cache.stats()
+    stats['responses'] = result_cache.stats()
+    return jsonify(stats)
+
+@app.route('/images/<path:filename>', methods=['GET'])
+def get_image(filename):
+    if image_store is None or not image_store.is_stored_path(filename):
+        abort(404)
+    # Files are named by content hash, so they never change and can be cached forever
+    return send_from_directory(image_store.store_dir, filename, max_age=365 * 24 * 3600)
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    # Prometheus text exposition format
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file
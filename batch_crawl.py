@@ -0,0 +1,217 @@
+"""Crawl nhiều nguồn và danh mục cùng lúc từ dòng lệnh, không cần giao diện.
+
+    python batch_crawl.py --sources all --categories all --pages 2 --articles 20
+    python batch_crawl.py --sources vnexpress --categories thoi-su,the-gioi --processes 2
+
+Mỗi cặp (nguồn, danh mục) là một tác vụ chạy trong pool tiến trình. Số request đồng thời
+tới mỗi host được giới hạn chung cho mọi tiến trình (--max-per-host), tốc độ request của
+mỗi nguồn được chia đều cho các tiến trình. Kết quả được ghi qua exporter (json/sqlite).
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import Manager
+from urllib.parse import urlparse
+
+from dedup import NearDuplicateIndex
+from exporters import EXPORTERS, create_exporter
+from http_cache import HttpCache
+from image_store import ImageStore
+from seen_index import SeenUrlIndex
+from vn_news_crawler import NewsCrawler, VnExpressCrawler, VietnamNetCrawler
+
+CRAWLERS = {
+    'vnexpress': VnExpressCrawler,
+    'vietnamnet': VietnamNetCrawler
+}
+
+# Trạng thái của mỗi tiến trình con: cấu hình chung và crawler đã tạo theo nguồn
+_worker = {}
+
+
+def init_worker(host_slots, options):
+    """Khởi tạo tiến trình con với semaphore theo host dùng chung giữa các tiến trình"""
+    _worker['host_slots'] = host_slots
+    _worker['options'] = options
+    _worker['crawlers'] = {}
+
+
+def get_worker_crawler(source):
+    """Crawler của nguồn trong tiến trình hiện tại (mỗi tiến trình tạo một lần rồi dùng lại)"""
+    crawler = _worker['crawlers'].get(source)
+    if crawler is None:
+        options = _worker['options']
+        crawler_class = CRAWLERS[source]
+        output_dir = options['output_dir']
+        crawler = crawler_class(
+            max_workers=options['workers'],
+            max_per_host=options['max_per_host'],
+            # Các tiến trình cùng crawl một nguồn chia nhau tốc độ cho phép của nguồn đó
+            rate_limit=crawler_class.default_rate_limit / options['processes'],
+            rate_burst=max(1, crawler_class.default_rate_burst // options['processes']),
+            cache=HttpCache(os.path.join(output_dir, '.cache')),
+            # Các tiến trình cùng ghi vào seen_urls.db nên không dùng Bloom filter trong bộ nhớ
+            seen_index=SeenUrlIndex(os.path.join(output_dir, 'seen_urls.db'), use_bloom=False),
+            parser=options['parser'],
+            discovery=options['discovery'],
+            verbose=False,
+            host_slots=_worker['host_slots'],
+            image_store=get_worker_image_store() if options['images'] else None
+        )
+        _worker['crawlers'][source] = crawler
+    return crawler
+
+
+def get_worker_image_store():
+    """Kho ảnh của tiến trình hiện tại, dùng chung cho các nguồn; ảnh thu nhỏ tạo ngay trong luồng tải"""
+    image_store = _worker.get('image_store')
+    if image_store is None:
+        options = _worker['options']
+        image_store = ImageStore(os.path.join(options['output_dir'], 'images'), max_workers=options['workers'],
+                                 thumbnail_workers=0)
+        _worker['image_store'] = image_store
+    return image_store
+
+
+def crawl_task(source, category, num_pages, num_articles, incremental):
+    """Crawl một danh mục trong tiến trình con, trả về bài viết và số bytes đã tải"""
+    crawler = get_worker_crawler(source)
+    fetched = crawler.metrics.fetch_bytes.value(source=crawler.source_name, category=category)
+    start = time.perf_counter()
+    articles = crawler.crawl_pipeline(category, num_pages, num_articles, incremental=incremental)
+    return {
+        'source': source,
+        'category': category,
+        'articles': articles,
+        'bytes': crawler.metrics.fetch_bytes.value(source=crawler.source_name, category=category) - fetched,
+        'seconds': time.perf_counter() - start
+    }
+
+
+def parse_list(value, choices, name):
+    """Đọc danh sách phân tách bởi dấu phẩy, 'all' là tất cả các lựa chọn"""
+    if value == 'all':
+        return list(choices)
+    items = [item.strip() for item in value.split(',') if item.strip()]
+    invalid = [item for item in items if item not in choices]
+    if invalid:
+        raise argparse.ArgumentTypeError(f"{name} không hợp lệ: {', '.join(invalid)}")
+    return items
+
+
+def build_tasks(catalog, sources, categories):
+    """Các cặp (nguồn, danh mục) cần crawl; bỏ qua danh mục mà nguồn không có"""
+    tasks = []
+    for source in sources:
+        crawler_categories = catalog[source].categories
+        selected = crawler_categories if categories is None else [c for c in categories if c in crawler_categories]
+        tasks.extend((source, category) for category in selected)
+    return tasks
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--sources', default='all', help="Các nguồn cách nhau bởi dấu phẩy hoặc 'all'")
+    arg_parser.add_argument('--categories', default='all',
+                            help="Các danh mục (slug) cách nhau bởi dấu phẩy hoặc 'all'")
+    arg_parser.add_argument('--pages', type=int, default=2, help='Số trang danh mục mỗi danh mục')
+    arg_parser.add_argument('--articles', type=int, default=10, help='Số bài viết tối đa mỗi danh mục')
+    arg_parser.add_argument('--processes', type=int, default=os.cpu_count() or 2, help='Số tiến trình')
+    arg_parser.add_argument('--workers', type=int, default=4, help='Số luồng tải chi tiết trong mỗi tiến trình')
+    arg_parser.add_argument('--max-per-host', type=int, default=8,
+                            help='Số request đồng thời tối đa tới một host, tính chung mọi tiến trình')
+    arg_parser.add_argument('--parser', default='lxml', choices=NewsCrawler.PARSERS)
+    arg_parser.add_argument('--discovery', default='html', choices=NewsCrawler.DISCOVERY_MODES,
+                            help="Tìm bài viết qua trang danh mục ('html') hoặc RSS/news sitemap ('feed')")
+    arg_parser.add_argument('--exporter', default='sqlite', choices=list(EXPORTERS))
+    arg_parser.add_argument('--output-dir', default='news_data', help='Thư mục lưu kết quả, cache và chỉ mục')
+    arg_parser.add_argument('--incremental', action='store_true', help='Chỉ crawl bài chưa crawl trước đó')
+    arg_parser.add_argument('--images', action='store_true',
+                            help='Tải ảnh bài viết về thư mục images/ trong --output-dir và đổi URL ảnh sang đường dẫn cục bộ')
+    args = arg_parser.parse_args()
+
+    # Crawler của tiến trình chính chỉ dùng để tra danh mục, tên nguồn và host
+    catalog = {source: crawler_class(verbose=False) for source, crawler_class in CRAWLERS.items()}
+    try:
+        sources = parse_list(args.sources, CRAWLERS, 'Nguồn')
+        all_categories = {category for crawler in catalog.values() for category in crawler.categories}
+        categories = None if args.categories == 'all' else parse_list(args.categories, all_categories, 'Danh mục')
+    except argparse.ArgumentTypeError as e:
+        arg_parser.error(str(e))
+
+    tasks = build_tasks(catalog, sources, categories)
+    if not tasks:
+        print("Không có danh mục nào cần crawl")
+        return 1
+
+    processes = max(1, min(args.processes, len(tasks)))
+    options = {
+        'processes': processes,
+        'workers': args.workers,
+        'max_per_host': args.max_per_host,
+        'parser': NewsCrawler.resolve_parser(args.parser),
+        'discovery': args.discovery,
+        'output_dir': args.output_dir,
+        'images': args.images
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    exporter = create_exporter(args.exporter, args.output_dir)
+    # Gắn nhãn bài gần trùng ở tiến trình chính để chỉ có một nơi ghi vào dedup.db
+    dedup_index = NearDuplicateIndex(os.path.join(args.output_dir, 'dedup.db'))
+
+    print(f"Crawl {len(tasks)} danh mục bằng {processes} tiến trình, "
+          f"tối đa {args.max_per_host} request đồng thời mỗi host")
+
+    total_articles = 0
+    total_bytes = 0
+    failed = 0
+    start = time.perf_counter()
+    with Manager() as manager:
+        host_slots = {
+            urlparse(catalog[source].base_url).netloc: manager.BoundedSemaphore(args.max_per_host)
+            for source in sources
+        }
+        with ProcessPoolExecutor(max_workers=processes, initializer=init_worker,
+                                 initargs=(host_slots, options)) as executor:
+            futures = {
+                executor.submit(crawl_task, source, category, args.pages, args.articles, args.incremental):
+                    (source, category)
+                for source, category in tasks
+            }
+            for future in as_completed(futures):
+                source, category = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"  {source:<11} {category:<20} lỗi: {e}")
+                    continue
+
+                articles = result['articles']
+                for article in articles:
+                    dedup_index.tag(article)
+                if articles:
+                    exporter.export(articles, catalog[source].source_name, category)
+                total_articles += len(articles)
+                total_bytes += result['bytes']
+                print(f"  {source:<11} {category:<20} {len(articles):>4} bài  "
+                      f"{result['bytes'] / 1e6:>7.2f} MB  {result['seconds']:>6.2f}s")
+
+    seconds = time.perf_counter() - start
+    exporter.close()
+    dedup_index.close()
+    for crawler in catalog.values():
+        crawler.close()
+
+    print(f"\nHoàn tất {len(tasks) - failed}/{len(tasks)} danh mục trong {seconds:.2f}s")
+    print(f"Tổng: {total_articles} bài viết, {total_bytes / 1e6:.2f} MB")
+    if seconds:
+        print(f"Thông lượng: {total_articles / seconds:.2f} bài/s, {total_bytes / seconds / 1e6:.2f} MB/s")
+    print(f"Dữ liệu đã được lưu vào: {getattr(exporter, 'path', args.output_dir)}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Máy chủ HTTP cục bộ phát lại các trang mẫu trong fixtures/ thay cho trang báo thật.
+
+    python bench_server.py vnexpress --latency 0.05 --port 8000
+
+Trang danh mục (/{category}, /{category}-p2, /{category}-page2) trả về trang danh sách
+mẫu, mọi đường dẫn .html trả về trang bài viết mẫu, đường dẫn .rss trả về RSS mẫu và .xml
+trả về news sitemap mẫu của nguồn tương ứng (404 nếu nguồn không có feed mẫu dạng đó).
+"""
+import argparse
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+SITES = ('vnexpress', 'vietnamnet')
+
+# Feed mẫu theo phần mở rộng của đường dẫn: RSS (VnExpress), news sitemap (VietnamNet)
+FEED_FIXTURES = {
+    '.rss': '{site}_rss.xml',
+    '.xml': '{site}_sitemap.xml'
+}
+
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        fixture = self.server.resolve(self.path)
+        if fixture is None:
+            self.send_error(404)
+            return
+
+        # Giả lập độ trễ mạng của trang thật
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        body = self.server.load(fixture)
+        self.send_response(200)
+        content_type = 'application/xml' if fixture.endswith('.xml') else 'text/html'
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        # Đếm trước khi gửi: client có thể đọc xong phản hồi và kiểm tra số request ngay sau đó
+        self.server.count_request(len(body))
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Máy chủ phát lại trang mẫu của một nguồn với độ trễ cấu hình được"""
+    daemon_threads = True
+
+    def __init__(self, site, latency=0.0, host='127.0.0.1', port=0):
+        if site not in SITES:
+            raise ValueError(f"Nguồn không hợp lệ: {site}")
+        super().__init__((host, port), FixtureRequestHandler)
+        self.site = site
+        self.latency = latency
+        self.requests = 0
+        self.bytes_sent = 0
+        self._files = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def resolve(self, path):
+        """Chọn trang mẫu cho đường dẫn được yêu cầu"""
+        path = path.split('?', 1)[0]
+        if path.endswith('.html'):
+            return f"{self.site}_detail.html"
+        extension = os.path.splitext(path)[1]
+        if extension in FEED_FIXTURES:
+            fixture = FEED_FIXTURES[extension].format(site=self.site)
+            return fixture if os.path.exists(os.path.join(FIXTURES_DIR, fixture)) else None
+        if path.strip('/'):
+            return f"{self.site}_list.html"
+        return None
+
+    def load(self, name):
+        if name not in self._files:
+            with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+                self._files[name] = f.read()
+        return self._files[name]
+
+    def count_request(self, size):
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += size
+
+    def start(self):
+        """Chạy máy chủ trong luồng nền"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('site', choices=SITES)
+    arg_parser.add_argument('--latency', type=float, default=0.05, help='Độ trễ mỗi request (giây)')
+    arg_parser.add_argument('--port', type=int, default=8000)
+    args = arg_parser.parse_args()
+
+    server = FixtureServer(args.site, args.latency, port=args.port)
+    print(f"Đang phát lại trang mẫu {args.site} tại {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+"""Đo hiệu năng crawler trên các trang mẫu trong fixtures/, không cần truy cập mạng.
+
+Gồm bốn phần:
+- Đo thời gian parse_article_list / parse_article_html trên từng trang mẫu
+- So sánh thời gian và bộ nhớ khi phân tích toàn bộ trang bài viết và chỉ các phần cần thiết
+- Thông lượng phân tích trang bài viết qua pool tiến trình với số tiến trình khác nhau
+- Crawl toàn bộ (crawl_category + crawl_article_details và pipeline) qua bench_server
+  với độ trễ giả lập
+
+Kết quả được ghi ra file JSON để so sánh giữa các lần chạy:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+
+from bench_server import FixtureServer
+from compare_parsers import FIXTURES, load_fixture, parse_page
+from vn_news_crawler import NewsCrawler, VnExpressCrawler, VietnamNetCrawler, parse_article_in_process
+
+CRAWLERS = {
+    'vnexpress': VnExpressCrawler,
+    'vietnamnet': VietnamNetCrawler
+}
+
+# Chênh lệch (tỉ lệ) được coi là chậm đi khi so sánh với lần chạy trước
+REGRESSION_THRESHOLD = 0.10
+
+
+def worker_counts():
+    """1, 2, 4, ... tới số CPU"""
+    counts = [1]
+    while counts[-1] * 2 <= (os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+    if counts[-1] != (os.cpu_count() or 1):
+        counts.append(os.cpu_count() or 1)
+    return counts
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_parsing(parser, repeat):
+    """Thời gian phân tích từng trang mẫu (ms)"""
+    results = []
+    for name, crawler_class, kind in FIXTURES:
+        html_content = load_fixture(name)
+        crawler = crawler_class(parser=parser)
+        timings = []
+        items = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = parse_page(crawler, kind, html_content)
+            timings.append((time.perf_counter() - start) * 1000)
+            items = len(result) if kind == 'list' else 1
+        crawler.close()
+
+        results.append({
+            'name': f"parse:{name}",
+            'fixture': name,
+            'kind': kind,
+            'bytes': len(html_content.encode('utf-8')),
+            'items': items,
+            'mean_ms': round(statistics.mean(timings), 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'min_ms': round(min(timings), 3)
+        })
+    return results
+
+
+def bench_targeted(parser, repeat):
+    """Thời gian (ms) và bộ nhớ cấp phát tối đa khi phân tích toàn bộ trang bài viết và chỉ phần cần thiết"""
+    results = []
+    for name, crawler_class, kind in FIXTURES:
+        if kind != 'detail':
+            continue
+        html_content = load_fixture(name)
+        for mode, targeted in (('full', False), ('targeted', True)):
+            crawler = crawler_class(parser=parser, targeted_parsing=targeted)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                parse_page(crawler, kind, html_content)
+                timings.append((time.perf_counter() - start) * 1000)
+
+            tracemalloc.start()
+            parse_page(crawler, kind, html_content)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            crawler.close()
+
+            results.append({
+                'name': f"targeted:{name}:{mode}",
+                'fixture': name,
+                'mode': mode,
+                'median_ms': round(statistics.median(timings), 3),
+                'peak_kb': round(peak / 1024, 1)
+            })
+    return results
+
+
+def bench_parse_scaling(parser, workers_list, pages):
+    """Thông lượng phân tích trang bài viết mẫu qua pool tiến trình (trang/giây) theo số tiến trình"""
+    results = []
+    for name, crawler_class, kind in FIXTURES:
+        if kind != 'detail':
+            continue
+        html_content = load_fixture(name)
+        crawler = crawler_class(parser=parser)
+        base_url = crawler.base_url
+        crawler.close()
+        args = (crawler_class, parser, base_url, html_content, f"{base_url}/bench.html", 1)
+
+        baseline = None
+        for workers in workers_list:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Khởi động các tiến trình và tạo crawler trong từng tiến trình trước khi đo
+                list(pool.map(parse_article_in_process, *[repeat(value, workers) for value in args]))
+                start = time.perf_counter()
+                list(pool.map(parse_article_in_process, *[repeat(value, pages) for value in args],
+                              chunksize=max(1, pages // (workers * 4))))
+                seconds = time.perf_counter() - start
+
+            pages_per_s = pages / seconds
+            baseline = baseline or pages_per_s
+            results.append({
+                'name': f"parse_pool:{name}:{workers}",
+                'fixture': name,
+                'workers': workers,
+                'pages': pages,
+                'seconds': round(seconds, 3),
+                'pages_per_s': round(pages_per_s, 2),
+                'speedup': round(pages_per_s / baseline, 2)
+            })
+    return results
+
+
+def bench_crawl(site, mode, parser, latency, num_pages, num_articles, max_workers):
+    """Crawl một danh mục qua máy chủ phát lại, trả về thời gian và thông lượng"""
+    with FixtureServer(site, latency) as server:
+        crawler = CRAWLERS[site](parser=parser, max_workers=max_workers, max_per_host=max_workers,
+                                 rate_limit=1000, rate_burst=1000)
+        crawler.base_url = server.url
+        category = next(iter(crawler.categories))
+
+        start = time.perf_counter()
+        first_article = None
+        with contextlib.redirect_stdout(io.StringIO()):
+            if mode == 'pipeline':
+                articles = []
+                for article in crawler.iter_crawl(category, num_pages, num_articles):
+                    if first_article is None:
+                        first_article = time.perf_counter() - start
+                    articles.append(article)
+            else:
+                workers = 1 if mode == 'sequential' else max_workers
+                stubs = crawler.crawl_category(category, num_pages)
+                articles = []
+                for article in crawler.iter_article_details(stubs, num_articles, max_workers=workers):
+                    if first_article is None:
+                        first_article = time.perf_counter() - start
+                    articles.append(article)
+        seconds = time.perf_counter() - start
+        crawler.close()
+
+        return {
+            'name': f"crawl:{site}:{mode}",
+            'site': site,
+            'mode': mode,
+            'articles': len(articles),
+            'requests': server.requests,
+            'bytes': server.bytes_sent,
+            'seconds': round(seconds, 3),
+            'first_article_s': round(first_article, 3) if first_article is not None else None,
+            'articles_per_s': round(len(articles) / seconds, 2) if seconds else None,
+            'mb_per_s': round(server.bytes_sent / seconds / 1e6, 3) if seconds else None
+        }
+
+
+def compare(results, baseline):
+    """So sánh với kết quả lần chạy trước, trả về số mục chậm đi quá ngưỡng"""
+    old = {entry['name']: entry for section in ('parse', 'targeted', 'parse_scaling', 'crawl')
+           for entry in baseline.get(section, [])}
+    regressions = 0
+    print(f"\nSo sánh với {baseline.get('git_commit') or baseline.get('timestamp')}:")
+    for entry in results['parse'] + results['targeted'] + results['parse_scaling'] + results['crawl']:
+        key = 'median_ms' if 'median_ms' in entry else 'seconds'
+        previous = old.get(entry['name'], {}).get(key)
+        if not previous:
+            continue
+        change = (entry[key] - previous) / previous
+        flag = ''
+        if change > REGRESSION_THRESHOLD:
+            flag = '  CHẬM HƠN'
+            regressions += 1
+        print(f"  {entry['name']:<42} {previous:>10.3f} -> {entry[key]:>10.3f} ({change:+.1%}){flag}")
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--parser', default='html.parser', choices=NewsCrawler.PARSERS)
+    arg_parser.add_argument('--repeat', type=int, default=20, help='Số lần phân tích mỗi trang mẫu')
+    arg_parser.add_argument('--parse-workers', default=','.join(str(n) for n in worker_counts()),
+                            help='Các số tiến trình cần đo thông lượng phân tích, cách nhau bởi dấu phẩy')
+    arg_parser.add_argument('--parse-pages', type=int, default=200,
+                            help='Số trang bài viết phân tích mỗi lần đo thông lượng')
+    arg_parser.add_argument('--skip-scaling', action='store_true', help='Bỏ qua đo thông lượng pool phân tích')
+    arg_parser.add_argument('--latency', type=float, default=0.05, help='Độ trễ giả lập mỗi request (giây)')
+    arg_parser.add_argument('--pages', type=int, default=2, help='Số trang danh mục mỗi lượt crawl')
+    arg_parser.add_argument('--articles', type=int, default=20, help='Số bài viết chi tiết mỗi lượt crawl')
+    arg_parser.add_argument('--workers', type=int, default=5, help='Số luồng tải chi tiết')
+    arg_parser.add_argument('--modes', default='sequential,concurrent,pipeline',
+                            help='Các chế độ crawl cần đo, cách nhau bởi dấu phẩy')
+    arg_parser.add_argument('--skip-crawl', action='store_true', help='Chỉ đo thời gian phân tích')
+    arg_parser.add_argument('--output', default='bench_results.json', help='File JSON ghi kết quả')
+    arg_parser.add_argument('--compare', help='File JSON kết quả của lần chạy trước để so sánh')
+    args = arg_parser.parse_args()
+
+    parser = NewsCrawler.resolve_parser(args.parser)
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parser': parser,
+        'config': vars(args),
+        'parse': [],
+        'targeted': [],
+        'parse_scaling': [],
+        'crawl': []
+    }
+
+    print(f"Đo thời gian phân tích ({parser}, {args.repeat} lần mỗi trang):")
+    for entry in bench_parsing(parser, args.repeat):
+        results['parse'].append(entry)
+        print(f"  {entry['fixture']:<26} trung vị {entry['median_ms']:>8.2f}ms  nhỏ nhất {entry['min_ms']:>8.2f}ms")
+
+    print("\nPhân tích toàn bộ trang bài viết và chỉ phần cần thiết:")
+    for entry in bench_targeted(parser, args.repeat):
+        results['targeted'].append(entry)
+        print(f"  {entry['fixture']:<26} {entry['mode']:<9} trung vị {entry['median_ms']:>8.2f}ms  "
+              f"bộ nhớ tối đa {entry['peak_kb']:>8.1f} KB")
+
+    if not args.skip_scaling:
+        workers_list = [int(n) for n in args.parse_workers.split(',')]
+        print(f"\nThông lượng phân tích qua pool tiến trình ({args.parse_pages} trang, {os.cpu_count()} CPU):")
+        for entry in bench_parse_scaling(parser, workers_list, args.parse_pages):
+            results['parse_scaling'].append(entry)
+            print(f"  {entry['fixture']:<26} {entry['workers']:>2} tiến trình  {entry['pages_per_s']:>8.1f} trang/s  "
+                  f"x{entry['speedup']:.2f}")
+
+    if not args.skip_crawl:
+        print(f"\nCrawl qua máy chủ phát lại (độ trễ {args.latency}s, {args.pages} trang, {args.articles} bài):")
+        for site in CRAWLERS:
+            for mode in args.modes.split(','):
+                entry = bench_crawl(site, mode.strip(), parser, args.latency, args.pages,
+                                    args.articles, args.workers)
+                results['crawl'].append(entry)
+                print(f"  {site:<11} {entry['mode']:<11} {entry['seconds']:>7.2f}s  "
+                      f"bài đầu tiên {entry['first_article_s'] or 0:>5.2f}s  "
+                      f"{entry['articles_per_s']:>7.2f} bài/s  {entry['mb_per_s']:>6.2f} MB/s  "
+                      f"{entry['requests']} request")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=4)
+    print(f"\nĐã ghi kết quả vào {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, baseline):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
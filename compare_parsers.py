@@ -0,0 +1,129 @@
+"""So sánh các bộ phân tích HTML trên các trang mẫu đã lưu.
+
+Kiểm tra mọi bộ phân tích cho ra cùng kết quả với html.parser, trang bài viết phân tích
+riêng các phần cần thiết (targeted_parsing) cho cùng kết quả với phân tích toàn bộ trang,
+feed mẫu (RSS, news sitemap) cho cùng danh sách bài viết với trang danh mục tương ứng,
+và in thời gian phân tích trung bình của từng trang.
+
+    python compare_parsers.py [--repeat 20]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+from feeds import parse_feed
+from vn_news_crawler import NewsCrawler, VnExpressCrawler, VietnamNetCrawler
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# (tên trang mẫu, lớp crawler, loại trang)
+FIXTURES = [
+    ('vnexpress_list.html', VnExpressCrawler, 'list'),
+    ('vnexpress_detail.html', VnExpressCrawler, 'detail'),
+    ('vietnamnet_list.html', VietnamNetCrawler, 'list'),
+    ('vietnamnet_detail.html', VietnamNetCrawler, 'detail'),
+]
+
+# (feed mẫu, lớp crawler, trang danh mục có cùng bài viết, feed có mô tả bài viết không)
+FEEDS = [
+    ('vnexpress_rss.xml', VnExpressCrawler, 'vnexpress_list.html', True),
+    ('vietnamnet_sitemap.xml', VietnamNetCrawler, 'vietnamnet_list.html', False),
+]
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def parse_page(crawler, kind, html_content):
+    """Phân tích một trang mẫu, tắt các dòng print gỡ lỗi của crawler"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        if kind == 'list':
+            return crawler.parse_article_list(html_content, 1)
+        return crawler.parse_article_html(html_content, crawler.base_url + '/fixture.html', 1)
+
+
+def time_parse(crawler, kind, html_content, repeat):
+    """Thời gian phân tích trung bình (ms) của một trang"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse_page(crawler, kind, html_content)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def time_feed(crawler, content, repeat):
+    """Thời gian đọc feed trung bình (ms)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse_feed(content, crawler.base_url, 1)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def compare_feeds(repeat):
+    """Kiểm tra feed mẫu cho cùng bài viết với trang danh mục, trả về số feed khác kết quả"""
+    mismatches = 0
+    for name, crawler_class, list_name, has_description in FEEDS:
+        crawler = crawler_class()
+        content = load_fixture(name)
+        articles = parse_feed(content, crawler.base_url, 1)
+        expected = parse_page(crawler, 'list', load_fixture(list_name))
+        if not has_description:
+            # News sitemap không có mô tả bài viết
+            expected = [dict(article, description='') for article in expected]
+        if articles != expected:
+            mismatches += 1
+            print(f"KHÁC KẾT QUẢ: {name} với {list_name}")
+        print(f"{name:<26}{time_feed(crawler, content, repeat):>12.2f}ms "
+              f"({len(content.encode('utf-8')) // 1024} KB, trang danh mục "
+              f"{len(load_fixture(list_name).encode('utf-8')) // 1024} KB)")
+        crawler.close()
+    return mismatches
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--repeat', type=int, default=20, help='Số lần phân tích mỗi trang để đo thời gian')
+    args = arg_parser.parse_args()
+
+    parsers = [p for p in NewsCrawler.PARSERS if NewsCrawler.resolve_parser(p) == p]
+    mismatches = 0
+
+    print(f"{'Trang mẫu':<26}" + ''.join(f"{p:>14}" for p in parsers))
+    for name, crawler_class, kind in FIXTURES:
+        html_content = load_fixture(name)
+        baseline = None
+        timings = []
+        for parser in parsers:
+            crawler = crawler_class(parser=parser)
+            result = parse_page(crawler, kind, html_content)
+            if baseline is None:
+                baseline = result
+            elif result != baseline:
+                mismatches += 1
+                print(f"KHÁC KẾT QUẢ: {name} với {parser}")
+            if kind == 'detail':
+                full_crawler = crawler_class(parser=parser, targeted_parsing=False)
+                if parse_page(full_crawler, kind, html_content) != result:
+                    mismatches += 1
+                    print(f"KHÁC KẾT QUẢ: {name} với {parser} khi chỉ phân tích phần cần thiết")
+                full_crawler.close()
+            timings.append(time_parse(crawler, kind, html_content, args.repeat))
+            crawler.close()
+        print(f"{name:<26}" + ''.join(f"{t:>12.2f}ms" for t in timings))
+
+    print()
+    mismatches += compare_feeds(args.repeat)
+
+    if mismatches:
+        print(f"{mismatches} trang mẫu cho kết quả khác nhau giữa các bộ phân tích")
+        return 1
+    print("Tất cả bộ phân tích cho kết quả giống nhau")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""Chạy crawl liên tục, tự điều chỉnh chu kỳ quét của từng danh mục theo số bài mới.
+
+    python crawl_daemon.py --sources all --categories all --min-interval 60 --max-interval 3600
+
+Mỗi danh mục có chu kỳ riêng: quét thấy nhiều bài mới thì chu kỳ ngắn lại, không có bài mới
+thì dài ra, luôn nằm trong [--min-interval, --max-interval]. Các danh mục được xếp trong hàng
+đợi ưu tiên theo thời điểm tới hạn; lịch được lưu ra file JSON nên khởi động lại vẫn giữ nguyên.
+"""
+import argparse
+import heapq
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+from batch_crawl import CRAWLERS, parse_list
+from dedup import NearDuplicateIndex
+from exporters import EXPORTERS, create_exporter
+from http_cache import HttpCache
+from seen_index import SeenUrlIndex
+from vn_news_crawler import NewsCrawler
+
+
+class CategorySchedule:
+    """Chu kỳ quét và thời điểm tới hạn của một danh mục"""
+    def __init__(self, source, category, interval, next_due, polls=0, last_new=None, last_poll=None):
+        self.source = source
+        self.category = category
+        self.interval = interval
+        self.next_due = next_due
+        self.polls = polls
+        self.last_new = last_new
+        self.last_poll = last_poll
+
+    @property
+    def key(self):
+        return f"{self.source}:{self.category}"
+
+    def to_dict(self):
+        return {
+            'interval': self.interval,
+            'next_due': self.next_due,
+            'polls': self.polls,
+            'last_new': self.last_new,
+            'last_poll': self.last_poll
+        }
+
+
+class CrawlDaemon:
+    """Bộ lập lịch crawl liên tục dựa trên crawl_category, chu kỳ thích ứng theo từng danh mục"""
+    def __init__(self, crawlers, tasks, exporter, schedule_path=os.path.join('news_data', 'schedule.json'),
+                 min_interval=60, max_interval=3600, initial_interval=300, target_new=5,
+                 num_pages=1, max_articles=20, clock=time.time):
+        self.crawlers = crawlers
+        self.exporter = exporter
+        self.schedule_path = schedule_path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = initial_interval
+        # Số bài mới mong muốn mỗi lần quét: nhiều hơn thì quét dày hơn, ít hơn thì thưa ra
+        self.target_new = target_new
+        self.num_pages = num_pages
+        self.max_articles = max_articles
+        self.clock = clock
+        self._stop = threading.Event()
+
+        saved = self.load_schedule()
+        now = self.clock()
+        self.schedules = {}
+        self._heap = []
+        for source, category in tasks:
+            state = saved.get(f"{source}:{category}", {})
+            schedule = CategorySchedule(
+                source, category,
+                interval=self.clamp(state.get('interval', initial_interval)),
+                next_due=state.get('next_due', now),
+                polls=state.get('polls', 0),
+                last_new=state.get('last_new'),
+                last_poll=state.get('last_poll')
+            )
+            self.schedules[schedule.key] = schedule
+            heapq.heappush(self._heap, (schedule.next_due, schedule.key))
+
+    def clamp(self, interval):
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def next_interval(self, interval, new_count):
+        """Chu kỳ mới theo số bài mới so với mục tiêu, mỗi lần giảm tối đa một nửa hoặc tăng tối đa 1,5 lần"""
+        if new_count == 0:
+            factor = 1.5
+        else:
+            factor = max(0.5, min(1.5, self.target_new / new_count))
+        return self.clamp(interval * factor)
+
+    def load_schedule(self):
+        """Đọc lịch đã lưu, trả về dict rỗng nếu chưa có hoặc file hỏng"""
+        try:
+            with open(self.schedule_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_schedule(self):
+        """Ghi lịch ra file tạm rồi đổi tên để không để lại file dở dang khi bị dừng giữa chừng"""
+        directory = os.path.dirname(self.schedule_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.schedule_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({key: schedule.to_dict() for key, schedule in self.schedules.items()}, f,
+                      ensure_ascii=False, indent=4)
+        os.replace(tmp_path, self.schedule_path)
+
+    def poll(self, schedule):
+        """Quét một danh mục và crawl chi tiết các bài mới, trả về (số URL mới, số bài đã lưu)"""
+        crawler = self.crawlers[schedule.source]
+        # Chỉ lấy bài chưa crawl; trang danh mục toàn bài cũ thì không tải tiếp các trang sau
+        new_stubs = crawler.crawl_category(schedule.category, self.num_pages, incremental=True)
+        articles = crawler.crawl_article_details(new_stubs, self.max_articles)
+        if articles:
+            self.exporter.export(articles, crawler.source_name, schedule.category)
+        return len(new_stubs), len(articles)
+
+    def run_once(self):
+        """Quét danh mục tới hạn sớm nhất nếu đã tới giờ, trả về số giây cần chờ tới lượt tiếp theo"""
+        next_due, key = self._heap[0]
+        now = self.clock()
+        if next_due > now:
+            return next_due - now
+
+        heapq.heappop(self._heap)
+        schedule = self.schedules[key]
+        try:
+            new_count, saved = self.poll(schedule)
+        except Exception as e:
+            # Lỗi mạng/phân tích: thử lại sau chu kỳ hiện tại, không đổi chu kỳ
+            print(f"Lỗi khi quét {key}: {e}")
+        else:
+            old_interval = schedule.interval
+            schedule.interval = self.next_interval(schedule.interval, new_count)
+            schedule.polls += 1
+            schedule.last_new = new_count
+            print(f"{key}: {new_count} URL mới, đã lưu {saved} bài, "
+                  f"chu kỳ {old_interval:.0f}s -> {schedule.interval:.0f}s")
+
+        now = self.clock()
+        schedule.last_poll = now
+        schedule.next_due = now + schedule.interval
+        heapq.heappush(self._heap, (schedule.next_due, key))
+        self.save_schedule()
+        return 0
+
+    def run(self):
+        """Chạy cho tới khi stop() được gọi"""
+        print(f"Bắt đầu crawl liên tục {len(self.schedules)} danh mục")
+        while self._heap and not self._stop.is_set():
+            wait = self.run_once()
+            if wait > 0:
+                self._stop.wait(wait)
+        self.save_schedule()
+        print("Đã dừng crawl liên tục")
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--sources', default='all', help="Các nguồn cách nhau bởi dấu phẩy hoặc 'all'")
+    arg_parser.add_argument('--categories', default='all',
+                            help="Các danh mục (slug) cách nhau bởi dấu phẩy hoặc 'all'")
+    arg_parser.add_argument('--min-interval', type=float, default=60, help='Chu kỳ quét ngắn nhất (giây)')
+    arg_parser.add_argument('--max-interval', type=float, default=3600, help='Chu kỳ quét dài nhất (giây)')
+    arg_parser.add_argument('--initial-interval', type=float, default=300,
+                            help='Chu kỳ ban đầu của danh mục chưa có trong lịch (giây)')
+    arg_parser.add_argument('--target-new', type=int, default=5, help='Số bài mới mong muốn mỗi lần quét')
+    arg_parser.add_argument('--pages', type=int, default=1, help='Số trang danh mục mỗi lần quét')
+    arg_parser.add_argument('--articles', type=int, default=20, help='Số bài mới tối đa crawl mỗi lần quét')
+    arg_parser.add_argument('--workers', type=int, default=4, help='Số luồng tải chi tiết')
+    arg_parser.add_argument('--parser', default='lxml', choices=NewsCrawler.PARSERS)
+    arg_parser.add_argument('--exporter', default='sqlite', choices=list(EXPORTERS))
+    arg_parser.add_argument('--output-dir', default='news_data', help='Thư mục lưu kết quả, cache, chỉ mục và lịch')
+    args = arg_parser.parse_args()
+
+    if args.min_interval > args.max_interval:
+        arg_parser.error('--min-interval phải nhỏ hơn hoặc bằng --max-interval')
+
+    output_dir = args.output_dir
+    # ttl=0: luôn hỏi lại server có điều kiện (If-None-Match/If-Modified-Since). Bản lưu còn hạn sẽ trả
+    # về trang danh mục cũ, không thấy bài mới và làm chu kỳ dài ra dù trang đã có bài mới
+    cache = HttpCache(os.path.join(output_dir, '.cache'), ttl=0)
+    seen_index = SeenUrlIndex(os.path.join(output_dir, 'seen_urls.db'))
+    dedup_index = NearDuplicateIndex(os.path.join(output_dir, 'dedup.db'))
+    crawlers = {
+        source: crawler_class(max_workers=args.workers, cache=cache, seen_index=seen_index,
+                              dedup_index=dedup_index, parser=args.parser, verbose=False)
+        for source, crawler_class in CRAWLERS.items()
+    }
+
+    try:
+        sources = parse_list(args.sources, crawlers, 'Nguồn')
+        all_categories = {category for crawler in crawlers.values() for category in crawler.categories}
+        categories = None if args.categories == 'all' else parse_list(args.categories, all_categories, 'Danh mục')
+    except argparse.ArgumentTypeError as e:
+        arg_parser.error(str(e))
+
+    tasks = [(source, category) for source in sources for category in crawlers[source].categories
+             if categories is None or category in categories]
+    exporter = create_exporter(args.exporter, output_dir)
+    daemon = CrawlDaemon(crawlers, tasks, exporter, os.path.join(output_dir, 'schedule.json'),
+                         min_interval=args.min_interval, max_interval=args.max_interval,
+                         initial_interval=args.initial_interval, target_new=args.target_new,
+                         num_pages=args.pages, max_articles=args.articles)
+
+    # Dừng êm khi nhận SIGTERM/Ctrl+C: lịch được lưu trước khi thoát
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        daemon.stop()
+        daemon.save_schedule()
+    finally:
+        for crawler in crawlers.values():
+            crawler.close()
+        exporter.close()
+        seen_index.close()
+        dedup_index.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
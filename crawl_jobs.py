@@ -0,0 +1,159 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """Hàng đợi job đã đầy, cần từ chối job mới"""
+    pass
+
+
+class CrawlJob:
+    """Một lượt crawl chạy nền: trạng thái, tiến độ và kết quả từng phần"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    def __init__(self, params, max_messages=50):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = self.QUEUED
+        self.error = None
+        self.result = None
+        self.messages = []
+        self.articles = []
+        self.max_messages = max_messages
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def log(self, message):
+        """Ghi nhận một thông báo tiến độ (dùng làm callback của crawler)"""
+        with self._lock:
+            self.messages.append(message)
+            if len(self.messages) > self.max_messages:
+                del self.messages[:-self.max_messages]
+
+    def add_article(self, article):
+        """Thêm một bài viết vào kết quả từng phần"""
+        with self._lock:
+            self.articles.append(article)
+
+    def cancel(self):
+        """Yêu cầu dừng job"""
+        self._cancel_event.set()
+        with self._lock:
+            if self.status == self.QUEUED:
+                self.status = self.CANCELLED
+                self.finished_at = time.time()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    @property
+    def finished(self):
+        return self.status in (self.COMPLETED, self.FAILED, self.CANCELLED)
+
+    def to_dict(self, include_articles=True):
+        """Trạng thái job dưới dạng dict để trả về qua API"""
+        with self._lock:
+            data = {
+                'job_id': self.id,
+                'status': self.status,
+                'params': self.params,
+                'progress': {
+                    'articles': len(self.articles),
+                    'max_articles': self.params.get('num_articles'),
+                    'last_message': self.messages[-1] if self.messages else None,
+                    'messages': list(self.messages)
+                },
+                'error': self.error,
+                'result': self.result,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at
+            }
+            if include_articles:
+                data['articles'] = list(self.articles)
+            return data
+
+
+class JobManager:
+    """Chạy các CrawlJob trên một pool luồng giới hạn, từ chối job mới khi hàng đợi đầy"""
+    def __init__(self, max_workers=2, max_queued=10, max_finished=100):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='crawl-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _active_count(self):
+        return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def _prune(self):
+        """Chỉ giữ lại max_finished job đã kết thúc gần nhất"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def submit(self, target, params):
+        """Tạo job mới và đưa vào hàng đợi; target(job) thực hiện việc crawl"""
+        with self._lock:
+            if self._active_count() >= self.max_workers + self.max_queued:
+                raise QueueFullError("Hàng đợi crawl đã đầy, vui lòng thử lại sau")
+            job = CrawlJob(params)
+            self._jobs[job.id] = job
+            self._prune()
+
+        self._executor.submit(self._run, job, target)
+        return job
+
+    def _run(self, job, target):
+        with job._lock:
+            if job.status != CrawlJob.QUEUED:
+                return
+            job.status = CrawlJob.RUNNING
+            job.started_at = time.time()
+
+        try:
+            result = target(job)
+            status = CrawlJob.CANCELLED if job.is_cancelled() else CrawlJob.COMPLETED
+            error = None
+        except Exception as e:
+            result = None
+            status = CrawlJob.FAILED
+            error = str(e)
+
+        with job._lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """Hủy job, trả về job hoặc None nếu không tồn tại"""
+        job = self.get(job_id)
+        if job:
+            job.cancel()
+        return job
+
+    def shutdown(self):
+        """Hủy mọi job đang chờ/chạy và dừng pool"""
+        for job in self.list():
+            job.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
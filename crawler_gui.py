@@ -0,0 +1,270 @@
+import os
+import threading
+from datetime import datetime
+import tkinter as tk
+from tkinter import ttk, scrolledtext, messagebox
+from http_cache import HttpCache
+from seen_index import SeenUrlIndex
+from exporters import EXPORTERS, JsonExporter, create_exporter
+from vn_news_crawler import VnExpressCrawler, VietnamNetCrawler
+
+
+class CrawlerGUI:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("News Crawler")
+        self.root.geometry("800x600")
+
+        # Khởi tạo các crawler, dùng chung cache HTTP và chỉ mục URL đã crawl
+        self.cache = HttpCache(os.path.join("news_data", ".cache"))
+        self.seen_index = SeenUrlIndex(os.path.join("news_data", "seen_urls.db"))
+        self.crawlers = {
+            "VnExpress": VnExpressCrawler(cache=self.cache, seen_index=self.seen_index),
+            "VietnamNet": VietnamNetCrawler(cache=self.cache, seen_index=self.seen_index)
+        }
+        self.current_crawler = self.crawlers["VnExpress"]
+        self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def setup_ui(self):
+        # Frame chính
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # Tiêu đề
+        title_label = ttk.Label(main_frame, text="News Crawler", font=("Helvetica", 16, "bold"))
+        title_label.pack(pady=10)
+
+        # Frame cấu hình
+        config_frame = ttk.LabelFrame(main_frame, text="Cấu hình Crawler", padding="10")
+        config_frame.pack(fill=tk.X, pady=10)
+
+        # Chọn nguồn
+        source_frame = ttk.Frame(config_frame)
+        source_frame.pack(fill=tk.X, pady=5)
+
+        ttk.Label(source_frame, text="Nguồn:").pack(side=tk.LEFT, padx=5)
+
+        self.source_var = tk.StringVar(value="VnExpress")
+        self.source_combobox = ttk.Combobox(source_frame, textvariable=self.source_var, width=20)
+        self.source_combobox['values'] = list(self.crawlers.keys())
+        self.source_combobox.pack(side=tk.LEFT, padx=5)
+        self.source_combobox.bind("<<ComboboxSelected>>", self.update_categories)
+
+        # Chọn danh mục
+        category_frame = ttk.Frame(config_frame)
+        category_frame.pack(fill=tk.X, pady=5)
+
+        ttk.Label(category_frame, text="Danh mục:").pack(side=tk.LEFT, padx=5)
+
+        self.category_var = tk.StringVar()
+        self.category_combobox = ttk.Combobox(category_frame, textvariable=self.category_var, width=30)
+        self.category_combobox.pack(side=tk.LEFT, padx=5)
+
+        # Số trang và số bài viết
+        pages_frame = ttk.Frame(config_frame)
+        pages_frame.pack(fill=tk.X, pady=5)
+
+        ttk.Label(pages_frame, text="Số trang:").pack(side=tk.LEFT, padx=5)
+        self.pages_var = tk.StringVar(value="2")
+        pages_entry = ttk.Entry(pages_frame, textvariable=self.pages_var, width=5)
+        pages_entry.pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(pages_frame, text="Số bài viết:").pack(side=tk.LEFT, padx=5)
+        self.articles_var = tk.StringVar(value="10")
+        articles_entry = ttk.Entry(pages_frame, textvariable=self.articles_var, width=5)
+        articles_entry.pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(pages_frame, text="Số luồng:").pack(side=tk.LEFT, padx=5)
+        self.workers_var = tk.StringVar(value="4")
+        workers_entry = ttk.Entry(pages_frame, textvariable=self.workers_var, width=5)
+        workers_entry.pack(side=tk.LEFT, padx=5)
+
+        self.incremental_var = tk.BooleanVar(value=False)
+        incremental_check = ttk.Checkbutton(pages_frame, text="Chỉ crawl bài mới", variable=self.incremental_var)
+        incremental_check.pack(side=tk.LEFT, padx=5)
+
+        # Thư mục xuất
+        output_frame = ttk.Frame(config_frame)
+        output_frame.pack(fill=tk.X, pady=5)
+
+        ttk.Label(output_frame, text="Thư mục xuất:").pack(side=tk.LEFT, padx=5)
+        self.output_var = tk.StringVar(value="news_data")
+        output_entry = ttk.Entry(output_frame, textvariable=self.output_var, width=30)
+        output_entry.pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(output_frame, text="Định dạng:").pack(side=tk.LEFT, padx=5)
+        self.exporter_var = tk.StringVar(value=JsonExporter.name)
+        exporter_combobox = ttk.Combobox(output_frame, textvariable=self.exporter_var, width=8, state="readonly")
+        exporter_combobox['values'] = list(EXPORTERS)
+        exporter_combobox.pack(side=tk.LEFT, padx=5)
+
+        # Nút crawl
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=10)
+
+        self.crawl_button = ttk.Button(button_frame, text="Bắt đầu Crawl", command=self.start_crawling)
+        self.crawl_button.pack(side=tk.LEFT, padx=5)
+
+        self.stop_button = ttk.Button(button_frame, text="Dừng", command=self.stop_crawling, state=tk.DISABLED)
+        self.stop_button.pack(side=tk.LEFT, padx=5)
+
+        # Khu vực log
+        log_frame = ttk.LabelFrame(main_frame, text="Log", padding="10")
+        log_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+
+        self.log_text = scrolledtext.ScrolledText(log_frame, wrap=tk.WORD, height=15)
+        self.log_text.pack(fill=tk.BOTH, expand=True)
+
+        # Thanh trạng thái
+        self.status_var = tk.StringVar(value="Sẵn sàng")
+        status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
+        status_bar.pack(fill=tk.X, side=tk.BOTTOM, pady=5)
+
+        # Biến để kiểm soát luồng
+        self.crawling = False
+        
+        # Cập nhật danh sách danh mục ban đầu
+        self.update_categories()
+
+    def update_categories(self, event=None):
+        """Cập nhật danh sách danh mục khi thay đổi nguồn"""
+        source = self.source_var.get()
+        self.current_crawler = self.crawlers[source]
+        
+        # Cập nhật combobox danh mục
+        categories = [f"{id}. {name}" for id, name in self.current_crawler.category_names.items()]
+        self.category_combobox['values'] = categories
+        if categories:
+            self.category_combobox.current(0)
+
+    def log(self, message):
+        self.log_text.configure(state=tk.NORMAL)
+        self.log_text.insert(tk.END, f"[{datetime.now().strftime('%H:%M:%S')}] {message}\n")
+        self.log_text.see(tk.END)
+        self.log_text.configure(state=tk.DISABLED)
+        self.status_var.set(message)
+        self.root.update_idletasks()
+
+    def start_crawling(self):
+        if self.crawling:
+            return
+
+        # Lấy thông tin cấu hình
+        source = self.source_var.get()
+        self.current_crawler = self.crawlers[source]
+        
+        category_selection = self.category_var.get()
+        if not category_selection:
+            messagebox.showerror("Lỗi", "Vui lòng chọn danh mục")
+            return
+        
+        category_id = int(category_selection.split('.')[0])
+        category_key = next((k for k, v in self.current_crawler.categories.items() if v == category_id), None)
+
+        if not category_key:
+            messagebox.showerror("Lỗi", "Danh mục không hợp lệ")
+            return
+
+        try:
+            num_pages = int(self.pages_var.get())
+            max_articles = int(self.articles_var.get())
+            max_workers = int(self.workers_var.get())
+            output_dir = self.output_var.get()
+        except ValueError:
+            messagebox.showerror("Lỗi", "Số trang, số bài viết và số luồng phải là số nguyên")
+            return
+
+        # Tạo thư mục xuất nếu chưa tồn tại
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        # Cập nhật UI
+        self.crawl_button.configure(state=tk.DISABLED)
+        self.stop_button.configure(state=tk.NORMAL)
+        self.log_text.configure(state=tk.NORMAL)
+        self.log_text.delete(1.0, tk.END)
+        self.log_text.configure(state=tk.DISABLED)
+
+        # Bắt đầu crawl trong một luồng riêng
+        self.crawling = True
+        threading.Thread(target=self.crawl_process,
+                         args=(category_key, num_pages, max_articles, output_dir, source, max_workers,
+                               self.incremental_var.get(), self.exporter_var.get()),
+                         daemon=True).start()
+
+    def crawl_process(self, category_key, num_pages, max_articles, output_dir, source, max_workers=1,
+                      incremental=False, exporter_name=JsonExporter.name):
+        try:
+            crawler = self.crawlers[source]
+            self.log(f"Bắt đầu crawl nguồn: {source}, danh mục: {crawler.category_names[crawler.categories[category_key]]}")
+
+            # Crawl danh sách và chi tiết bài viết theo pipeline
+            self.log(f"Đang crawl chi tiết tối đa {max_articles} bài viết...")
+            detailed_articles = crawler.crawl_pipeline(category_key, num_pages, max_articles, self.log,
+                                                       max_workers, incremental,
+                                                       should_stop=lambda: not self.crawling)
+
+            if not self.crawling:
+                self.log("Đã dừng crawl theo yêu cầu")
+                self.finish_crawling()
+                return
+
+            if not detailed_articles:
+                self.log("Không tìm thấy bài viết nào. Kết thúc chương trình.")
+                self.finish_crawling()
+                return
+
+            # Xuất dữ liệu bằng exporter đã chọn
+            if exporter_name == JsonExporter.name:
+                # Tạo tên file với timestamp
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                output = os.path.join(output_dir, f"{source.lower()}_{category_key}_{timestamp}.json")
+                crawler.export_to_json(detailed_articles, output, self.log)
+            else:
+                exporter = create_exporter(exporter_name, output_dir)
+                try:
+                    count = exporter.export(detailed_articles, crawler.source_name, category_key)
+                finally:
+                    exporter.close()
+                output = exporter.path
+                self.log(f"Đã lưu {count} bài viết vào {output}")
+
+            self.log("\nQuá trình crawl dữ liệu đã hoàn tất!")
+            self.log(f"Số bài viết đã crawl: {len(detailed_articles)}")
+            stats = self.cache.stats()
+            self.log(f"Cache: {stats['hits']} lần trúng, {stats['revalidated']} lần 304, {stats['misses']} lần trượt")
+            self.log(f"Dữ liệu đã được lưu vào: {output}")
+
+        except Exception as e:
+            self.log(f"Lỗi: {str(e)}")
+        finally:
+            self.finish_crawling()
+
+    def stop_crawling(self):
+        self.crawling = False
+        self.log("Đang dừng crawl...")
+
+    def on_close(self):
+        """Đóng các kết nối của crawler trước khi thoát"""
+        self.crawling = False
+        for crawler in self.crawlers.values():
+            crawler.close()
+        self.seen_index.close()
+        self.root.destroy()
+
+    def finish_crawling(self):
+        self.crawling = False
+        self.root.after(0, lambda: self.crawl_button.configure(state=tk.NORMAL))
+        self.root.after(0, lambda: self.stop_button.configure(state=tk.DISABLED))
+        self.root.after(0, lambda: self.status_var.set("Sẵn sàng"))
+
+
+def main():
+    root = tk.Tk()
+    app = CrawlerGUI(root)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
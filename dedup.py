@@ -0,0 +1,314 @@
+import hashlib
+import html
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from itertools import combinations
+
+TAG_RE = re.compile(r'<[^>]+>')
+WORD_RE = re.compile(r'\w+')
+
+FINGERPRINT_BITS = 64
+
+
+def article_tokens(article):
+    """Tách tiêu đề và nội dung (đã bỏ thẻ HTML) thành các âm tiết viết thường"""
+    text = f"{article.get('title', '')} {article.get('content', '')}"
+    text = html.unescape(TAG_RE.sub(' ', text))
+    text = unicodedata.normalize('NFC', text).lower()
+    return WORD_RE.findall(text)
+
+
+def shingles(tokens, size=3):
+    """Các cụm size âm tiết liên tiếp (tiếng Việt viết tách âm tiết nên cụm 3 âm tiết ~ 1-2 từ)"""
+    if len(tokens) < size:
+        return [' '.join(tokens)] if tokens else []
+    return [' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+
+
+def simhash(features):
+    """SimHash 64 bit: các văn bản gần giống nhau có khoảng cách Hamming nhỏ"""
+    hashes = [
+        format(int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big'),
+               f'0{FINGERPRINT_BITS}b')
+        for feature in features
+    ]
+    if not hashes:
+        return 0
+
+    # Đếm theo cột bit (zip chạy trong C): bit được bật nếu quá nửa số đặc trưng có bit đó
+    half = len(hashes) / 2
+    fingerprint = 0
+    for i, column in enumerate(zip(*hashes)):
+        if column.count('1') > half:
+            fingerprint |= 1 << (FINGERPRINT_BITS - 1 - i)
+    return fingerprint
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def article_simhash(article):
+    return simhash(shingles(article_tokens(article)))
+
+
+def to_signed(fingerprint):
+    """SQLite chỉ lưu số nguyên có dấu 64 bit"""
+    return fingerprint - (1 << FINGERPRINT_BITS) if fingerprint >> 63 else fingerprint
+
+
+def to_unsigned(value):
+    return value & ((1 << FINGERPRINT_BITS) - 1)
+
+
+class NearDuplicateIndex:
+    """Chỉ mục LSH trên SimHash để tìm bài viết gần trùng mà không so sánh từng cặp.
+
+    Fingerprint 64 bit được chia thành blocks khối rời nhau (mặc định max_distance + 2); hai
+    fingerprint cách nhau không quá max_distance bit chắc chắn trùng nhau ở ít nhất
+    blocks - max_distance khối. Mỗi tổ hợp blocks - max_distance khối là một bảng có khóa ghép từ
+    các khối đó (bảng hoán vị của SimHash), nên chỉ cần so sánh với các bài cùng khóa ở một bảng.
+    Với max_distance=5, 7 khối cho 21 bảng có khóa 18-19 bit: mỗi khóa chứa khoảng N / 300.000 bài
+    (6 dải 10 bit là N / 1.024), số bài phải so sánh gần như không đổi tới vài trăm nghìn bài.
+
+    Trong bộ nhớ, mỗi bảng là một mảng đã sắp xếp các fingerprint được hoán vị cho các khối của
+    bảng lên đầu (hoán vị giữ nguyên khoảng cách Hamming): bài cùng khóa nằm liền nhau, tìm bằng
+    bisect, mỗi bài chỉ tốn 8 byte ở mỗi bảng.
+
+    Mặc định các bảng được nạp vào bộ nhớ khi khởi tạo nên chỉ đúng khi một tiến trình ghi vào
+    chỉ mục. Với shared=True, các bảng được tra và ghi thẳng trong SQLite (bảng simhash_bands),
+    mỗi lần gắn nhãn là một transaction ghi, nên nhiều tiến trình dùng chung file chỉ mục
+    (các worker của frontier_crawl) gom bài gần trùng vào cùng cụm.
+    """
+    def __init__(self, path=None, max_distance=5, shared=False, blocks=None):
+        if shared and not path:
+            raise ValueError("Chỉ mục dùng chung cần đường dẫn file SQLite")
+        self.max_distance = max_distance
+        self.num_blocks = blocks or max_distance + 2
+        if not max_distance < self.num_blocks <= FINGERPRINT_BITS:
+            raise ValueError(f"Số khối phải lớn hơn max_distance ({max_distance}) và không quá {FINGERPRINT_BITS}")
+        # (vị trí, độ rộng) của từng khối, các khối đầu rộng hơn 1 bit nếu không chia hết
+        width, extra = divmod(FINGERPRINT_BITS, self.num_blocks)
+        self._blocks = []
+        shift = 0
+        for block in range(self.num_blocks):
+            block_width = width + (block < extra)
+            self._blocks.append((shift, block_width))
+            shift += block_width
+        self._tables = list(combinations(range(self.num_blocks), self.num_blocks - max_distance))
+        # Thứ tự khối trong fingerprint hoán vị của từng bảng và số bit đầu dùng làm khóa
+        self._orders = [table + tuple(block for block in range(self.num_blocks) if block not in table)
+                        for table in self._tables]
+        self._key_bits = [sum(self._blocks[block][1] for block in table) for table in self._tables]
+        # Cách chia khối lưu trong user_version của file SQLite, đổi thì dựng lại các bảng
+        self.layout = self.num_blocks << 8 | max_distance
+        self._sorted = [array('Q') for _ in self._tables]
+        # fingerprint -> các URL có fingerprint đó (bài trùng hoàn toàn chỉ thêm vào các bảng một lần)
+        self._urls = {}
+        self._fingerprints = {}
+        self._clusters = {}
+        self._lock = threading.Lock()
+        self.shared = shared
+
+        self._conn = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('BEGIN IMMEDIATE')
+            with self._conn:
+                self._conn.execute('''
+                    CREATE TABLE IF NOT EXISTS simhashes (
+                        url TEXT PRIMARY KEY,
+                        fingerprint INTEGER NOT NULL,
+                        cluster TEXT NOT NULL
+                    )
+                ''')
+                # Khóa của từng fingerprint ở mỗi bảng (band), dùng khi tra cứu trực tiếp trong SQLite (shared=True)
+                self._conn.execute('''
+                    CREATE TABLE IF NOT EXISTS simhash_bands (
+                        band INTEGER NOT NULL,
+                        key INTEGER NOT NULL,
+                        url TEXT NOT NULL,
+                        PRIMARY KEY (band, key, url)
+                    ) WITHOUT ROWID
+                ''')
+                # File chỉ mục tạo trước khi có bảng khóa hoặc với cách chia khối khác: dựng lại từ fingerprint
+                if self._conn.execute('PRAGMA user_version').fetchone()[0] != self.layout:
+                    self._conn.execute('DELETE FROM simhash_bands')
+                    rows = self._conn.execute('SELECT url, fingerprint FROM simhashes').fetchall()
+                    self._conn.executemany(
+                        'INSERT OR IGNORE INTO simhash_bands (band, key, url) VALUES (?, ?, ?)',
+                        [(band, key, url) for url, fingerprint in rows
+                         for band, key in self._band_keys(to_unsigned(fingerprint))]
+                    )
+                    self._conn.execute(f'PRAGMA user_version = {self.layout}')
+            if not shared:
+                self._load(self._conn.execute('SELECT url, fingerprint, cluster FROM simhashes'))
+
+    def _permutations(self, fingerprint):
+        """(bảng, fingerprint hoán vị) ở từng bảng: các khối của bảng lên đầu, theo sau là các khối còn lại"""
+        values = [fingerprint >> shift & ((1 << width) - 1) for shift, width in self._blocks]
+        for band, order in enumerate(self._orders):
+            permuted = 0
+            for block in order:
+                permuted = permuted << self._blocks[block][1] | values[block]
+            yield band, permuted
+
+    def _unpermute(self, band, permuted):
+        fingerprint = 0
+        remaining = FINGERPRINT_BITS
+        for block in self._orders[band]:
+            shift, width = self._blocks[block]
+            remaining -= width
+            fingerprint |= (permuted >> remaining & ((1 << width) - 1)) << shift
+        return fingerprint
+
+    def _band_keys(self, fingerprint):
+        """(bảng, khóa) của fingerprint ở từng bảng: khóa là các khối của bảng ghép lại"""
+        for band, permuted in self._permutations(fingerprint):
+            yield band, permuted >> (FINGERPRINT_BITS - self._key_bits[band])
+
+    def _load(self, rows):
+        """Nạp các (url, fingerprint có dấu, cụm) đã lưu, sắp xếp các bảng một lần"""
+        for url, fingerprint, cluster in rows:
+            fingerprint = to_unsigned(fingerprint)
+            self._fingerprints[url] = fingerprint
+            self._clusters[url] = cluster
+            self._urls.setdefault(fingerprint, []).append(url)
+        tables = [[] for _ in self._tables]
+        for fingerprint in self._urls:
+            for band, permuted in self._permutations(fingerprint):
+                tables[band].append(permuted)
+        self._sorted = [array('Q', sorted(table)) for table in tables]
+
+    def _insert(self, url, fingerprint, cluster):
+        self._fingerprints[url] = fingerprint
+        self._clusters[url] = cluster
+        urls = self._urls.setdefault(fingerprint, [])
+        urls.append(url)
+        if len(urls) == 1:
+            for band, permuted in self._permutations(fingerprint):
+                insort(self._sorted[band], permuted)
+
+    def _candidates(self, fingerprint):
+        """Các fingerprint đã lưu cùng khóa với fingerprint ở ít nhất một bảng"""
+        candidates = set()
+        for band, permuted in self._permutations(fingerprint):
+            table = self._sorted[band]
+            low_bits = FINGERPRINT_BITS - self._key_bits[band]
+            key = permuted >> low_bits
+            start = bisect_left(table, key << low_bits)
+            end = bisect_left(table, (key + 1) << low_bits, start)
+            candidates.update(self._unpermute(band, stored) for stored in table[start:end])
+        return candidates
+
+    def _stored_candidates(self, fingerprint):
+        """Như _candidates nhưng tra trong SQLite, trả về các (url, fingerprint, cụm)"""
+        keys = list(self._band_keys(fingerprint))
+        values = ', '.join('(?, ?)' for _ in keys)
+        # CROSS JOIN giữ thứ tự duyệt: tra từng khóa theo khóa chính của simhash_bands, không quét cả bảng
+        return self._conn.execute(
+            f'WITH k (band, key) AS (VALUES {values}) '
+            'SELECT DISTINCT s.url, s.fingerprint, s.cluster FROM k '
+            'CROSS JOIN simhash_bands b ON b.band = k.band AND b.key = k.key JOIN simhashes s ON s.url = b.url',
+            [value for key in keys for value in key]
+        ).fetchall()
+
+    def _find(self, fingerprint, exclude=None):
+        best_url, best_distance = None, None
+        for candidate in self._candidates(fingerprint):
+            distance = hamming_distance(fingerprint, candidate)
+            if distance > self.max_distance:
+                continue
+            # Cùng khoảng cách thì chọn URL nhỏ nhất để kết quả không phụ thuộc thứ tự duyệt
+            for url in self._urls[candidate]:
+                if url != exclude and (best_distance is None or (distance, url) < (best_distance, best_url)):
+                    best_url, best_distance = url, distance
+        return best_url, best_distance
+
+    def _find_stored(self, fingerprint, exclude=None):
+        """Như _find nhưng tra các bảng trong SQLite, trả về (url, khoảng cách, cụm)"""
+        best_url, best_distance, best_cluster = None, None, None
+        for url, stored, cluster in self._stored_candidates(fingerprint):
+            if url == exclude:
+                continue
+            distance = hamming_distance(fingerprint, to_unsigned(stored))
+            if distance <= self.max_distance and (best_distance is None or (distance, url) < (best_distance, best_url)):
+                best_url, best_distance, best_cluster = url, distance, cluster
+        return best_url, best_distance, best_cluster
+
+    def _store(self, url, fingerprint, cluster):
+        """Lưu fingerprint và khóa ở các bảng của bài viết vào SQLite (trong transaction của bên gọi)"""
+        self._conn.execute('INSERT OR REPLACE INTO simhashes (url, fingerprint, cluster) VALUES (?, ?, ?)',
+                           (url, to_signed(fingerprint), cluster))
+        self._conn.executemany('INSERT OR IGNORE INTO simhash_bands (band, key, url) VALUES (?, ?, ?)',
+                               [(band, key, url) for band, key in self._band_keys(fingerprint)])
+
+    def find_duplicate(self, article):
+        """Tìm bài viết gần trùng đã có trong chỉ mục, trả về (url, khoảng cách) hoặc (None, None)"""
+        fingerprint = article_simhash(article)
+        with self._lock:
+            if self.shared:
+                return self._find_stored(fingerprint, exclude=article.get('url'))[:2]
+            return self._find(fingerprint, exclude=article.get('url'))
+
+    def tag(self, article):
+        """Gắn nhãn cụm cho bài viết và thêm vào chỉ mục.
+
+        Đặt article['duplicate_of'] là URL bài đại diện của cụm nếu bài viết gần trùng
+        với một bài đã có, ngược lại là None.
+        """
+        url = article.get('url')
+        fingerprint = article_simhash(article)
+        if self.shared:
+            cluster = self._tag_shared(url, fingerprint)
+            article['duplicate_of'] = cluster if cluster != url else None
+            return article
+
+        with self._lock:
+            if url in self._fingerprints:
+                # Bài đã có trong chỉ mục (crawl lại): giữ nguyên cụm cũ
+                cluster = self._clusters[url]
+            else:
+                match, _ = self._find(fingerprint, exclude=url)
+                cluster = self._clusters[match] if match else url
+                self._insert(url, fingerprint, cluster)
+                if self._conn is not None:
+                    with self._conn:
+                        self._store(url, fingerprint, cluster)
+
+        article['duplicate_of'] = cluster if cluster != url else None
+        return article
+
+    def _tag_shared(self, url, fingerprint):
+        """Tìm cụm và lưu bài viết trong một transaction ghi, để hai tiến trình không cùng lúc mở cụm mới"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            with self._conn:
+                row = self._conn.execute('SELECT cluster FROM simhashes WHERE url = ?', (url,)).fetchone()
+                if row is not None:
+                    # Bài đã có trong chỉ mục (crawl lại): giữ nguyên cụm cũ
+                    return row[0]
+                match, _, cluster = self._find_stored(fingerprint, exclude=url)
+                cluster = cluster if match else url
+                self._store(url, fingerprint, cluster)
+                return cluster
+
+    def __len__(self):
+        if self.shared:
+            with self._lock:
+                return self._conn.execute('SELECT COUNT(*) FROM simhashes').fetchone()[0]
+        return len(self._fingerprints)
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
@@ -0,0 +1,356 @@
+import gzip
+import itertools
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime
+
+from seen_index import content_fingerprint
+
+try:
+    import zstandard
+except ImportError:
+    # zstandard là tùy chọn, không có thì JsonLinesExporter nén bằng gzip
+    zstandard = None
+
+DECOMPRESS_ERRORS = (zlib.error, zstandard.ZstdError) if zstandard else (zlib.error,)
+
+
+class JsonExporter:
+    """Ghi mỗi lượt crawl ra một file JSON có timestamp trong thư mục xuất"""
+    name = 'json'
+    streaming = False
+
+    def __init__(self, output_dir='news_data'):
+        self.output_dir = output_dir
+
+    def export(self, articles, source, category):
+        """Ghi danh sách bài viết, trả về đường dẫn file"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.makedirs(self.output_dir, exist_ok=True)
+        filepath = os.path.join(self.output_dir, f"{source.lower()}_{category}_{timestamp}.json")
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(articles, f, ensure_ascii=False, indent=4)
+        return filepath
+
+    def close(self):
+        pass
+
+
+class SQLiteExporter:
+    """Lưu bài viết vào SQLite (chế độ WAL), mỗi URL một dòng; crawl lại sẽ cập nhật dòng cũ"""
+    name = 'sqlite'
+    streaming = False
+
+    COLUMNS = ('url', 'source', 'category', 'category_id', 'title', 'excerpt', 'content',
+               'image', 'status', 'fingerprint', 'crawled_at', 'updated_at')
+
+    def __init__(self, path=os.path.join('news_data', 'articles.db'), batch_size=500):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS articles (
+                    url TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    category TEXT,
+                    category_id INTEGER,
+                    title TEXT,
+                    excerpt TEXT,
+                    content TEXT,
+                    image TEXT,
+                    status TEXT,
+                    fingerprint TEXT,
+                    crawled_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_source ON articles (source)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_category ON articles (source, category)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_crawled_at ON articles (crawled_at)')
+
+    def export(self, articles, source, category):
+        """Thêm mới hoặc cập nhật các bài viết, trả về số bài đã ghi"""
+        return self.upsert_articles(articles, source, category)
+
+    def upsert_articles(self, articles, source, category):
+        """Ghi bài viết theo lô, mỗi lô trong một transaction; giữ nguyên thời điểm crawl lần đầu"""
+        now = time.time()
+        rows = []
+        for article in articles:
+            if not article.get('url'):
+                print(f"Bỏ qua bài viết không có URL: {article.get('title', '')}")
+                continue
+            rows.append((
+                article['url'], source, category, article.get('category'), article.get('title'),
+                article.get('excerpt'), article.get('content'), article.get('image'), article.get('status'),
+                content_fingerprint(article), now, now
+            ))
+
+        updates = ', '.join(f"{column} = excluded.{column}" for column in self.COLUMNS
+                            if column not in ('url', 'crawled_at'))
+        sql = (f"INSERT INTO articles ({', '.join(self.COLUMNS)}) "
+               f"VALUES ({', '.join('?' for _ in self.COLUMNS)}) "
+               f"ON CONFLICT(url) DO UPDATE SET {updates}")
+
+        with self._lock:
+            for start in range(0, len(rows), self.batch_size):
+                with self._conn:
+                    self._conn.executemany(sql, rows[start:start + self.batch_size])
+        return len(rows)
+
+    def get_articles(self, source=None, category=None, since=None, limit=100):
+        """Truy vấn bài viết theo nguồn, danh mục và thời điểm crawl, mới nhất trước"""
+        conditions = []
+        params = []
+        if source:
+            conditions.append('source = ?')
+            params.append(source)
+        if category:
+            conditions.append('category = ?')
+            params.append(category)
+        if since:
+            conditions.append('crawled_at >= ?')
+            params.append(since)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM articles {where} ORDER BY crawled_at DESC LIMIT ?", params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, source=None):
+        with self._lock:
+            if source is None:
+                return self._conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+            return self._conn.execute('SELECT COUNT(*) FROM articles WHERE source = ?', (source,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _decompressed_chunks(f, compression):
+    """Giải nén lần lượt từng member gzip/frame zstd, dừng ở phần cuối bị cắt dở"""
+    def new_decompressor():
+        if compression == 'gzip':
+            return zlib.decompressobj(wbits=31)
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    decompressor = new_decompressor()
+    while True:
+        block = f.read(64 * 1024)
+        if not block:
+            return
+        while block:
+            try:
+                yield decompressor.decompress(block)
+            except DECOMPRESS_ERRORS:
+                return
+            if decompressor.eof:
+                block = decompressor.unused_data
+                decompressor = new_decompressor()
+            else:
+                block = b''
+
+
+def read_jsonl(path):
+    """Đọc từng bài viết trong file JSON Lines (nén gzip/zstd hoặc không), kể cả file .part dở dang.
+
+    Dòng cuối bị cắt giữa chừng (crawl bị dừng đột ngột khi đang ghi) được bỏ qua.
+    """
+    name = path[:-len('.part')] if path.endswith('.part') else path
+    if name.endswith('.gz'):
+        compression = 'gzip'
+    elif name.endswith('.zst'):
+        if zstandard is None:
+            raise ValueError(f"Cần cài đặt zstandard để đọc {path}")
+        compression = 'zstd'
+    else:
+        compression = None
+
+    with open(path, 'rb') as f:
+        chunks = iter(lambda: f.read(64 * 1024), b'') if compression is None else _decompressed_chunks(f, compression)
+        pending = b''
+        for chunk in chunks:
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class JsonLinesExporter:
+    """Ghi bài viết ra file JSON Lines ngay khi phân tích xong, mỗi bài một dòng, nén gzip/zstd tùy chọn.
+
+    File đang ghi có đuôi .part và được đổi tên khi hoàn tất (xoay file theo dung lượng/thời gian hoặc khi
+    đóng). Mỗi dòng được flush ngay và là một member gzip/frame zstd riêng, nên file .part của lượt crawl bị
+    dừng đột ngột vẫn giải nén và đọc được tới dòng cuối cùng; lần chạy sau tự hoàn tất các file đó.
+    """
+    name = 'jsonl'
+    # Ghi từng bài qua write() thay vì gom cả lượt crawl rồi mới export()
+    streaming = True
+    EXTENSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+    # Số thứ tự file, dùng chung mọi exporter trong tiến trình để tên file không trùng
+    _sequence = itertools.count(1)
+
+    def __init__(self, output_dir='news_data', compression='gzip', max_bytes=256 * 1024 * 1024, max_age=3600,
+                 prefix='articles', level=6):
+        if compression not in self.EXTENSIONS:
+            raise ValueError(f"Kiểu nén không hợp lệ: {compression}. Chọn gzip, zstd hoặc None")
+        if compression == 'zstd' and zstandard is None:
+            print("Chưa cài đặt zstandard, dùng gzip thay thế")
+            compression = 'gzip'
+
+        self.output_dir = output_dir
+        self.compression = compression
+        # Xoay sang file mới khi file hiện tại vượt max_bytes (bytes trên đĩa) hoặc đã mở quá max_age giây
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.prefix = prefix
+        self.level = level
+        self._compressor = zstandard.ZstdCompressor(level=level) if compression == 'zstd' else None
+        self._lock = threading.Lock()
+        self._file = None
+        self._part_path = None
+        self._opened_at = 0
+        self.path = None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.recover()
+
+    def _final_path(self, part_path):
+        return part_path[:-len('.part')]
+
+    @staticmethod
+    def process_alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def recover(self):
+        """Hoàn tất các file .part còn lại từ lượt chạy bị dừng đột ngột, bỏ dòng cuối bị cắt dở nếu có.
+
+        Bỏ qua file của tiến trình vẫn đang chạy (pid nằm trong tên file).
+        """
+        pattern = re.compile(rf"{re.escape(self.prefix)}_\d{{8}}_\d{{6}}_(\d+)_\d+\.jsonl(\.gz|\.zst)?\.part")
+        for name in sorted(os.listdir(self.output_dir)):
+            match = pattern.fullmatch(name)
+            if not match or self.process_alive(int(match.group(1))):
+                continue
+            part_path = os.path.join(self.output_dir, name)
+            try:
+                articles = list(read_jsonl(part_path))
+            except (OSError, ValueError) as e:
+                print(f"Không đọc được file dở dang {part_path}: {e}")
+                continue
+            final_path = self._final_path(part_path)
+            tmp_path = f"{final_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                for article in articles:
+                    f.write(self._encode(article, compression=self.compression_of(name)))
+            os.replace(tmp_path, final_path)
+            os.remove(part_path)
+            print(f"Đã hoàn tất file dở dang {final_path} ({len(articles)} bài viết)")
+
+    @staticmethod
+    def compression_of(name):
+        name = name[:-len('.part')] if name.endswith('.part') else name
+        if name.endswith('.gz'):
+            return 'gzip'
+        if name.endswith('.zst'):
+            return 'zstd'
+        return None
+
+    def _encode(self, record, compression=None):
+        data = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        if compression == 'gzip':
+            return gzip.compress(data, compresslevel=self.level, mtime=0)
+        if compression == 'zstd':
+            compressor = self._compressor or zstandard.ZstdCompressor(level=self.level)
+            return compressor.compress(data)
+        return data
+
+    def _open(self):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        sequence = next(self._sequence)
+        filename = f"{self.prefix}_{timestamp}_{os.getpid()}_{sequence:04d}.jsonl{self.EXTENSIONS[self.compression]}"
+        self._part_path = os.path.join(self.output_dir, f"{filename}.part")
+        self._file = open(self._part_path, 'wb')
+        self._opened_at = time.time()
+
+    def _finalize(self):
+        """Đóng file đang ghi và đổi tên bỏ đuôi .part"""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        self.path = self._final_path(self._part_path)
+        os.replace(self._part_path, self.path)
+
+    def write(self, article, source=None, category=None):
+        """Ghi ngay một bài viết thành một dòng, trả về đường dẫn file (sau khi hoàn tất sẽ bỏ đuôi .part)"""
+        record = dict(article)
+        if source is not None:
+            record['source'] = source
+        if category is not None:
+            record['category_slug'] = category
+        data = self._encode(record, self.compression)
+
+        with self._lock:
+            if self._file is not None and (self._file.tell() >= self.max_bytes
+                                           or time.time() - self._opened_at >= self.max_age):
+                self._finalize()
+            if self._file is None:
+                self._open()
+            self._file.write(data)
+            self._file.flush()
+            return self._final_path(self._part_path)
+
+    def export(self, articles, source, category):
+        """Ghi danh sách bài viết, trả về đường dẫn file cuối cùng"""
+        path = None
+        for article in articles:
+            path = self.write(article, source, category)
+        return path
+
+    def close(self):
+        with self._lock:
+            self._finalize()
+
+
+EXPORTERS = {
+    JsonExporter.name: JsonExporter,
+    SQLiteExporter.name: SQLiteExporter,
+    JsonLinesExporter.name: JsonLinesExporter
+}
+
+
+def create_exporter(name, output_dir='news_data'):
+    """Tạo exporter theo tên ('json', 'sqlite' hoặc 'jsonl') ghi vào thư mục xuất"""
+    if name == SQLiteExporter.name:
+        return SQLiteExporter(os.path.join(output_dir, 'articles.db'))
+    if name == JsonExporter.name:
+        return JsonExporter(output_dir)
+    if name == JsonLinesExporter.name:
+        return JsonLinesExporter(os.path.join(output_dir, 'jsonl'))
+    raise ValueError(f"Exporter không hợp lệ: {name}. Chọn một trong {', '.join(EXPORTERS)}")
@@ -0,0 +1,514 @@
+"""Trích xuất bài viết theo cấu hình khai báo (SiteSpec) của từng trang báo.
+
+Mỗi trang báo mô tả trang danh mục và trang bài viết bằng dict: selector của từng trường,
+thứ tự ảnh dự phòng, các thẻ cần loại bỏ và thuộc tính được giữ lại khi làm sạch nội dung.
+SiteSpec biên dịch cấu hình một lần khi nạp lớp crawler (selector, bộ lọc TargetedStrainer,
+quy tắc làm sạch) nên mỗi lần phân tích trang không phải dựng lại gì.
+"""
+import re
+
+import soupsieve
+from bs4 import SoupStrainer, Tag
+
+# Style cho chú thích ảnh (căn giữa và chữ nghiêng)
+CAPTION_STYLE = 'text-align:center; font-style:italic;'
+
+# Một phần selector dạng tag.class#id (không có thuộc tính, pseudo-class hay ký tự escape)
+SIMPLE_COMPOUND = re.compile(r'([a-zA-Z][\w-]*)?((?:[.#][\w-]+)*)')
+
+
+def normalize_url(url, base_url):
+    """URL đầy đủ từ đường dẫn tương đối hoặc dạng //host/..."""
+    if url.startswith('//'):
+        return 'https:' + url
+    if not url.startswith('http'):
+        return base_url + url
+    return url
+
+
+def normalize_srcset(srcset, base_url):
+    """Chuẩn hóa từng URL trong srcset, giữ nguyên mô tả kích thước (2x, 640w...) phía sau"""
+    srcs = []
+    for part in srcset.split(','):
+        words = part.strip().split(' ')
+        url = normalize_url(words[0], base_url)
+        srcs.append(url + (' ' + ' '.join(words[1:]) if len(words) > 1 else ''))
+    return ', '.join(srcs)
+
+
+def first_attr(tag, attrs):
+    """Giá trị của thuộc tính đầu tiên có trên thẻ theo thứ tự ưu tiên, '' nếu không có"""
+    for attr in attrs:
+        if tag.has_attr(attr):
+            return tag[attr]
+    return ''
+
+
+class Selector:
+    """CSS selector được biên dịch một lần.
+
+    Selector chỉ gồm tag, .class, #id và quan hệ tổ tiên - con cháu (dấu cách) được so khớp
+    trực tiếp trên cây, nhanh hơn nhiều so với soupsieve khi phải thử trên từng phần tử;
+    các selector khác dùng bản biên dịch của soupsieve. Cả hai cho cùng kết quả.
+    """
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.compiled = soupsieve.compile(pattern)
+        self.chains = self.compile_chains(pattern)
+        # Tên thẻ có thể khớp, dùng find_all(tên) thay vì duyệt mọi thẻ; None nếu không giới hạn
+        self.names = None
+        # Các chuỗi xếp theo tên thẻ, id hoặc một class của phần bên phải nhất: phần tử chỉ cần
+        # thử các chuỗi có thể khớp với nó
+        self.by_name = {}
+        self.by_id = {}
+        self.by_class = {}
+        if self.chains is not None:
+            if all(chain[0][0] for chain in self.chains):
+                self.names = sorted({chain[0][0] for chain in self.chains})
+            for chain in self.chains:
+                name, classes, element_id = chain[0]
+                if name:
+                    self.by_name.setdefault(name, []).append(chain)
+                elif element_id:
+                    self.by_id.setdefault(element_id, []).append(chain)
+                else:
+                    self.by_class.setdefault(min(classes), []).append(chain)
+
+    def __repr__(self):
+        return f"Selector({self.pattern!r})"
+
+    @staticmethod
+    def compile_chains(pattern):
+        """Mỗi selector trong danh sách thành chuỗi (tên, class, id) từ phải sang trái, None nếu không đơn giản"""
+        chains = []
+        for selector in pattern.split(','):
+            chain = []
+            for compound in reversed(selector.split()):
+                match = SIMPLE_COMPOUND.fullmatch(compound)
+                if not match:
+                    return None
+                name, rest = match.groups()
+                parts = re.findall(r'[.#][\w-]+', rest)
+                ids = {part[1:] for part in parts if part[0] == '#'}
+                if len(ids) > 1:
+                    return None
+                chain.append((
+                    name.lower() if name else None,
+                    frozenset(part[1:] for part in parts if part[0] == '.'),
+                    ids.pop() if ids else None
+                ))
+            if not chain:
+                return None
+            chains.append(chain)
+        return chains
+
+    @staticmethod
+    def matches_compound(element, compound):
+        name, classes, element_id = compound
+        if name and element.name != name:
+            return False
+        attrs = element.attrs
+        if element_id and attrs.get('id') != element_id:
+            return False
+        if classes:
+            current = attrs.get('class') or ()
+            if isinstance(current, str):
+                current = current.split()
+            if not classes.issubset(current):
+                return False
+        return True
+
+    def matches_chain(self, element, chain):
+        if not self.matches_compound(element, chain[0]):
+            return False
+        # Quan hệ tổ tiên - con cháu: khớp tham lam với tổ tiên gần nhất là đủ
+        ancestor = element.parent
+        for compound in chain[1:]:
+            while ancestor is not None and not self.matches_compound(ancestor, compound):
+                ancestor = ancestor.parent
+            if ancestor is None:
+                return False
+            ancestor = ancestor.parent
+        return True
+
+    def candidate_chains(self, element):
+        """Các chuỗi mà phần bên phải nhất có thể khớp phần tử"""
+        chains = self.by_name.get(element.name, ())
+        if self.by_id:
+            chains = [*chains, *self.by_id.get(element.attrs.get('id'), ())]
+        if self.by_class:
+            classes = element.attrs.get('class') or ()
+            if isinstance(classes, str):
+                classes = classes.split()
+            for name in classes:
+                if name in self.by_class:
+                    chains = [*chains, *self.by_class[name]]
+        return chains
+
+    def match(self, element):
+        """Phần tử có khớp selector không"""
+        if self.chains is None:
+            return self.compiled.match(element)
+        for chain in self.candidate_chains(element):
+            if self.matches_chain(element, chain):
+                return True
+        return False
+
+    def select(self, root):
+        """Các phần tử con cháu của root khớp selector, theo thứ tự tài liệu"""
+        if self.chains is None:
+            return self.compiled.select(root)
+        candidates = root.find_all(self.names) if self.names else root.find_all(True)
+        return [element for element in candidates if self.match(element)]
+
+    def select_one(self, root):
+        """Phần tử con cháu đầu tiên của root khớp selector, None nếu không có"""
+        if self.chains is None:
+            return self.compiled.select_one(root)
+        for element in root.descendants:
+            if isinstance(element, Tag) and self.match(element):
+                return element
+        return None
+
+
+class TargetedStrainer(SoupStrainer):
+    """Chỉ dựng cây cho các thẻ khớp điều kiện (kèm toàn bộ thẻ con), bỏ qua phần còn lại của trang.
+
+    Thẻ khớp luôn giữ nguyên cả cây con nên các selector bắt đầu từ thẻ đó vẫn cho cùng kết quả;
+    selector dạng "tổ tiên con-cháu" cần giữ cả thẻ tổ tiên.
+    """
+    def __init__(self, names=(), classes=(), ids=(), meta_properties=()):
+        super().__init__()
+        self.names = frozenset(names)
+        self.classes = frozenset(classes)
+        self.ids = frozenset(ids)
+        self.meta_properties = frozenset(meta_properties)
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        if name in self.names:
+            return True
+        if not attrs:
+            return False
+        if name == 'meta':
+            return attrs.get('property') in self.meta_properties
+        if attrs.get('id') in self.ids:
+            return True
+        classes = attrs.get('class')
+        if not classes:
+            return False
+        if isinstance(classes, str):
+            classes = classes.split()
+        return not self.classes.isdisjoint(classes)
+
+    def allow_string_creation(self, string):
+        # Chuỗi nằm ngoài các thẻ được giữ lại không cần thiết
+        return False
+
+
+class CleanRule:
+    """Quy tắc làm sạch một loại thẻ trong nội dung bài viết.
+
+    src_from: các thuộc tính ảnh lazy-load chép vào src (lấy thuộc tính đầu tiên có);
+    keep: thuộc tính được giữ, các thuộc tính khác bị xóa; keep_values: thuộc tính chỉ được giữ
+    khi có đúng giá trị đó; normalize: thuộc tính chứa URL cần chuẩn hóa (src, srcset...);
+    set: thuộc tính gán thêm sau khi làm sạch.
+    """
+    KEYS = frozenset(('src_from', 'keep', 'keep_values', 'normalize', 'set'))
+
+    def __init__(self, src_from=(), keep=(), keep_values=None, normalize=(), set=None):
+        self.src_from = tuple(src_from)
+        self.keep = frozenset(keep)
+        self.keep_values = dict(keep_values or {})
+        self.normalize = tuple(normalize)
+        self.set = dict(set or {})
+
+    def apply(self, tag, base_url):
+        for attr in self.src_from:
+            if tag.has_attr(attr):
+                tag['src'] = tag[attr]
+                break
+        for attr in list(tag.attrs):
+            if attr not in self.keep and (attr not in self.keep_values or tag[attr] != self.keep_values[attr]):
+                del tag[attr]
+        for attr in self.normalize:
+            if tag.has_attr(attr):
+                if attr == 'srcset':
+                    tag[attr] = normalize_srcset(tag[attr], base_url)
+                else:
+                    tag[attr] = normalize_url(tag[attr], base_url)
+        for attr, value in self.set.items():
+            tag[attr] = value
+
+
+class SiteSpec:
+    """Cấu hình trích xuất của một trang báo, biên dịch một lần khi tạo.
+
+    listing (trang danh mục), một trong hai cách tìm bài viết:
+      items: selector khối bài viết; title, description, thumbnail được tìm bên trong từng khối
+      links: selector link tiêu đề; description, thumbnail lấy từ phần tử cha gần nhất
+             (tối đa levels cấp) có chứa chúng
+      relative_links_only: bỏ qua link không phải đường dẫn tương đối (link ra trang khác)
+    detail (trang bài viết):
+      parse_only: tham số của TargetedStrainer, các phần trang cần dựng cây
+      title: danh sách selector thử lần lượt; excerpt: selector tóm tắt, không có thì lấy đoạn
+             đầu tiên của nội dung; excerpt_after_content: tìm tóm tắt sau khi làm sạch nội dung
+      image: danh sách ảnh dự phòng {'select', 'find' (tùy chọn), 'attrs'} thử lần lượt
+      content: selector khối nội dung; clean: {tên thẻ: tham số CleanRule}; unwrap_figures: đưa
+             picture trong figure ra ngoài, chú thích thành đoạn văn; remove: selector các phần
+             cần xóa; collect: các thẻ lấy vào nội dung, collect_children: chỉ lấy thẻ con trực tiếp
+    Ảnh dạng {'select', 'attrs'}: lấy thuộc tính đầu tiên có trong attrs của phần tử khớp select
+    (hoặc của phần tử khớp find bên trong nó).
+    """
+    LISTING_KEYS = frozenset(('items', 'links', 'title', 'description', 'thumbnail', 'levels',
+                              'relative_links_only'))
+    DETAIL_KEYS = frozenset(('parse_only', 'title', 'excerpt', 'excerpt_after_content', 'image', 'content',
+                             'clean', 'unwrap_figures', 'remove', 'collect', 'collect_children'))
+
+    def __init__(self, listing, detail):
+        self.check_keys('listing', listing, self.LISTING_KEYS)
+        self.check_keys('detail', detail, self.DETAIL_KEYS)
+        if ('items' in listing) == ('links' in listing):
+            raise ValueError("Cấu hình listing cần đúng một trong hai khóa 'items' hoặc 'links'")
+        if 'items' in listing and 'title' not in listing:
+            raise ValueError("Cấu hình listing với 'items' cần khóa 'title'")
+        for name, rule in detail.get('clean', {}).items():
+            self.check_keys(f"clean.{name}", rule, CleanRule.KEYS)
+
+        # Trang danh mục
+        self.items = self.compile(listing.get('items'))
+        self.links = self.compile(listing.get('links'))
+        self.title = self.compile(listing.get('title'))
+        self.description = self.compile(listing.get('description'))
+        self.thumbnail = self.compile_images(listing.get('thumbnail', ()))
+        self.levels = listing.get('levels', 3)
+        self.relative_links_only = listing.get('relative_links_only', False)
+
+        # Trang bài viết
+        self.strainer = TargetedStrainer(**detail['parse_only']) if 'parse_only' in detail else None
+        self.detail_title = [self.compile(pattern) for pattern in detail.get('title', ())]
+        self.excerpt = self.compile(detail.get('excerpt'))
+        self.excerpt_after_content = detail.get('excerpt_after_content', False)
+        self.image = self.compile_images(detail.get('image', ()))
+        self.content = self.compile(detail.get('content'))
+        self.clean_rules = {name: CleanRule(**rule) for name, rule in detail.get('clean', {}).items()}
+        self.unwrap_figures = detail.get('unwrap_figures', False)
+        self.remove = self.compile(detail.get('remove'))
+        self.collect = list(detail.get('collect', ()))
+        self.collect_children = detail.get('collect_children', False)
+
+    @staticmethod
+    def check_keys(section, config, allowed):
+        unknown = set(config) - allowed
+        if unknown:
+            raise ValueError(f"Khóa không hợp lệ trong cấu hình {section}: {', '.join(sorted(unknown))}")
+
+    @staticmethod
+    def compile(pattern):
+        return Selector(pattern) if pattern else None
+
+    def compile_images(self, candidates):
+        return [(self.compile(candidate['select']), self.compile(candidate.get('find')), tuple(candidate['attrs']))
+                for candidate in candidates]
+
+    @staticmethod
+    def image_value(tag, find, attrs):
+        if find is not None:
+            tag = find.select_one(tag)
+        return first_attr(tag, attrs) if tag is not None else ''
+
+    def first_image(self, root):
+        """URL ảnh đầu tiên tìm được trong root theo thứ tự ảnh dự phòng, '' nếu không có"""
+        for select, find, attrs in self.image:
+            tag = select.select_one(root)
+            if tag is not None:
+                value = self.image_value(tag, find, attrs)
+                if value:
+                    return value
+        return ''
+
+    def index_listing_page(self, soup):
+        """Duyệt trang danh mục một lần, lấy các link tiêu đề và lập chỉ mục mô tả/ảnh theo phần tử.
+
+        Trả về (link tiêu đề theo thứ tự tài liệu, chỉ mục mô tả, chỉ mục ảnh theo từng ảnh dự phòng);
+        mỗi chỉ mục ánh xạ id(phần tử) -> phần tử con đầu tiên khớp selector theo thứ tự tài liệu,
+        tương đương phần_tử.select_one(selector) nhưng không phải quét lại cây con cho từng link.
+        """
+        title_links = []
+        description_index = {}
+        image_indexes = [{} for _ in self.thumbnail]
+        indexed = [(self.description, description_index)] if self.description else []
+        indexed.extend((select, index) for (select, _, _), index in zip(self.thumbnail, image_indexes))
+        for element in soup.find_all(True):
+            if self.links.match(element):
+                title_links.append(element)
+            for selector, index in indexed:
+                if not selector.match(element):
+                    continue
+                # Gán cho các tổ tiên chưa có; tổ tiên đã có thì các cấp trên nó cũng đã có
+                for ancestor in element.parents:
+                    key = id(ancestor)
+                    if key in index:
+                        break
+                    index[key] = element
+        return title_links, description_index, image_indexes
+
+    def nearest(self, element, index):
+        """Các phần tử trong chỉ mục của tối đa levels cấp cha, từ gần tới xa"""
+        parent = element.parent
+        for _ in range(self.levels):
+            if parent is None:
+                return
+            tag = index.get(id(parent))
+            if tag is not None:
+                yield tag
+            parent = parent.parent
+
+    def extract_list(self, crawler, soup, category_id):
+        """Danh sách bài viết (title, url, description, thumbnail, category) của trang danh mục"""
+        if self.items is not None:
+            nodes = self.items.select(soup)
+        else:
+            nodes, description_index, image_indexes = self.index_listing_page(soup)
+        crawler.debug(f"{crawler.source_name}: Đã tìm thấy {len(nodes)} phần tử bài viết")
+
+        articles = []
+        # URL đã lấy, link trùng (ví dụ cùng bài ở ảnh và tiêu đề) chỉ lấy lần đầu
+        processed_urls = set()
+        for node in nodes:
+            try:
+                title_tag = node if self.items is None else self.title.select_one(node)
+                if title_tag is None:
+                    continue
+
+                url = title_tag.get('href')
+                if not url or (self.relative_links_only and not url.startswith('/')):
+                    continue
+                url = normalize_url(url, crawler.base_url)
+                title = title_tag.text.strip()
+                if not title or url in processed_urls:
+                    continue
+                processed_urls.add(url)
+
+                description = ""
+                thumbnail = ""
+                if self.items is not None:
+                    desc_tag = self.description.select_one(node) if self.description else None
+                    if desc_tag is not None:
+                        description = desc_tag.text.strip()
+                    for select, find, attrs in self.thumbnail:
+                        img_tag = select.select_one(node)
+                        if img_tag is not None:
+                            thumbnail = self.image_value(img_tag, find, attrs)
+                            if thumbnail:
+                                break
+                else:
+                    desc_tag = next(self.nearest(title_tag, description_index), None)
+                    if desc_tag is not None:
+                        description = desc_tag.text.strip()
+                    for (select, find, attrs), index in zip(self.thumbnail, image_indexes):
+                        for img_tag in self.nearest(title_tag, index):
+                            thumbnail = self.image_value(img_tag, find, attrs)
+                            if thumbnail:
+                                break
+                        if thumbnail:
+                            break
+
+                if thumbnail:
+                    thumbnail = normalize_url(thumbnail, crawler.base_url)
+
+                articles.append({
+                    'title': title,
+                    'url': url,
+                    'description': description,
+                    'thumbnail': thumbnail,
+                    'category': category_id
+                })
+            except Exception as e:
+                print(f"Lỗi khi xử lý bài viết: {e}")
+                continue
+
+        return articles
+
+    def find_excerpt(self, soup):
+        if self.excerpt is None:
+            return ""
+        desc_tag = self.excerpt.select_one(soup)
+        return desc_tag.text.strip() if desc_tag is not None else ""
+
+    def clean_content(self, soup, content_div, base_url):
+        """Làm sạch thuộc tính các thẻ, tách figure và xóa các phần không cần thiết trong nội dung"""
+        if self.clean_rules:
+            for tag in content_div.find_all(list(self.clean_rules)):
+                self.clean_rules[tag.name].apply(tag, base_url)
+
+        if self.unwrap_figures:
+            # Xử lý các figure > picture: đưa picture ra sau figure, chú thích thành đoạn văn rồi xóa figure
+            for figure in content_div.find_all('figure'):
+                picture = figure.find('picture')
+                if picture:
+                    figcaption = figure.find('figcaption')
+                    if figcaption:
+                        p = soup.new_tag('p')
+                        p.string = figcaption.get_text()
+                        p['style'] = CAPTION_STYLE
+                        figure.insert_after(p)
+                    figure.insert_after(picture)
+                    figure.decompose()
+
+        if self.remove is not None:
+            for tag in self.remove.select(content_div):
+                tag.decompose()
+
+    def extract_detail(self, crawler, soup, url, category_id):
+        """Dict bài viết (title, url, content, excerpt, image, category, status), None nếu lỗi"""
+        try:
+            title = ""
+            for selector in self.detail_title:
+                title_tag = selector.select_one(soup)
+                if title_tag is not None:
+                    title = title_tag.text.strip()
+                    break
+            crawler.debug(f"Tiêu đề: {title}")
+
+            excerpt = "" if self.excerpt_after_content else self.find_excerpt(soup)
+
+            # Ảnh đại diện lấy trước khi làm sạch nội dung (làm sạch đổi thuộc tính và xóa bớt thẻ)
+            image = self.first_image(soup)
+            if image:
+                image = normalize_url(image, crawler.base_url)
+
+            content_html = ""
+            content_div = self.content.select_one(soup) if self.content else None
+            if content_div is not None:
+                with crawler.metrics.clean_seconds.time(source=crawler.source_name,
+                                                        category=crawler.category_label(category_id)):
+                    self.clean_content(soup, content_div, crawler.base_url)
+
+                if self.collect_children:
+                    parts = [tag for tag in content_div.children if tag.name in self.collect]
+                else:
+                    parts = content_div.find_all(self.collect)
+                content_html = ''.join(str(tag) for tag in parts)
+                crawler.debug(f"Nội dung lấy được (dài {len(content_html)}): {content_html[:100]}...")
+
+            if self.excerpt_after_content:
+                excerpt = self.find_excerpt(soup)
+            # Không có tóm tắt thì lấy đoạn đầu tiên của nội dung
+            if not excerpt and content_div is not None:
+                first_p = content_div.find('p')
+                if first_p:
+                    excerpt = first_p.text.strip()
+            crawler.debug(f"Tóm tắt (dài: {len(excerpt)}): {excerpt[:50]}...")
+
+            return {
+                'title': title,
+                'url': url,
+                'content': content_html,
+                'excerpt': excerpt,
+                'image': image,
+                'category': category_id,
+                'status': 'published'
+            }
+        except Exception as e:
+            print(f"Lỗi khi phân tích bài viết {url}: {e}")
+            return None
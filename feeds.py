@@ -0,0 +1,112 @@
+"""Đọc RSS và news sitemap của trang báo thay cho trang danh mục.
+
+RSS và news sitemap liệt kê cùng các bài viết (URL, tiêu đề, mô tả, ảnh) với dung lượng nhỏ hơn
+nhiều so với trang danh mục HTML. Nội dung được đọc tuần tự bằng XMLPullParser: mỗi <item>
+(RSS) hoặc <url> (sitemap) được chuyển thành dict bài viết ngay khi đọc xong rồi xóa khỏi cây,
+nên không phải dựng cả cây XML. Kết quả có cùng dạng với NewsCrawler.parse_article_list.
+"""
+import html
+import re
+import xml.etree.ElementTree as ET
+
+from extraction import normalize_url
+
+# Kích thước mỗi phần nội dung đưa vào bộ phân tích XML
+FEED_CHUNK_SIZE = 64 * 1024
+
+# Phần tử chứa một bài viết: <item> của RSS, <url> của sitemap (<url> trong <image> của kênh RSS
+# không có <link>/<loc> nên bị bỏ qua)
+ENTRY_TAGS = ('item', 'url')
+
+# Mô tả trong RSS là HTML (thường kèm ảnh đại diện): lấy src của ảnh đầu tiên và bỏ các thẻ
+IMG_SRC = re.compile(r'<img\b[^>]*?\bsrc\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+HTML_TAG = re.compile(r'<[^>]*>')
+WHITESPACE = re.compile(r'\s+')
+
+
+def local_name(tag):
+    """Tên thẻ bỏ phần namespace ({http://...}title -> title)"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def element_text(element):
+    return (element.text or '').strip()
+
+
+def split_description(description):
+    """Tách mô tả HTML của RSS thành (đoạn mô tả, src ảnh đầu tiên)"""
+    match = IMG_SRC.search(description)
+    thumbnail = html.unescape(match.group(1)) if match else ''
+    text = html.unescape(HTML_TAG.sub(' ', description))
+    return WHITESPACE.sub(' ', text).strip(), thumbnail
+
+
+def parse_entry(element):
+    """(url, tiêu đề, mô tả, ảnh) của một <item> RSS hoặc <url> sitemap"""
+    url = title = description = thumbnail = ''
+    for child in element.iter():
+        name = local_name(child.tag)
+        if name in ('link', 'loc') and not url:
+            # <loc> của <image:image> nằm sau <loc> của bài viết nên không bị lấy nhầm
+            url = element_text(child)
+        elif name == 'title' and not title:
+            # <title> của RSS hoặc <news:title> của news sitemap
+            title = element_text(child)
+        elif name == 'description' and not description:
+            description, image = split_description(child.text or '')
+            thumbnail = thumbnail or image
+        elif name in ('enclosure', 'content', 'thumbnail') and child.get('url'):
+            # <enclosure>, <media:content>, <media:thumbnail> chỉ nhận ảnh
+            if name != 'enclosure' or child.get('type', 'image/').startswith('image/'):
+                thumbnail = child.get('url')
+        elif name == 'image' and not thumbnail:
+            # <image:image><image:loc> của sitemap
+            for loc in child:
+                if local_name(loc.tag) == 'loc':
+                    thumbnail = element_text(loc)
+                    break
+    return url, title, description, thumbnail
+
+
+def iter_feed_entries(content):
+    """Đọc tuần tự RSS/sitemap, trả về lần lượt (url, tiêu đề, mô tả, ảnh) của từng bài.
+
+    Ném xml.etree.ElementTree.ParseError nếu nội dung không phải XML hợp lệ.
+    """
+    parser = ET.XMLPullParser(events=('end',))
+    for start in range(0, len(content), FEED_CHUNK_SIZE):
+        parser.feed(content[start:start + FEED_CHUNK_SIZE])
+        yield from read_entries(parser)
+    parser.close()
+    yield from read_entries(parser)
+
+
+def read_entries(parser):
+    for _, element in parser.read_events():
+        if local_name(element.tag) in ENTRY_TAGS:
+            yield parse_entry(element)
+            # Bài đã đọc xong, giải phóng các thẻ con
+            element.clear()
+
+
+def parse_feed(content, base_url, category_id):
+    """Danh sách bài viết (title, url, description, thumbnail, category) từ RSS hoặc news sitemap"""
+    articles = []
+    # URL đã lấy, bài xuất hiện nhiều lần chỉ lấy lần đầu
+    processed_urls = set()
+    for url, title, description, thumbnail in iter_feed_entries(content):
+        if not url or not title:
+            continue
+        url = normalize_url(url, base_url)
+        if url in processed_urls:
+            continue
+        processed_urls.add(url)
+
+        articles.append({
+            'title': title,
+            'url': url,
+            'description': description,
+            'thumbnail': normalize_url(thumbnail, base_url) if thumbnail else '',
+            'category': category_id
+        })
+    return articles
@@ -0,0 +1,409 @@
+"""Hàng đợi URL bài viết (frontier) dùng chung cho nhiều tiến trình và nhiều máy.
+
+Bài viết tìm được ở trang danh mục/feed được thêm vào frontier một lần (trùng URL bị bỏ qua).
+Mỗi worker nhận (lease) một lô URL trong thời hạn nhất định, crawl xong thì xác nhận (ack);
+lô chưa xác nhận khi hết hạn (worker bị dừng giữa chừng) được trả lại hàng đợi cho worker khác.
+URL worker trả lại (crawl lỗi) chỉ được giao lại sau retry_delay giây, để lỗi tạm thời (503, timeout)
+không dùng hết lượt thử trong vài giây; URL lỗi quá max_attempts lần bị đánh dấu failed để không thử lại mãi.
+
+    SQLiteFrontier('news_data/frontier.db')                 # nhiều tiến trình trên một máy
+    RedisFrontier(url='redis://host:6379/0')                # nhiều máy, cần cài redis
+    RedisFrontier(client=fakeredis.FakeRedis())             # client bất kỳ tương thích Redis
+
+Thời hạn lease tính theo đồng hồ của worker nên các máy cần đồng bộ giờ (NTP).
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+# Thư viện redis là tùy chọn, chỉ cần khi dùng RedisFrontier với URL
+try:
+    import redis
+except ImportError:
+    redis = None
+
+STATES = ('pending', 'leased', 'done', 'failed')
+
+
+def default_worker_id():
+    """Tên worker mặc định: máy và tiến trình hiện tại"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SQLiteFrontier:
+    """Frontier lưu trong SQLite (chế độ WAL), dùng chung giữa các tiến trình trên cùng một máy"""
+    def __init__(self, path=os.path.join('news_data', 'frontier.db'), lease_seconds=300, max_attempts=3,
+                 retry_delay=60, clock=time.time):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.clock = clock
+        self._lock = threading.Lock()
+        # Tự quản lý transaction: lease cần BEGIN IMMEDIATE để hai tiến trình không nhận cùng URL
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                article TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL DEFAULT 0,
+                added_at REAL NOT NULL,
+                updated_at REAL
+            )
+        ''')
+        # Frontier tạo trước khi có thời điểm được giao lại
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(frontier)')}
+        if 'available_at' not in columns:
+            self._conn.execute('ALTER TABLE frontier ADD COLUMN available_at REAL NOT NULL DEFAULT 0')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS frontier_state ON frontier (state, source)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS frontier_leases ON frontier (state, lease_expires)')
+
+    def _transaction(self, work):
+        """Chạy work(now) trong một transaction ghi, trả về kết quả của work"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = work(self.clock())
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return result
+
+    def add(self, source, articles):
+        """Thêm các bài viết (dict có 'url') vào hàng đợi, trả về số bài mới được thêm"""
+        def work(now):
+            added = 0
+            for article in articles:
+                cursor = self._conn.execute(
+                    'INSERT OR IGNORE INTO frontier (url, source, article, added_at) VALUES (?, ?, ?, ?)',
+                    (article['url'], source, json.dumps(article, ensure_ascii=False), now)
+                )
+                added += cursor.rowcount
+            return added
+        return self._transaction(work)
+
+    def _reclaim(self, now):
+        # Lease đã hết hạn: thử lại nếu còn lượt, ngược lại đánh dấu failed
+        cursor = self._conn.execute(
+            "UPDATE frontier SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "owner = NULL, lease_expires = NULL, updated_at = ? WHERE state = 'leased' AND lease_expires <= ?",
+            (self.max_attempts, now, now)
+        )
+        return cursor.rowcount
+
+    def reclaim_expired(self):
+        """Trả các URL có lease đã hết hạn về hàng đợi, trả về số URL được thu hồi"""
+        return self._transaction(self._reclaim)
+
+    def lease(self, worker_id, limit=10, source=None, lease_seconds=None):
+        """Nhận tối đa limit bài viết đang chờ (theo nguồn nếu có) trong lease_seconds giây"""
+        lease_seconds = lease_seconds or self.lease_seconds
+
+        def work(now):
+            self._reclaim(now)
+            # URL bị trả lại chưa hết thời gian chờ thì chưa được giao
+            query = "SELECT url, article FROM frontier WHERE state = 'pending' AND available_at <= ?"
+            params = (now,)
+            if source is not None:
+                query += ' AND source = ?'
+                params += (source,)
+            rows = self._conn.execute(query + ' ORDER BY rowid LIMIT ?', params + (limit,)).fetchall()
+            self._conn.executemany(
+                "UPDATE frontier SET state = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE url = ?",
+                [(worker_id, now + lease_seconds, now, url) for url, _ in rows]
+            )
+            return [json.loads(article) for _, article in rows]
+        return self._transaction(work)
+
+    def ack(self, worker_id, urls):
+        """Xác nhận đã crawl xong các URL worker đang giữ, trả về số URL được xác nhận.
+
+        URL mà lease đã hết hạn và được giao cho worker khác không bị xác nhận nhầm.
+        """
+        def work(now):
+            acked = 0
+            for url in urls:
+                cursor = self._conn.execute(
+                    "UPDATE frontier SET state = 'done', owner = NULL, lease_expires = NULL, updated_at = ? "
+                    "WHERE url = ? AND state = 'leased' AND owner = ?",
+                    (now, url, worker_id)
+                )
+                acked += cursor.rowcount
+            return acked
+        return self._transaction(work)
+
+    def release(self, worker_id, urls):
+        """Trả lại các URL chưa crawl được (thử lại sau retry_delay giây, hoặc failed nếu hết lượt),
+        trả về số URL được trả"""
+        def work(now):
+            released = 0
+            for url in urls:
+                cursor = self._conn.execute(
+                    "UPDATE frontier SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                    "owner = NULL, lease_expires = NULL, available_at = ?, updated_at = ? "
+                    "WHERE url = ? AND state = 'leased' AND owner = ?",
+                    (self.max_attempts, now + self.retry_delay, now, url, worker_id)
+                )
+                released += cursor.rowcount
+            return released
+        return self._transaction(work)
+
+    def stats(self, source=None):
+        """Số URL theo trạng thái (pending, leased, done, failed)"""
+        query = 'SELECT state, COUNT(*) FROM frontier'
+        params = ()
+        if source is not None:
+            query += ' WHERE source = ?'
+            params = (source,)
+        with self._lock:
+            counts = dict(self._conn.execute(query + ' GROUP BY state', params).fetchall())
+        return {state: counts.get(state, 0) for state in STATES}
+
+    def close(self):
+        """Đóng kết nối SQLite"""
+        with self._lock:
+            self._conn.close()
+
+
+# Các script Lua chạy nguyên khối trên Redis nên nhiều worker không nhận trùng URL.
+# Khóa cố định được truyền qua KEYS theo thứ tự KEY_NAMES: state (url -> trạng thái), article (url -> JSON),
+# source (url -> nguồn), attempts, owner, leases (sorted set url theo thời điểm hết hạn), sources (tập các
+# nguồn), counts (số URL theo trạng thái) và delayed (sorted set URL bị trả lại theo thời điểm được giao lại).
+# Hàng đợi (<ARGV[1]>pending:<nguồn>) và số URL theo trạng thái (<ARGV[1]>counts:<nguồn>) của từng nguồn chỉ
+# biết tên khi chạy; mọi khóa đều bắt đầu bằng {prefix} (hash tag) nên cùng nằm trên một slot của Redis Cluster.
+KEY_NAMES = ('state', 'article', 'source', 'attempts', 'owner', 'leases', 'sources', 'counts', 'delayed')
+
+KEYS_LUA = '''
+local state_key, article_key, source_key, attempts_key = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local owner_key, leases_key, sources_key, counts_key = KEYS[5], KEYS[6], KEYS[7], KEYS[8]
+local delayed_key = KEYS[9]
+local key_prefix = ARGV[1]
+
+local function pending_key(source)
+    return key_prefix .. 'pending:' .. source
+end
+
+-- Cập nhật số URL theo trạng thái của toàn frontier và của nguồn
+local function count(source, state, delta)
+    redis.call('HINCRBY', counts_key, state, delta)
+    redis.call('HINCRBY', key_prefix .. 'counts:' .. source, state, delta)
+end
+'''
+
+RECLAIM_LUA = KEYS_LUA + '''
+local function reclaim(now, max_attempts)
+    local expired = redis.call('ZRANGEBYSCORE', leases_key, '-inf', now)
+    for _, url in ipairs(expired) do
+        local source = redis.call('HGET', source_key, url)
+        redis.call('ZREM', leases_key, url)
+        redis.call('HDEL', owner_key, url)
+        count(source, 'leased', -1)
+        local attempts = tonumber(redis.call('HGET', attempts_key, url) or '0')
+        if attempts >= max_attempts then
+            redis.call('HSET', state_key, url, 'failed')
+            count(source, 'failed', 1)
+        else
+            redis.call('HSET', state_key, url, 'pending')
+            count(source, 'pending', 1)
+            redis.call('LPUSH', pending_key(source), url)
+        end
+    end
+    return #expired
+end
+
+-- URL bị trả lại đã hết thời gian chờ: đưa về đầu hàng đợi của nguồn
+local function promote(now)
+    local due = redis.call('ZRANGEBYSCORE', delayed_key, '-inf', now)
+    for _, url in ipairs(due) do
+        redis.call('ZREM', delayed_key, url)
+        redis.call('LPUSH', pending_key(redis.call('HGET', source_key, url)), url)
+    end
+end
+'''
+
+ADD_LUA = KEYS_LUA + '''
+local source = ARGV[2]
+local added = 0
+for i = 3, #ARGV, 2 do
+    local url = ARGV[i]
+    if redis.call('HSETNX', state_key, url, 'pending') == 1 then
+        redis.call('HSET', article_key, url, ARGV[i + 1])
+        redis.call('HSET', source_key, url, source)
+        redis.call('RPUSH', pending_key(source), url)
+        added = added + 1
+    end
+end
+if added > 0 then
+    redis.call('SADD', sources_key, source)
+    count(source, 'pending', added)
+end
+return added
+'''
+
+LEASE_LUA = RECLAIM_LUA + '''
+local worker, limit, now = ARGV[2], tonumber(ARGV[3]), tonumber(ARGV[4])
+local expires, max_attempts, source = tonumber(ARGV[5]), tonumber(ARGV[6]), ARGV[7]
+reclaim(now, max_attempts)
+promote(now)
+local sources = {source}
+if source == '' then
+    sources = redis.call('SMEMBERS', sources_key)
+    table.sort(sources)
+end
+local articles = {}
+for _, name in ipairs(sources) do
+    local leased = 0
+    while #articles < limit do
+        local url = redis.call('LPOP', pending_key(name))
+        if not url then
+            break
+        end
+        redis.call('HSET', state_key, url, 'leased')
+        redis.call('HSET', owner_key, url, worker)
+        redis.call('ZADD', leases_key, expires, url)
+        redis.call('HINCRBY', attempts_key, url, 1)
+        table.insert(articles, redis.call('HGET', article_key, url))
+        leased = leased + 1
+    end
+    if leased > 0 then
+        count(name, 'pending', -leased)
+        count(name, 'leased', leased)
+    end
+end
+return articles
+'''
+
+# ARGV[3] = 'done' (ack) hoặc 'release', ARGV[5] = thời điểm URL được trả lại có thể được giao lại
+FINISH_LUA = KEYS_LUA + '''
+local worker, action, max_attempts, available_at = ARGV[2], ARGV[3], tonumber(ARGV[4]), tonumber(ARGV[5])
+local finished = 0
+for i = 6, #ARGV do
+    local url = ARGV[i]
+    if redis.call('HGET', state_key, url) == 'leased' and redis.call('HGET', owner_key, url) == worker then
+        local source = redis.call('HGET', source_key, url)
+        redis.call('ZREM', leases_key, url)
+        redis.call('HDEL', owner_key, url)
+        count(source, 'leased', -1)
+        local state = 'done'
+        if action == 'release' then
+            state = 'failed'
+            if tonumber(redis.call('HGET', attempts_key, url) or '0') < max_attempts then
+                state = 'pending'
+                redis.call('ZADD', delayed_key, available_at, url)
+            end
+        end
+        if state ~= 'pending' then
+            -- Bài đã xong không cần giữ nội dung trong bộ nhớ Redis
+            redis.call('HDEL', article_key, url)
+        end
+        redis.call('HSET', state_key, url, state)
+        count(source, state, 1)
+        finished = finished + 1
+    end
+end
+return finished
+'''
+
+RECLAIM_EXPIRED_LUA = RECLAIM_LUA + '''
+return reclaim(tonumber(ARGV[2]), tonumber(ARGV[3]))
+'''
+
+
+class RedisFrontier:
+    """Frontier lưu trên Redis (hoặc máy chủ tương thích Redis), dùng chung giữa nhiều máy.
+
+    Truyền client có sẵn (redis.Redis, fakeredis...) hoặc URL để tạo client bằng thư viện redis;
+    máy chủ cần hỗ trợ script Lua (EVAL).
+    """
+    def __init__(self, client=None, url='redis://localhost:6379/0', prefix='frontier', lease_seconds=300,
+                 max_attempts=3, retry_delay=60, clock=time.time):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("Chưa cài đặt redis, cài bằng: pip install redis")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.clock = clock
+        # Khóa dạng {frontier}:state: hash tag giữ mọi khóa của frontier trên cùng một slot
+        self._keys = [f"{{{prefix}}}:{name}" for name in KEY_NAMES]
+        self._key_prefix = f"{{{prefix}}}:"
+        self._add = client.register_script(ADD_LUA)
+        self._lease = client.register_script(LEASE_LUA)
+        self._finish = client.register_script(FINISH_LUA)
+        self._reclaim = client.register_script(RECLAIM_EXPIRED_LUA)
+
+    def _key(self, name):
+        return self._keys[KEY_NAMES.index(name)]
+
+    def add(self, source, articles):
+        """Thêm các bài viết (dict có 'url') vào hàng đợi, trả về số bài mới được thêm"""
+        args = [self._key_prefix, source]
+        for article in articles:
+            args += [article['url'], json.dumps(article, ensure_ascii=False)]
+        return self._add(keys=self._keys, args=args) if articles else 0
+
+    def reclaim_expired(self):
+        """Trả các URL có lease đã hết hạn về hàng đợi, trả về số URL được thu hồi"""
+        return self._reclaim(keys=self._keys, args=[self._key_prefix, self.clock(), self.max_attempts])
+
+    def lease(self, worker_id, limit=10, source=None, lease_seconds=None):
+        """Nhận tối đa limit bài viết đang chờ (theo nguồn nếu có) trong lease_seconds giây"""
+        now = self.clock()
+        articles = self._lease(keys=self._keys,
+                               args=[self._key_prefix, worker_id, limit, now,
+                                     now + (lease_seconds or self.lease_seconds), self.max_attempts, source or ''])
+        return [json.loads(article) for article in articles]
+
+    def ack(self, worker_id, urls):
+        """Xác nhận đã crawl xong các URL worker đang giữ, trả về số URL được xác nhận"""
+        if not urls:
+            return 0
+        return self._finish(keys=self._keys,
+                            args=[self._key_prefix, worker_id, 'done', self.max_attempts, 0] + list(urls))
+
+    def release(self, worker_id, urls):
+        """Trả lại các URL chưa crawl được (thử lại sau retry_delay giây, hoặc failed nếu hết lượt),
+        trả về số URL được trả"""
+        if not urls:
+            return 0
+        available_at = self.clock() + self.retry_delay
+        return self._finish(keys=self._keys, args=[self._key_prefix, worker_id, 'release', self.max_attempts,
+                                                   available_at] + list(urls))
+
+    def stats(self, source=None):
+        """Số URL theo trạng thái (pending, leased, done, failed), của cả frontier hoặc của một nguồn"""
+        key = self._key('counts') if source is None else f"{self._key_prefix}counts:{source}"
+        # Client tạo với decode_responses=True trả về str thay cho bytes
+        counts = {state.decode() if isinstance(state, bytes) else state: int(value)
+                  for state, value in self.client.hgetall(key).items()}
+        return {state: counts.get(state, 0) for state in STATES}
+
+    def close(self):
+        """Đóng kết nối tới Redis"""
+        self.client.close()
+
+
+def create_frontier(location, **kwargs):
+    """Tạo frontier từ URL Redis (redis://, rediss://, unix://) hoặc đường dẫn file SQLite"""
+    if location.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisFrontier(url=location, **kwargs)
+    return SQLiteFrontier(location, **kwargs)
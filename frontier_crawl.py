@@ -0,0 +1,153 @@
+"""Crawl qua frontier dùng chung: một lệnh tìm bài viết, nhiều worker trên nhiều máy crawl chi tiết.
+
+    python frontier_crawl.py seed --frontier news_data/frontier.db --sources all --categories all --pages 2
+    python frontier_crawl.py work --frontier news_data/frontier.db --processes 4 --exporter jsonl
+    python frontier_crawl.py stats --frontier redis://host:6379/0
+
+seed thêm bài viết của các danh mục vào frontier (bài đã có bị bỏ qua). Mỗi tiến trình của work
+nhận từng lô URL từ frontier, crawl chi tiết, ghi qua exporter rồi xác nhận, nên chạy work ở bao nhiêu
+tiến trình hay máy cũng không crawl trùng bài; lô của worker bị dừng giữa chừng được giao lại khi hết
+hạn lease. Dùng file SQLite cho các tiến trình trên một máy, URL redis:// cho nhiều máy.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_crawl import CRAWLERS, build_tasks, parse_list
+from dedup import NearDuplicateIndex
+from exporters import EXPORTERS, create_exporter
+from frontier import create_frontier, default_worker_id
+from http_cache import HttpCache
+from seen_index import SeenUrlIndex
+from vn_news_crawler import NewsCrawler
+
+
+def seed(args, sources, categories):
+    """Tìm bài viết của các danh mục và thêm vào frontier"""
+    frontier = create_frontier(args.frontier)
+    total = 0
+    for source in sources:
+        with CRAWLERS[source](parser=args.parser, discovery=args.discovery, verbose=False) as crawler:
+            for _, category in build_tasks({source: crawler}, [source], categories):
+                added = crawler.enqueue_category(frontier, category, args.pages)
+                total += added
+                print(f"  {source:<11} {category:<20} {added:>4} bài mới")
+    frontier.close()
+    print(f"Đã thêm {total} bài viết vào frontier")
+    return 0
+
+
+def work(args, sources, index):
+    """Tiến trình worker: crawl chi tiết các bài trong frontier cho tới khi không còn bài, trả về số bài"""
+    output_dir = args.output_dir
+    worker_id = f"{default_worker_id()}:{index}"
+    frontier = create_frontier(args.frontier, lease_seconds=args.lease_seconds, retry_delay=args.retry_delay)
+    exporter = create_exporter(args.exporter, output_dir)
+    # Các worker gom cụm bài gần trùng trong cùng dedup.db (dùng chung trong một --output-dir trên một máy)
+    dedup_index = NearDuplicateIndex(os.path.join(output_dir, 'dedup.db'), shared=True)
+    crawlers = [
+        CRAWLERS[source](max_workers=args.workers, parser=args.parser, verbose=False, dedup_index=dedup_index,
+                         cache=HttpCache(os.path.join(output_dir, '.cache')),
+                         # Các worker cùng ghi vào seen_urls.db nên không dùng Bloom filter trong bộ nhớ
+                         seen_index=SeenUrlIndex(os.path.join(output_dir, 'seen_urls.db'), use_bloom=False))
+        for source in sources
+    ]
+    crawled = 0
+    try:
+        while True:
+            crawled_before = crawled
+            for crawler in crawlers:
+                for article in crawler.iter_frontier(frontier, worker_id, args.batch_size):
+                    # Ghi xong mới lấy bài tiếp theo (lúc đó bài này mới được xác nhận với frontier)
+                    category = crawler.category_label(article['category'])
+                    if exporter.streaming:
+                        exporter.write(article, crawler.source_name, category)
+                    else:
+                        exporter.export([article], crawler.source_name, category)
+                    crawled += 1
+            counts = [frontier.stats(crawler.source_name) for crawler in crawlers]
+            pending = sum(count['pending'] for count in counts)
+            if not pending and not sum(count['leased'] for count in counts):
+                return crawled
+            # Không crawl được bài nào: các bài còn lại đang được worker khác giữ (có thể được giao lại khi
+            # hết hạn lease) hoặc bị trả lại và chưa hết thời gian chờ
+            if crawled == crawled_before:
+                time.sleep(args.poll_interval)
+    finally:
+        for crawler in crawlers:
+            crawler.close()
+        exporter.close()
+        dedup_index.close()
+        frontier.close()
+
+
+def run_workers(args, sources):
+    """Chạy worker ở --processes tiến trình"""
+    print(f"Crawl chi tiết bài viết trong frontier bằng {args.processes} tiến trình")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.processes) as executor:
+        total = sum(executor.map(work, [args] * args.processes, [sources] * args.processes, range(args.processes)))
+    seconds = time.perf_counter() - start
+    print(f"Hoàn tất: {total} bài viết trong {seconds:.2f}s")
+    if seconds:
+        print(f"Thông lượng: {total / seconds:.2f} bài/s")
+    print(f"Dữ liệu đã được lưu vào: {args.output_dir}")
+    return 0
+
+
+def print_stats(args):
+    frontier = create_frontier(args.frontier)
+    for state, count in frontier.stats().items():
+        print(f"  {state:<8} {count:>8}")
+    frontier.close()
+    return 0
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('command', choices=('seed', 'work', 'stats'))
+    arg_parser.add_argument('--frontier', default=os.path.join('news_data', 'frontier.db'),
+                            help='File SQLite hoặc URL Redis (redis://host:6379/0) của frontier')
+    arg_parser.add_argument('--sources', default='all', help="Các nguồn cách nhau bởi dấu phẩy hoặc 'all'")
+    arg_parser.add_argument('--categories', default='all',
+                            help="Các danh mục cách nhau bởi dấu phẩy hoặc 'all' (seed)")
+    arg_parser.add_argument('--pages', type=int, default=2, help='Số trang danh mục mỗi danh mục (seed)')
+    arg_parser.add_argument('--discovery', default='html', choices=NewsCrawler.DISCOVERY_MODES)
+    arg_parser.add_argument('--parser', default='lxml', choices=NewsCrawler.PARSERS)
+    arg_parser.add_argument('--processes', type=int, default=os.cpu_count() or 2, help='Số tiến trình worker (work)')
+    arg_parser.add_argument('--workers', type=int, default=4, help='Số luồng tải chi tiết trong mỗi tiến trình')
+    arg_parser.add_argument('--batch-size', type=int, default=10, help='Số bài mỗi lần nhận từ frontier')
+    arg_parser.add_argument('--lease-seconds', type=float, default=300,
+                            help='Thời hạn lease, quá hạn chưa xác nhận thì lô được giao cho worker khác')
+    arg_parser.add_argument('--retry-delay', type=float, default=60,
+                            help='Số giây chờ trước khi giao lại bài crawl lỗi')
+    arg_parser.add_argument('--poll-interval', type=float, default=5,
+                            help='Số giây chờ khi chưa có bài nào giao được (đang được worker khác giữ hoặc chờ thử lại)')
+    # Mỗi bài được ghi ngay trước khi xác nhận; exporter json ghi mỗi lần một file nên không dùng ở đây
+    arg_parser.add_argument('--exporter', default='sqlite', choices=[name for name in EXPORTERS if name != 'json'])
+    arg_parser.add_argument('--output-dir', default='news_data', help='Thư mục lưu kết quả, cache và chỉ mục')
+    args = arg_parser.parse_args()
+
+    if args.command == 'stats':
+        return print_stats(args)
+
+    catalog = {source: crawler_class(verbose=False) for source, crawler_class in CRAWLERS.items()}
+    try:
+        sources = parse_list(args.sources, CRAWLERS, 'Nguồn')
+        all_categories = {category for crawler in catalog.values() for category in crawler.categories}
+        categories = None if args.categories == 'all' else parse_list(args.categories, all_categories, 'Danh mục')
+    except argparse.ArgumentTypeError as e:
+        arg_parser.error(str(e))
+    finally:
+        for crawler in catalog.values():
+            crawler.close()
+
+    if args.command == 'seed':
+        return seed(args, sources, categories)
+    return run_workers(args, sources)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class HttpCache:
+    """Cache HTTP trên đĩa, lưu nội dung trang cùng ETag/Last-Modified để tải lại có điều kiện"""
+    def __init__(self, cache_dir=os.path.join('news_data', '.cache'), ttl=300, max_size=200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        # Trong thời gian ttl (giây) dùng thẳng bản lưu, quá hạn thì hỏi lại server
+        self.ttl = ttl
+        # Tổng dung lượng tối đa (bytes) của thư mục cache
+        self.max_size = max_size
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._size = sum(os.path.getsize(path) for path in self._entry_paths())
+
+    def _entry_paths(self):
+        """Liệt kê các file cache hiện có"""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json'):
+                yield os.path.join(self.cache_dir, name)
+
+    def _path(self, url):
+        """Đường dẫn file cache của URL"""
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, url):
+        """Đọc bản lưu của URL, trả về None nếu chưa có"""
+        path = self._path(url)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Cập nhật thời gian truy cập để loại bỏ theo LRU
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def is_fresh(self, entry):
+        """Kiểm tra bản lưu còn trong thời hạn ttl hay không"""
+        return time.time() - entry.get('stored_at', 0) < self.ttl
+
+    def conditional_headers(self, entry):
+        """Tạo header If-None-Match/If-Modified-Since từ bản lưu"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, body, headers):
+        """Lưu nội dung trang cùng các header dùng để kiểm tra lại"""
+        entry = {
+            'url': url,
+            'body': body,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'stored_at': time.time()
+        }
+        self._write(url, entry)
+
+    def refresh(self, url, entry):
+        """Gia hạn bản lưu khi server trả về 304 Not Modified"""
+        entry['stored_at'] = time.time()
+        self._write(url, entry)
+
+    def _write(self, url, entry):
+        """Ghi bản lưu ra đĩa một cách nguyên tử rồi dọn cache nếu vượt dung lượng"""
+        path = self._path(url)
+        # Tên file tạm riêng cho từng tiến trình và luồng: nhiều tiến trình dùng chung thư mục cache
+        # và số hiệu luồng có thể trùng nhau giữa các tiến trình
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+
+        with self._lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self._size += os.path.getsize(path) - old_size
+            if self._size > self.max_size:
+                self._evict()
+
+    def _evict(self):
+        """Xóa các bản lưu ít được truy cập nhất cho tới khi dưới max_size"""
+        entries = []
+        for path in self._entry_paths():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                self._size -= size
+            except OSError:
+                continue
+
+    def record(self, result):
+        """Ghi nhận kết quả tra cache: 'hit', 'revalidated' hoặc 'miss'"""
+        with self._lock:
+            if result == 'hit':
+                self.hits += 1
+            elif result == 'revalidated':
+                self.revalidated += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        """Thống kê số lần trúng/trượt cache"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses,
+                'size': self._size
+            }
+
+    def clear(self):
+        """Xóa toàn bộ cache"""
+        with self._lock:
+            for path in list(self._entry_paths()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+            self._size = 0
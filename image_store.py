@@ -0,0 +1,334 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import REGISTRY
+
+try:
+    from PIL import Image
+except ImportError:
+    # Pillow là tùy chọn: không có thì vẫn lưu ảnh gốc, chỉ bỏ qua ảnh thu nhỏ
+    Image = None
+
+# Phần mở rộng file theo Content-Type của ảnh. Không nhận SVG: SVG có thể chứa script, phục vụ cùng
+# origin dưới /images sẽ thành lỗ hổng XSS lưu trữ
+IMAGE_TYPES = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/avif': '.avif'
+}
+
+# Đường dẫn tương đối của ảnh gốc và ảnh thu nhỏ trong kho (ab/abcd....jpg, thumbs/ab/abcd....jpg),
+# chỉ với các phần mở rộng ở trên
+STORED_PATH = re.compile(r'(thumbs/)?[0-9a-f]{2}/[0-9a-f]{64}(%s)' %
+                         '|'.join(re.escape(extension) for extension in IMAGE_TYPES.values()))
+
+
+def make_thumbnail(source_path, thumbnail_path, size, quality=85):
+    """Tạo ảnh thu nhỏ JPEG (chạy trong pool tiến trình), trả về False nếu không đọc được ảnh"""
+    tmp_path = f"{thumbnail_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with Image.open(source_path) as image:
+            image.thumbnail(size)
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            image.save(tmp_path, 'JPEG', quality=quality, optimize=True)
+        os.replace(tmp_path, thumbnail_path)
+        return True
+    except (OSError, ValueError, Image.DecompressionBombError):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+
+def srcset_urls(srcset):
+    """Các URL trong srcset (bỏ mô tả kích thước 2x, 640w...)"""
+    return [part.strip().split(' ')[0] for part in srcset.split(',') if part.strip()]
+
+
+class ByteBudget:
+    """Giới hạn tổng số bytes ảnh đang tải cùng lúc; một ảnh lớn hơn giới hạn vẫn được tải khi không còn ảnh nào khác"""
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, size):
+        with self._condition:
+            while self.in_flight and self.in_flight + size > self.limit:
+                self._condition.wait()
+            self.in_flight += size
+
+    def release(self, size):
+        with self._condition:
+            self.in_flight -= size
+            self._condition.notify_all()
+
+
+class ImageStore:
+    """Tải ảnh bài viết về máy và lưu theo mã băm nội dung (sha256): ảnh dùng ở nhiều bài chỉ lưu một lần.
+
+    Ảnh chính và ảnh trong nội dung được tải song song qua một connection pool, ảnh thu nhỏ được tạo
+    trong pool tiến trình (cần Pillow); bài viết được sửa để trỏ tới đường dẫn cục bộ (url_prefix/...).
+    """
+    def __init__(self, store_dir=os.path.join('news_data', 'images'), url_prefix='/images', max_workers=8,
+                 max_bytes_in_flight=32 * 1024 * 1024, max_image_size=10 * 1024 * 1024,
+                 thumbnail_size=(320, 320), thumbnail_workers=2, timeout=(5, 20), max_retries=2, metrics=None):
+        self.store_dir = store_dir
+        self.url_prefix = url_prefix.rstrip('/')
+        self.max_image_size = max_image_size
+        self.thumbnail_size = tuple(thumbnail_size)
+        self.timeout = timeout
+        self.metrics = metrics or REGISTRY
+        os.makedirs(self.store_dir, exist_ok=True)
+
+        # Tổng bytes của các ảnh đang tải; ảnh chưa biết kích thước được tính là max_image_size
+        self.budget = ByteBudget(max_bytes_in_flight)
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                                              "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=max_workers,
+            max_retries=Retry(total=max_retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                              allowed_methods=frozenset(['GET']), raise_on_status=False)
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image')
+
+        # Tạo ảnh thu nhỏ tốn CPU nên chạy trong pool tiến trình, tạo ngay từ đầu trước khi có luồng tải;
+        # thumbnail_workers = 0 thì tạo ngay trong luồng tải, không có Pillow thì không tạo
+        self.make_thumbnails = Image is not None and bool(thumbnail_size)
+        self._thumbnail_pool = None
+        if self.make_thumbnails and thumbnail_workers > 0:
+            self._thumbnail_pool = ProcessPoolExecutor(max_workers=thumbnail_workers)
+            list(self._thumbnail_pool.map(abs, range(thumbnail_workers)))
+
+        # URL ảnh -> file đã lưu, để không tải lại ảnh đã có
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.store_dir, 'index.db'), check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS images (
+                url TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                thumbnail TEXT,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL
+            )
+        ''')
+        self._conn.commit()
+        # Các URL đang được tải: nhiều bài cùng dùng một ảnh chỉ tải một lần
+        self._pending = {}
+
+    def close(self):
+        """Dừng các pool tải/tạo ảnh thu nhỏ, đóng session và chỉ mục"""
+        self._executor.shutdown(wait=True)
+        if self._thumbnail_pool is not None:
+            self._thumbnail_pool.shutdown()
+            self._thumbnail_pool = None
+        self.session.close()
+        with self._lock:
+            self._conn.close()
+
+    def _lookup(self, url):
+        with self._lock:
+            row = self._conn.execute('SELECT path, thumbnail FROM images WHERE url = ?', (url,)).fetchone()
+        # Bỏ qua cả ảnh đã lưu bằng định dạng không còn được phục vụ (SVG)
+        if row is None or not self.is_stored_path(row[0]) or not os.path.exists(os.path.join(self.store_dir, row[0])):
+            return None
+        return {'path': row[0], 'thumbnail': row[1]}
+
+    @staticmethod
+    def is_stored_path(relative_path):
+        """Đường dẫn có phải file ảnh trong kho không (không phải chỉ mục hay file tạm)"""
+        return STORED_PATH.fullmatch(relative_path) is not None
+
+    def public_path(self, relative_path):
+        """Đường dẫn của file ảnh mà frontend dùng (url_prefix/ab/abcd....jpg)"""
+        return f"{self.url_prefix}/{relative_path}" if relative_path else None
+
+    def _read_body(self, response):
+        """Đọc nội dung ảnh trong giới hạn bytes đang tải, None nếu ảnh lớn hơn max_image_size"""
+        length = response.headers.get('Content-Length')
+        reserved = int(length) if length and length.isdigit() else self.max_image_size
+        if reserved > self.max_image_size:
+            return None
+        self.budget.acquire(reserved)
+        try:
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(64 * 1024):
+                size += len(chunk)
+                if size > self.max_image_size:
+                    return None
+                chunks.append(chunk)
+            return b''.join(chunks)
+        finally:
+            self.budget.release(reserved)
+
+    def _store(self, body, extension):
+        """Ghi ảnh theo mã băm nội dung, trả về (đường dẫn tương đối, ảnh mới hay đã có)"""
+        digest = hashlib.sha256(body).hexdigest()
+        relative_path = f"{digest[:2]}/{digest}{extension}"
+        path = os.path.join(self.store_dir, relative_path)
+        if os.path.exists(path):
+            return relative_path, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Tên file tạm riêng cho từng tiến trình và luồng (các tiến trình batch_crawl dùng chung thư mục ảnh)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return relative_path, True
+
+    def _thumbnail(self, relative_path):
+        """Tạo ảnh thu nhỏ cho ảnh đã lưu (nếu chưa có), trả về đường dẫn tương đối hoặc None"""
+        if not self.make_thumbnails:
+            return None
+        digest = os.path.splitext(os.path.basename(relative_path))[0]
+        thumbnail_path = f"thumbs/{digest[:2]}/{digest}.jpg"
+        path = os.path.join(self.store_dir, thumbnail_path)
+        if os.path.exists(path):
+            return thumbnail_path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        source = os.path.join(self.store_dir, relative_path)
+        if self._thumbnail_pool is not None:
+            created = self._thumbnail_pool.submit(make_thumbnail, source, path, self.thumbnail_size).result()
+        else:
+            created = make_thumbnail(source, path, self.thumbnail_size)
+        return thumbnail_path if created else None
+
+    def _download(self, url):
+        """Tải và lưu một ảnh, trả về {'path', 'thumbnail'} (đường dẫn tương đối) hoặc None nếu lỗi"""
+        entry = self._lookup(url)
+        if entry is not None:
+            self.metrics.images.inc(result='cached')
+            return entry
+
+        try:
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+                extension = IMAGE_TYPES.get(content_type)
+                if extension is None:
+                    # Không phải ảnh (trang lỗi HTML...) hoặc định dạng không hỗ trợ
+                    self.metrics.images.inc(result='skipped')
+                    return None
+                body = self._read_body(response)
+        except (requests.RequestException, ValueError) as e:
+            self.metrics.images.inc(result='failed')
+            print(f"Lỗi khi tải ảnh {url}: {e}")
+            return None
+        if not body:
+            self.metrics.images.inc(result='skipped')
+            return None
+
+        relative_path, created = self._store(body, extension)
+        entry = {'path': relative_path, 'thumbnail': self._thumbnail(relative_path)}
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO images (url, path, thumbnail, size, stored_at) VALUES (?, ?, ?, ?, ?)',
+                (url, relative_path, entry['thumbnail'], len(body), time.time())
+            )
+            self._conn.commit()
+        # Chỉ đếm khi đã lưu xong, lỗi ở các bước trên được fetch_all đếm là failed
+        self.metrics.images.inc(result='stored' if created else 'duplicate')
+        self.metrics.image_bytes.inc(len(body))
+        return entry
+
+    def _submit(self, url):
+        """Future tải ảnh, dùng chung cho các lời gọi cùng URL đang chờ"""
+        with self._lock:
+            future = self._pending.get(url)
+            if future is None:
+                future = self._executor.submit(self._download, url)
+                self._pending[url] = future
+                future.add_done_callback(lambda f: self._forget(url))
+            return future
+
+    def _forget(self, url):
+        with self._lock:
+            self._pending.pop(url, None)
+
+    def fetch_all(self, urls):
+        """Tải song song các ảnh, trả về dict URL -> {'path', 'thumbnail'} của các ảnh đã lưu"""
+        futures = {url: self._submit(url) for url in dict.fromkeys(urls) if url.startswith(('http://', 'https://'))}
+        results = {}
+        for url, future in futures.items():
+            try:
+                entry = future.result()
+            except Exception as e:
+                # Lỗi khi lưu ảnh (đĩa đầy, không có quyền ghi, Pillow, chỉ mục SQLite...): tải ảnh là bước
+                # tùy chọn nên không dừng crawl bài viết, ảnh giữ nguyên URL gốc
+                self.metrics.images.inc(result='failed')
+                print(f"Lỗi khi lưu ảnh {url}: {e}")
+                continue
+            if entry is not None:
+                results[url] = entry
+        return results
+
+    def localize(self, article):
+        """Tải ảnh chính và ảnh trong nội dung của bài viết, đổi các URL sang đường dẫn cục bộ.
+
+        Thêm 'thumbnail' (ảnh thu nhỏ của ảnh chính) nếu tạo được; ảnh tải lỗi giữ nguyên URL gốc.
+        """
+        soup = None
+        urls = []
+        if article.get('image'):
+            urls.append(article['image'])
+        content = article.get('content') or ''
+        if '<img' in content or '<source' in content:
+            soup = BeautifulSoup(content, 'html.parser')
+            for img in soup.find_all('img', src=True):
+                urls.append(img['src'])
+            for source in soup.find_all('source', srcset=True):
+                urls.extend(srcset_urls(source['srcset']))
+        if not urls:
+            return article
+
+        stored = self.fetch_all(urls)
+        if not stored:
+            return article
+
+        image = stored.get(article.get('image'))
+        if image is not None:
+            article['image'] = self.public_path(image['path'])
+            if image['thumbnail']:
+                article['thumbnail'] = self.public_path(image['thumbnail'])
+
+        if soup is not None:
+            changed = False
+            for img in soup.find_all('img', src=True):
+                if img['src'] in stored:
+                    img['src'] = self.public_path(stored[img['src']]['path'])
+                    changed = True
+            for source in soup.find_all('source', srcset=True):
+                parts = [part.strip().split(' ') for part in source['srcset'].split(',')]
+                if any(words[0] in stored for words in parts):
+                    for words in parts:
+                        if words[0] in stored:
+                            words[0] = self.public_path(stored[words[0]]['path'])
+                    source['srcset'] = ', '.join(' '.join(words) for words in parts)
+                    changed = True
+            if changed:
+                article['content'] = str(soup)
+        return article
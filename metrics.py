@@ -0,0 +1,205 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Các mốc (giây) mặc định của histogram thời gian
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Bộ đếm chỉ tăng, theo nhãn"""
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def state(self):
+        """Giá trị theo từng bộ nhãn, dùng để gộp vào registry của tiến trình khác"""
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, state):
+        with self._lock:
+            for key, value in state.items():
+                self._values[key] = self._values.get(key, 0) + value
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name + '_total', _format_labels(self.labelnames, key), value
+
+
+class Histogram:
+    """Phân bố giá trị (thường là thời gian), theo nhãn"""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def summary(self, **labels):
+        """(tổng, số lần) của một bộ nhãn"""
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            return (state[1], state[2]) if state else (0.0, 0)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def state(self):
+        """(số lần theo từng mốc, tổng, số lần) theo từng bộ nhãn, dùng để gộp vào registry khác"""
+        with self._lock:
+            return {key: ([*counts], total, count) for key, (counts, total, count) in self._values.items()}
+
+    def merge(self, state):
+        with self._lock:
+            for key, (counts, total, count) in state.items():
+                current = self._values.get(key)
+                if current is None:
+                    current = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+                current[0] = [a + b for a, b in zip(current[0], counts)]
+                current[1] += total
+                current[2] += count
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield (self.name + '_bucket',
+                       _format_labels(self.labelnames, key, ('le', _format_value(bound))), cumulative)
+            yield self.name + '_sum', _format_labels(self.labelnames, key), total
+            yield self.name + '_count', _format_labels(self.labelnames, key), count
+
+
+class MetricsRegistry:
+    """Tập hợp các chỉ số của crawler, xuất theo định dạng văn bản của Prometheus"""
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+        self.fetch_seconds = self.histogram(
+            'news_crawler_fetch_seconds', 'Thời gian tải một trang qua mạng', ('source', 'category'))
+        self.fetch_bytes = self.counter(
+            'news_crawler_fetch_bytes', 'Số bytes nội dung đã tải', ('source', 'category'))
+        self.parse_seconds = self.histogram(
+            'news_crawler_parse_seconds', 'Thời gian phân tích HTML', ('source', 'category', 'page'))
+        self.clean_seconds = self.histogram(
+            'news_crawler_clean_seconds', 'Thời gian làm sạch nội dung bài viết', ('source', 'category'))
+        self.serialize_seconds = self.histogram(
+            'news_crawler_serialize_seconds', 'Thời gian ghi/tuần tự hóa kết quả', ('format',))
+        self.requests = self.counter(
+            'news_crawler_requests', 'Số request HTTP theo mã trạng thái', ('source', 'status'))
+        self.errors = self.counter(
+            'news_crawler_errors', 'Số lỗi theo giai đoạn', ('source', 'stage'))
+        self.retries = self.counter(
+            'news_crawler_retries', 'Số lần thử lại request', ('source',))
+        self.cache = self.counter(
+            'news_crawler_cache', 'Kết quả tra cache HTTP', ('source', 'result'))
+        self.articles = self.counter(
+            'news_crawler_articles', 'Số bài viết đã crawl chi tiết', ('source', 'category'))
+        self.skipped = self.counter(
+            'news_crawler_skipped_articles', 'Số bài viết bị bỏ qua', ('source', 'reason'))
+        self.images = self.counter(
+            'news_crawler_images', 'Kết quả tải ảnh bài viết về máy', ('result',))
+        self.image_bytes = self.counter(
+            'news_crawler_image_bytes', 'Số bytes ảnh đã tải')
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                return self._metrics[metric.name]
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def state(self):
+        """Giá trị của các chỉ số đã có số liệu, gửi được qua tiến trình (pickle) rồi gộp bằng merge"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: state for metric in metrics for state in [metric.state()] if state}
+
+    def merge(self, state):
+        """Cộng dồn số liệu từ state() của registry khác (ví dụ của tiến trình phân tích)"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        for name, metric_state in state.items():
+            if name in metrics:
+                metrics[name].merge(metric_state)
+
+    def render(self):
+        """Xuất toàn bộ chỉ số theo định dạng văn bản Prometheus 0.0.4"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+# Registry dùng chung mặc định cho mọi crawler trong tiến trình
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+
+def parse_retry_after(value, now=None):
+    """Đổi header Retry-After (số giây hoặc HTTP-date) thành số giây cần chờ"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+
+class TokenBucket:
+    """Token bucket của một host, tốc độ thay đổi theo phản hồi của server"""
+    def __init__(self, rate, burst, now):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        # Token chỉ được cộng thêm từ thời điểm updated_at (có thể ở tương lai khi host đang bị tạm dừng)
+        self.updated_at = now
+
+    def refill(self, now):
+        if now > self.updated_at:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+
+class AdaptiveRateLimiter:
+    """Giới hạn tốc độ request theo từng host bằng token bucket, dùng chung được giữa các luồng.
+
+    Khi server trả về 429/503, tốc độ của host bị giảm (nhân với backoff) và tạm dừng theo
+    Retry-After; các phản hồi bình thường sau đó tăng dần tốc độ (nhân với recovery) về mức cấu hình.
+    """
+    THROTTLE_STATUSES = (429, 503)
+
+    def __init__(self, rate=1.0, burst=1, min_rate=0.1, backoff=0.5, recovery=1.2,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.default_rate = rate
+        self.default_burst = burst
+        self.min_rate = min_rate
+        self.backoff = backoff
+        self.recovery = recovery
+        self.clock = clock
+        self.sleep = sleep
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url_or_host):
+        return urlparse(url_or_host).netloc or url_or_host
+
+    def _bucket(self, host, rate=None, burst=None):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(rate or self.default_rate, burst or self.default_burst, self.clock())
+            self._buckets[host] = bucket
+        return bucket
+
+    def configure(self, url_or_host, rate, burst=1):
+        """Đặt tốc độ tối đa (request/giây) và burst cho một host"""
+        host = self.host_of(url_or_host)
+        with self._lock:
+            bucket = self._bucket(host, rate, burst)
+            bucket.max_rate = rate
+            bucket.rate = min(bucket.rate, rate)
+            bucket.burst = burst
+
+    def reserve(self, url_or_host, rate=None, burst=None):
+        """Giữ chỗ một token, trả về số giây phải chờ trước khi gửi request"""
+        host = self.host_of(url_or_host)
+        with self._lock:
+            bucket = self._bucket(host, rate, burst)
+            now = self.clock()
+            bucket.refill(now)
+            # Token có thể âm: mỗi lượt giữ chỗ xếp sau các lượt trước đó
+            bucket.tokens -= 1
+            wait = max(0.0, bucket.updated_at - now)
+            if bucket.tokens < 0:
+                wait += -bucket.tokens / bucket.rate
+            return wait
+
+    def acquire(self, url_or_host, rate=None, burst=None):
+        """Chờ (chặn luồng) cho tới khi được phép gửi request tới host"""
+        wait = self.reserve(url_or_host, rate, burst)
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    async def acquire_async(self, url_or_host, rate=None, burst=None):
+        """Phiên bản asyncio của acquire"""
+        wait = self.reserve(url_or_host, rate, burst)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def feedback(self, url_or_host, status_code, retry_after=None):
+        """Điều chỉnh tốc độ của host theo mã trạng thái và header Retry-After của phản hồi"""
+        host = self.host_of(url_or_host)
+        with self._lock:
+            bucket = self._bucket(host)
+            now = self.clock()
+            if status_code in self.THROTTLE_STATUSES:
+                bucket.rate = max(self.min_rate, bucket.rate * self.backoff)
+                bucket.refill(now)
+                delay = parse_retry_after(retry_after)
+                if delay is None:
+                    delay = 1 / bucket.rate
+                # Tạm dừng host, bỏ các token còn dư và chỉ cộng token trở lại sau thời gian chờ
+                bucket.tokens = min(bucket.tokens, 0)
+                bucket.updated_at = max(bucket.updated_at, now + delay)
+            elif status_code < 500:
+                bucket.rate = min(bucket.max_rate, bucket.rate * self.recovery)
+
+    def current_rate(self, url_or_host):
+        """Tốc độ hiện tại (request/giây) của host"""
+        host = self.host_of(url_or_host)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            return bucket.rate if bucket else self.default_rate
@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    """Một lần tính toán đang chạy mà các request giống nhau cùng chờ"""
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResultCache:
+    """Cache kết quả trong bộ nhớ có TTL và giới hạn LRU, gộp các request giống nhau đang chạy"""
+    HIT = 'HIT'
+    MISS = 'MISS'
+    COALESCED = 'COALESCED'
+
+    def __init__(self, ttl=120, max_entries=64):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """Lấy kết quả theo khóa hoặc tính mới bằng compute().
+
+        Trả về (kết quả, trạng thái HIT/MISS/COALESCED, tuổi của kết quả tính bằng giây).
+        Các lời gọi cùng khóa trong lúc compute() đang chạy sẽ chờ và dùng chung kết quả.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = time.time() - stored_at
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value, self.HIT, age
+                del self._entries[key]
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, self.COALESCED, 0
+
+        try:
+            flight.value = compute()
+        except Exception as e:
+            flight.error = e
+            raise
+        else:
+            with self._lock:
+                self._entries[key] = (flight.value, time.time())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+        return flight.value, self.MISS, 0
+
+    def stats(self):
+        """Thống kê số lần trúng, trượt và gộp request"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'entries': len(self._entries)
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,140 @@
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+
+
+def url_key(url):
+    """Khóa cố định 16 bytes của URL, dùng cho chỉ mục và Bloom filter"""
+    return hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+
+
+def content_fingerprint(article):
+    """Dấu vân tay nội dung bài viết (tiêu đề + nội dung) để phát hiện bài bị sửa"""
+    text = f"{article.get('title', '')}\n{article.get('content', '')}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def listing_fingerprint(article):
+    """Dấu vân tay của bài viết trên trang danh mục/feed (tiêu đề + mô tả), so sánh được trước khi tải bài"""
+    text = f"{article.get('title', '')}\n{article.get('description', '')}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class BloomFilter:
+    """Bloom filter trong bộ nhớ, trả lời nhanh 'chắc chắn chưa có' mà không cần đọc đĩa"""
+    def __init__(self, capacity=1000000, error_rate=0.01):
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing từ hai nửa của khóa 16 bytes
+        h1 = int.from_bytes(key[:8], 'little')
+        h2 = int.from_bytes(key[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class SeenUrlIndex:
+    """Chỉ mục bền vững các URL bài viết đã crawl, tách theo nguồn.
+
+    Mỗi URL kèm dấu vân tay của bài trên trang danh mục/feed (listing_fingerprint): tiêu đề hoặc
+    mô tả đổi nghĩa là bài đã bị sửa, is_new coi bài đó là mới để crawl lại.
+
+    Bloom filter chỉ được nạp từ SQLite khi khởi tạo nên chỉ đúng khi một tiến trình ghi vào chỉ mục:
+    URL do tiến trình khác thêm sau đó sẽ bị coi là chưa crawl. Khi nhiều tiến trình dùng chung file
+    chỉ mục (batch_crawl, frontier_crawl) hãy truyền use_bloom=False để luôn tra SQLite.
+    """
+    def __init__(self, path=os.path.join('news_data', 'seen_urls.db'), use_bloom=True,
+                 bloom_capacity=1000000, bloom_error_rate=0.01):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        # Khóa chính (source, url_key) nằm ngay trong B-tree nên tra cứu không cần bảng phụ
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS seen_urls (
+                source TEXT NOT NULL,
+                url_key BLOB NOT NULL,
+                url TEXT NOT NULL,
+                fingerprint TEXT,
+                crawled_at REAL NOT NULL,
+                PRIMARY KEY (source, url_key)
+            ) WITHOUT ROWID
+        ''')
+        self._conn.commit()
+
+        # Bloom filter phía trước: URL mới (trường hợp phổ biến) không cần truy vấn SQLite
+        self.bloom = None
+        if use_bloom:
+            self.bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+            for source, key in self._conn.execute('SELECT source, url_key FROM seen_urls'):
+                self.bloom.add(self._bloom_key(source, key))
+
+    @staticmethod
+    def _bloom_key(source, key):
+        return hashlib.blake2b(source.encode('utf-8') + key, digest_size=16).digest()
+
+    def contains(self, source, url):
+        """Kiểm tra URL đã được crawl cho nguồn này chưa"""
+        key = url_key(url)
+        if self.bloom is not None and self._bloom_key(source, key) not in self.bloom:
+            return False
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT 1 FROM seen_urls WHERE source = ? AND url_key = ?', (source, key)
+            ).fetchone()
+        return row is not None
+
+    def is_new(self, source, url, fingerprint=None):
+        """URL chưa được crawl cho nguồn này, hoặc đã crawl nhưng dấu vân tay trên trang danh mục đã đổi"""
+        key = url_key(url)
+        if self.bloom is not None and self._bloom_key(source, key) not in self.bloom:
+            return True
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT fingerprint FROM seen_urls WHERE source = ? AND url_key = ?', (source, key)
+            ).fetchone()
+        if row is None:
+            return True
+        return fingerprint is not None and row[0] is not None and row[0] != fingerprint
+
+    def add(self, source, url, fingerprint=None):
+        """Đánh dấu URL đã crawl cùng dấu vân tay của bài trên trang danh mục"""
+        key = url_key(url)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO seen_urls (source, url_key, url, fingerprint, crawled_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (source, key, url, fingerprint, time.time())
+            )
+            self._conn.commit()
+            if self.bloom is not None:
+                self.bloom.add(self._bloom_key(source, key))
+
+    def count(self, source=None):
+        """Số URL đã lưu, theo nguồn hoặc toàn bộ"""
+        with self._lock:
+            if source is None:
+                return self._conn.execute('SELECT COUNT(*) FROM seen_urls').fetchone()[0]
+            return self._conn.execute('SELECT COUNT(*) FROM seen_urls WHERE source = ?', (source,)).fetchone()[0]
+
+    def close(self):
+        """Đóng kết nối SQLite"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,33 @@
+"""Fixture dùng chung cho các bài kiểm thử"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import MetricsRegistry
+from vn_news_crawler import VnExpressCrawler
+
+
+@pytest.fixture
+def make_crawler():
+    """Hàm tạo crawler không in tiến trình, có bộ metrics riêng và trỏ tới máy chủ cục bộ nếu có.
+
+    make_crawler(crawler_class=VnExpressCrawler, server=None, **kwargs); các crawler được đóng khi
+    bài kiểm thử kết thúc.
+    """
+    crawlers = []
+
+    def make(crawler_class=VnExpressCrawler, server=None, **kwargs):
+        kwargs.setdefault('metrics', MetricsRegistry())
+        kwargs.setdefault('verbose', False)
+        crawler = crawler_class(**kwargs)
+        if server is not None:
+            crawler.base_url = server.url
+        crawlers.append(crawler)
+        return crawler
+
+    yield make
+    for crawler in crawlers:
+        crawler.close()
@@ -0,0 +1,70 @@
+"""Chỉ mục bài gần trùng: tìm được mọi fingerprint trong max_distance bit, số bài phải so sánh không tăng
+theo kích thước chỉ mục"""
+import random
+
+from dedup import FINGERPRINT_BITS, NearDuplicateIndex, hamming_distance
+
+
+def flip_bits(fingerprint, count, rng):
+    for bit in rng.sample(range(FINGERPRINT_BITS), count):
+        fingerprint ^= 1 << bit
+    return fingerprint
+
+
+def mean_candidates(index, rng, queries=500):
+    return sum(len(index._candidates(rng.getrandbits(FINGERPRINT_BITS))) for _ in range(queries)) / queries
+
+
+def test_finds_every_fingerprint_within_max_distance():
+    rng = random.Random(1)
+    index = NearDuplicateIndex()
+    stored = [rng.getrandbits(FINGERPRINT_BITS) for _ in range(2000)]
+    for number, fingerprint in enumerate(stored):
+        index._insert(f'u{number}', fingerprint, f'u{number}')
+
+    for number, fingerprint in enumerate(stored[:300]):
+        near = flip_bits(fingerprint, rng.randint(0, index.max_distance), rng)
+        url, distance = index._find(near)
+        assert url == f'u{number}'
+        assert distance == hamming_distance(fingerprint, near)
+    # Cách quá max_distance bit (và xa mọi fingerprint khác): không phải bài trùng
+    assert index._find(flip_bits(stored[0], 20, rng)) == (None, None)
+
+
+def test_candidates_stay_bounded_as_index_grows():
+    rng = random.Random(2)
+    rows = [(f'u{number}', rng.getrandbits(FINGERPRINT_BITS - 1), f'u{number}') for number in range(40000)]
+    means = []
+    for size in (2500, 10000, 40000):
+        index = NearDuplicateIndex()
+        index._load(rows[:size])
+        means.append(mean_candidates(index, rng))
+
+    # 6 dải 10 bit sẽ cho khoảng 6 * 40000 / 1024 ~ 230 bài mỗi lần tra
+    assert max(means) < 10
+    assert means[-1] < 0.05 * 6 * 40000 / 1024
+
+
+def test_shared_index_matches_in_memory(tmp_path):
+    rng = random.Random(3)
+    path = str(tmp_path / 'dedup.db')
+    shared = NearDuplicateIndex(path, shared=True)
+    articles = []
+    for number in range(50):
+        words = [f'w{rng.randrange(5000)}' for _ in range(800)]
+        articles.append({'url': f'a{number}', 'title': '', 'content': ' '.join(words)})
+        # Bản sửa nhẹ của bài trước: gần trùng
+        words[rng.randrange(len(words))] = 'sửa'
+        articles.append({'url': f'b{number}', 'title': '', 'content': ' '.join(words)})
+    tagged = [shared.tag(dict(article))['duplicate_of'] for article in articles]
+    shared.close()
+
+    memory = NearDuplicateIndex()
+    assert tagged == [memory.tag(dict(article))['duplicate_of'] for article in articles]
+    assert tagged[1::2] == [f'a{number}' for number in range(50)]
+
+    # Mở lại với cách chia khối khác: các bảng khóa được dựng lại từ fingerprint đã lưu
+    reopened = NearDuplicateIndex(path, shared=True, blocks=6)
+    assert len(reopened) == 100
+    assert reopened.find_duplicate(articles[1])[0] == 'a0'
+    reopened.close()
@@ -0,0 +1,49 @@
+"""Tìm bài viết qua feed của từng nguồn trên máy chủ phát lại fixtures/ (RSS của VnExpress, news sitemap
+của VietnamNet) cho cùng bài viết với trang danh mục, và quay về trang danh mục khi không có feed"""
+import pytest
+
+from bench_server import FixtureServer
+from vn_news_crawler import VnExpressCrawler, VietnamNetCrawler
+
+CRAWLERS = [
+    ('vnexpress', VnExpressCrawler, '.rss'),
+    ('vietnamnet', VietnamNetCrawler, '.xml'),
+]
+
+
+def path_of(url):
+    """Đường dẫn của URL bài viết (feed mẫu có URL tuyệt đối của trang thật, trang danh mục thì tương đối)"""
+    return '/' + url.split('://', 1)[-1].split('/', 1)[-1]
+
+
+@pytest.mark.parametrize('site, crawler_class, extension', CRAWLERS)
+def test_feed_matches_listing(make_crawler, site, crawler_class, extension):
+    with FixtureServer(site) as server:
+        with make_crawler(crawler_class, server=server, discovery='feed') as crawler:
+            assert crawler.get_feed_url('thoi-su').endswith(extension)
+            feed_articles = list(crawler.iter_category('thoi-su', num_pages=3))
+            requests = server.requests
+        with make_crawler(crawler_class, server=server) as crawler:
+            listing_articles = list(crawler.iter_category('thoi-su', num_pages=1))
+
+    # Một request duy nhất cho feed, không tải trang danh mục nào
+    assert requests == 1
+    assert feed_articles
+    assert [path_of(a['url']) for a in feed_articles] == [path_of(a['url']) for a in listing_articles]
+    assert [a['title'] for a in feed_articles] == [a['title'] for a in listing_articles]
+    assert all(a['category'] == 1 for a in feed_articles)
+    if extension == '.rss':
+        assert [a['description'] for a in feed_articles] == [a['description'] for a in listing_articles]
+
+
+@pytest.mark.parametrize('site, crawler_class, extension', CRAWLERS)
+def test_falls_back_to_listing_without_feed(make_crawler, site, crawler_class, extension):
+    with FixtureServer(site) as server:
+        with make_crawler(crawler_class, server=server, discovery='feed', max_retries=0) as crawler:
+            # Nguồn không có feed dạng này trên máy chủ mẫu: 404
+            other = '.xml' if extension == '.rss' else '.rss'
+            crawler.get_feed_url = lambda category: f"{server.url}/feed/{category}{other}"
+            articles = list(crawler.iter_category('thoi-su', num_pages=1))
+
+    assert articles
+    assert all(a['url'].startswith(server.url) for a in articles)
@@ -0,0 +1,207 @@
+"""Lease, xác nhận và số lần thử của frontier (SQLite và Redis qua fakeredis) với đồng hồ giả"""
+import pytest
+
+from frontier import RedisFrontier, SQLiteFrontier
+
+LEASE_SECONDS = 60
+MAX_ATTEMPTS = 2
+RETRY_DELAY = 30
+
+
+class FakeClock:
+    """Đồng hồ chỉ chạy khi gọi advance"""
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def backend(request, tmp_path):
+    """(frontier, clock) của từng loại frontier"""
+    clock = FakeClock()
+    kwargs = dict(lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS, retry_delay=RETRY_DELAY, clock=clock)
+    if request.param == 'sqlite':
+        frontier = SQLiteFrontier(str(tmp_path / 'frontier.db'), **kwargs)
+    else:
+        fakeredis = pytest.importorskip('fakeredis')
+        frontier = RedisFrontier(client=fakeredis.FakeRedis(), **kwargs)
+    yield frontier, clock
+    frontier.close()
+
+
+def articles(*urls):
+    return [{'url': url, 'title': url.upper()} for url in urls]
+
+
+def test_add_skips_known_urls(backend):
+    frontier, _ = backend
+    assert frontier.add('vnexpress', articles('a', 'b')) == 2
+    assert frontier.add('vnexpress', articles('b', 'c')) == 1
+    assert frontier.stats()['pending'] == 3
+    assert frontier.stats('vnexpress')['pending'] == 3
+    assert frontier.stats('vietnamnet')['pending'] == 0
+
+
+def test_leases_are_disjoint(backend):
+    frontier, _ = backend
+    frontier.add('vnexpress', articles('a', 'b', 'c'))
+    first = frontier.lease('w1', limit=2)
+    second = frontier.lease('w2', limit=2)
+
+    assert [a['url'] for a in first] == ['a', 'b']
+    assert [a['url'] for a in second] == ['c']
+    assert first[0]['title'] == 'A'
+    assert frontier.lease('w3') == []
+    assert frontier.stats() == {'pending': 0, 'leased': 3, 'done': 0, 'failed': 0}
+
+
+def test_expired_lease_is_given_to_another_worker(backend):
+    frontier, clock = backend
+    frontier.add('vnexpress', articles('a'))
+    assert [a['url'] for a in frontier.lease('w1')] == ['a']
+
+    # Chưa hết hạn: không ai nhận được
+    clock.advance(LEASE_SECONDS - 1)
+    assert frontier.lease('w2') == []
+
+    clock.advance(1)
+    assert [a['url'] for a in frontier.lease('w2')] == ['a']
+    # w1 xác nhận muộn sau khi lô đã được giao cho w2: không được tính
+    assert frontier.ack('w1', ['a']) == 0
+    assert frontier.ack('w2', ['a']) == 1
+    assert frontier.stats() == {'pending': 0, 'leased': 0, 'done': 1, 'failed': 0}
+
+
+def test_ack_requires_owner(backend):
+    frontier, _ = backend
+    frontier.add('vnexpress', articles('a', 'b'))
+    frontier.lease('w1')
+
+    assert frontier.ack('w2', ['a', 'b']) == 0
+    assert frontier.release('w2', ['a']) == 0
+    assert frontier.ack('w1', ['a', 'missing']) == 1
+    assert frontier.stats() == {'pending': 0, 'leased': 1, 'done': 1, 'failed': 0}
+
+
+def test_reclaim_expired(backend):
+    frontier, clock = backend
+    frontier.add('vnexpress', articles('a', 'b'))
+    frontier.lease('w1', limit=1)
+    assert frontier.reclaim_expired() == 0
+
+    clock.advance(LEASE_SECONDS)
+    assert frontier.reclaim_expired() == 1
+    assert frontier.stats() == {'pending': 2, 'leased': 0, 'done': 0, 'failed': 0}
+
+
+def test_max_attempts_marks_failed(backend):
+    frontier, clock = backend
+    frontier.add('vnexpress', articles('a', 'b'))
+
+    # a: hết hạn lease max_attempts lần
+    for attempt in range(MAX_ATTEMPTS):
+        assert [a['url'] for a in frontier.lease('w1', limit=1)] == ['a']
+        clock.advance(LEASE_SECONDS)
+    assert frontier.reclaim_expired() == 1
+    assert frontier.stats() == {'pending': 1, 'leased': 0, 'done': 0, 'failed': 1}
+
+    # b: worker trả lại max_attempts lần
+    for attempt in range(MAX_ATTEMPTS):
+        assert [a['url'] for a in frontier.lease('w1')] == ['b']
+        assert frontier.release('w1', ['b']) == 1
+        clock.advance(RETRY_DELAY)
+    assert frontier.lease('w1') == []
+    assert frontier.stats() == {'pending': 0, 'leased': 0, 'done': 0, 'failed': 2}
+
+
+def test_lease_by_source(backend):
+    frontier, _ = backend
+    frontier.add('vnexpress', articles('a'))
+    frontier.add('vietnamnet', articles('b'))
+
+    assert [a['url'] for a in frontier.lease('w1', source='vietnamnet')] == ['b']
+    assert frontier.lease('w1', source='vietnamnet') == []
+    assert [a['url'] for a in frontier.lease('w1')] == ['a']
+
+
+def test_redis_keys_share_hash_tag():
+    """Mọi khóa của RedisFrontier có chung hash tag {prefix} (cùng slot trên Redis Cluster)"""
+    fakeredis = pytest.importorskip('fakeredis')
+    client = fakeredis.FakeRedis()
+    frontier = RedisFrontier(client=client, prefix='crawl', clock=FakeClock())
+    frontier.add('vnexpress', articles('a', 'b'))
+    frontier.ack('w1', [a['url'] for a in frontier.lease('w1', limit=1)])
+
+    keys = {key.decode() for key in client.keys('*')}
+    assert '{crawl}:pending:vnexpress' in keys
+    assert all(key.startswith('{crawl}:') for key in keys)
+
+
+def test_released_url_waits_retry_delay(backend):
+    frontier, clock = backend
+    frontier.add('vnexpress', articles('a', 'b'))
+    frontier.lease('w1', limit=1)
+    assert frontier.release('w1', ['a']) == 1
+
+    # a chưa được giao lại ngay, các URL khác vẫn được giao
+    assert [a['url'] for a in frontier.lease('w1')] == ['b']
+    clock.advance(RETRY_DELAY - 1)
+    assert frontier.lease('w1') == []
+    assert frontier.stats()['pending'] == 1
+
+    clock.advance(1)
+    assert [a['url'] for a in frontier.lease('w1')] == ['a']
+
+
+def test_failed_fetch_is_retried_after_delay(backend, make_crawler):
+    """Lần tải đầu lỗi (503, timeout...): bài được trả lại và crawl thành công ở lần sau"""
+    frontier, clock = backend
+    fetches = []
+
+    def crawl_detail(article, index, total, callback=None):
+        fetches.append(article['url'])
+        return None if len(fetches) == 1 else dict(article, content='ok')
+
+    crawler = make_crawler()
+    frontier.add(crawler.source_name, articles('a'))
+    crawler._crawl_article_detail = crawl_detail
+    assert list(crawler.iter_frontier(frontier, 'w1', max_workers=1)) == []
+    assert frontier.stats() == {'pending': 1, 'leased': 0, 'done': 0, 'failed': 0}
+
+    clock.advance(RETRY_DELAY)
+    crawled = list(crawler.iter_frontier(frontier, 'w1', max_workers=1))
+
+    assert [a['content'] for a in crawled] == ['ok']
+    assert fetches == ['a', 'a']
+    assert frontier.stats() == {'pending': 0, 'leased': 0, 'done': 1, 'failed': 0}
+
+
+def test_stats_by_source(backend):
+    frontier, clock = backend
+    frontier.add('vnexpress', articles('a', 'b', 'c'))
+    frontier.add('vietnamnet', articles('d'))
+    frontier.lease('w1', limit=2, source='vnexpress')
+    frontier.ack('w1', ['a'])
+    frontier.release('w1', ['b'])
+    frontier.lease('w2', source='vietnamnet')
+    clock.advance(LEASE_SECONDS)
+    frontier.reclaim_expired()
+
+    assert frontier.stats('vnexpress') == {'pending': 2, 'leased': 0, 'done': 1, 'failed': 0}
+    assert frontier.stats('vietnamnet') == {'pending': 1, 'leased': 0, 'done': 0, 'failed': 0}
+    assert frontier.stats() == {'pending': 3, 'leased': 0, 'done': 1, 'failed': 0}
+
+
+def test_redis_stats_with_decoded_responses():
+    fakeredis = pytest.importorskip('fakeredis')
+    frontier = RedisFrontier(client=fakeredis.FakeRedis(decode_responses=True), clock=FakeClock())
+    frontier.add('vnexpress', articles('a', 'b'))
+    assert [a['url'] for a in frontier.lease('w1', limit=1)] == ['a']
+
+    assert frontier.stats() == {'pending': 1, 'leased': 1, 'done': 0, 'failed': 0}
+    assert frontier.stats('vnexpress') == {'pending': 1, 'leased': 1, 'done': 0, 'failed': 0}
@@ -0,0 +1,90 @@
+"""Bộ giới hạn tốc độ nhận được mọi phản hồi 429 khi crawler tải trang từ máy chủ cục bộ"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from rate_limiter import AdaptiveRateLimiter
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    """Trả về 429 cho server.throttle request đầu tiên, sau đó 200"""
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            throttled = server.requests <= server.throttle
+        body = b'Too Many Requests' if throttled else b'<html>ok</html>'
+        self.send_response(429 if throttled else 200)
+        if throttled:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ThrottlingHandler)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.throttle = 2
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def limiter():
+    # Không ngủ thật khi phải chờ token, chỉ đếm số lần xin token
+    limiter = AdaptiveRateLimiter(sleep=lambda seconds: None)
+    acquire = limiter.acquire
+    limiter.acquired = 0
+
+    def counting_acquire(*args, **kwargs):
+        limiter.acquired += 1
+        return acquire(*args, **kwargs)
+    limiter.acquire = counting_acquire
+    return limiter
+
+
+@pytest.fixture
+def crawler(make_crawler, limiter):
+    return make_crawler(rate_limiter=limiter, rate_limit=4.0, rate_burst=4, max_retries=3, backoff_factor=0)
+
+
+def test_throttled_responses_lower_rate(server, limiter, crawler):
+    url = f"http://127.0.0.1:{server.server_address[1]}/thoi-su"
+    assert crawler.get_page_content(url) == '<html>ok</html>'
+
+    # Hai lần 429 và lần 200 đều đi qua bộ giới hạn: 4 -> 2 -> 1, rồi tăng lại 1.2 lần
+    assert server.requests == 3
+    assert limiter.acquired == 3
+    assert limiter.current_rate(url) == pytest.approx(4.0 * 0.5 * 0.5 * 1.2)
+
+
+def test_rate_recovers_after_successful_responses(server, limiter, crawler):
+    url = f"http://127.0.0.1:{server.server_address[1]}/thoi-su"
+    crawler.get_page_content(url)
+    rates = [limiter.current_rate(url)]
+    for _ in range(10):
+        crawler.get_page_content(url)
+        rates.append(limiter.current_rate(url))
+
+    assert rates == sorted(rates)
+    assert rates[-1] == pytest.approx(4.0)
+
+
+def test_gives_up_after_max_retries(server, limiter, crawler):
+    server.throttle = 100
+    url = f"http://127.0.0.1:{server.server_address[1]}/thoi-su"
+    assert crawler.get_page_content(url) is None
+
+    # Lần đầu và 3 lần thử lại, mỗi lần đều giảm tốc độ
+    assert server.requests == 4
+    assert limiter.current_rate(url) == pytest.approx(4.0 * 0.5 ** 4)
@@ -0,0 +1,41 @@
+"""Chế độ tăng dần bỏ qua bài đã crawl và crawl lại bài có tiêu đề/mô tả trên trang danh mục đã đổi"""
+import pytest
+
+from seen_index import SeenUrlIndex, listing_fingerprint
+
+
+def listing(url, title, description=''):
+    return {'url': url, 'title': title, 'description': description, 'category': 1}
+
+
+@pytest.mark.parametrize('use_bloom', [True, False])
+def test_is_new_detects_edited_listing(tmp_path, use_bloom):
+    index = SeenUrlIndex(str(tmp_path / 'seen_urls.db'), use_bloom=use_bloom)
+    article = listing('https://vnexpress.net/a.html', 'Tiêu đề', 'Mô tả')
+    assert index.is_new('vnexpress', article['url'], listing_fingerprint(article))
+
+    index.add('vnexpress', article['url'], listing_fingerprint(article))
+    assert not index.is_new('vnexpress', article['url'], listing_fingerprint(article))
+    assert not index.is_new('vnexpress', article['url'])
+    assert index.is_new('vietnamnet', article['url'], listing_fingerprint(article))
+
+    edited = dict(article, title='Tiêu đề đã sửa')
+    assert index.is_new('vnexpress', article['url'], listing_fingerprint(edited))
+    index.close()
+
+
+def test_filter_new_articles_recrawls_edited(tmp_path, make_crawler):
+    index = SeenUrlIndex(str(tmp_path / 'seen_urls.db'))
+    crawler = make_crawler(seen_index=index)
+    crawled = [listing('https://vnexpress.net/a.html', 'A'), listing('https://vnexpress.net/b.html', 'B')]
+    for article in crawled:
+        index.add(crawler.source_name, article['url'], listing_fingerprint(article))
+
+    articles = [listing('https://vnexpress.net/a.html', 'A'),
+                listing('https://vnexpress.net/b.html', 'B', 'Mô tả mới'),
+                listing('https://vnexpress.net/c.html', 'C')]
+    new_articles = crawler.filter_new_articles(articles)
+
+    assert [article['url'] for article in new_articles] == ['https://vnexpress.net/b.html',
+                                                             'https://vnexpress.net/c.html']
+    index.close()
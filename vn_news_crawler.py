@@ -1,100 +1,616 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, FeatureNotFound
 import json
-import os
-import time
-from datetime import datetime
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+import queue
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import urlparse
+from extraction import CAPTION_STYLE, SiteSpec
+from feeds import parse_feed
+from frontier import default_worker_id
+from seen_index import listing_fingerprint
+from rate_limiter import AdaptiveRateLimiter
+from metrics import REGISTRY, MetricsRegistry
 import threading
 
 
+# Crawler dùng để phân tích trong mỗi tiến trình của pool phân tích, tạo một lần rồi dùng lại
+_parse_crawlers = {}
+
+
+def parse_article_in_process(crawler_class, parser, base_url, html_content, url, category_id,
+                             targeted_parsing=True):
+    """Phân tích và làm sạch bài viết trong tiến trình con.
+
+    Trả về (dict bài viết, số liệu của lần phân tích); chỉ số ghi trong tiến trình con (thời gian làm sạch...)
+    không tới được registry của tiến trình cha nên được gửi về để gộp vào đó.
+    """
+    key = (crawler_class, parser, base_url, targeted_parsing)
+    crawler = _parse_crawlers.get(key)
+    if crawler is None:
+        crawler = crawler_class(parser=parser, verbose=False, targeted_parsing=targeted_parsing)
+        crawler.base_url = base_url
+        _parse_crawlers[key] = crawler
+    crawler.metrics = MetricsRegistry()
+    return crawler.parse_article_html(html_content, url, category_id), crawler.metrics.state()
+
+
+def create_parse_pool(workers):
+    """Tạo pool tiến trình phân tích HTML và khởi động sẵn các tiến trình con.
+
+    Tạo các tiến trình ngay từ đầu (khi chưa có luồng tải nào chạy) để không phải fork
+    giữa lúc các luồng khác đang giữ khóa; gọi trước khi mở các kết nối SQLite (HttpCache,
+    SeenUrlIndex, NearDuplicateIndex, exporter) vì tiến trình con fork ra không được dùng lại chúng.
+    """
+    pool = ProcessPoolExecutor(max_workers=workers)
+    list(pool.map(abs, range(workers)))
+    return pool
+
+
 class NewsCrawler:
     """Base class for news crawlers"""
-    def __init__(self):
+    # Các bộ phân tích HTML được hỗ trợ; 'lxml' nhanh hơn nhiều nhưng cần cài thêm gói lxml
+    PARSERS = ('html.parser', 'lxml')
+    # Cách tìm bài viết của danh mục: 'html' đọc trang danh mục, 'feed' đọc RSS/news sitemap
+    # (nhẹ hơn nhiều) và quay về trang danh mục nếu không có hoặc không đọc được feed
+    DISCOVERY_MODES = ('html', 'feed')
+    # Tốc độ request mặc định tới trang nguồn (request/giây) và số request được gửi dồn
+    default_rate_limit = 1.0
+    default_rate_burst = 1
+    # Cấu hình trích xuất trang danh mục và trang bài viết (extraction.SiteSpec)
+    spec = None
+
+    def __init__(self, max_workers=1, max_per_host=4, rate_limit=None, rate_burst=None, rate_limiter=None,
+                 connect_timeout=5, read_timeout=20, max_retries=3, backoff_factor=0.5,
+                 cache=None, seen_index=None, parser='html.parser', dedup_index=None, metrics=None,
+                 verbose=True, host_slots=None, parse_workers=0, parse_pool=None, targeted_parsing=True,
+                 image_store=None, discovery='html'):
+        if discovery not in self.DISCOVERY_MODES:
+            raise ValueError(f"Cách tìm bài viết không hợp lệ: {discovery}. "
+                             f"Chọn một trong {', '.join(self.DISCOVERY_MODES)}")
         self.base_url = ""
         self.headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive"
         }
         self.categories = {}
         self.category_names = {}
         self.source_name = "Unknown"
+
+        # Cấu hình crawl đồng thời: số luồng tải chi tiết và số request tối đa cùng lúc tới một host
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        # Có thể truyền sẵn semaphore theo host (ví dụ semaphore của multiprocessing.Manager)
+        # để giới hạn chung cho nhiều crawler hoặc nhiều tiến trình
+        self._host_slots = dict(host_slots) if host_slots else {}
+        self._host_slots_lock = threading.Lock()
+
+        # Session dùng chung cho mọi request: giữ kết nối keep-alive,
+        # giới hạn thời gian chờ và tự thử lại khi lỗi mạng hoặc lỗi 5xx
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.session = self.create_session()
+
+        # Bộ giới hạn tốc độ theo host, có thể dùng chung giữa nhiều crawler
+        self.rate_limit = rate_limit or self.default_rate_limit
+        self.rate_burst = rate_burst or self.default_rate_burst
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+
+        # Cache HTTP trên đĩa (HttpCache), None nếu không dùng cache
+        self.cache = cache
+        # Chỉ mục các URL đã crawl (SeenUrlIndex) phục vụ crawl tăng dần
+        self.seen_index = seen_index
+        # Chỉ mục phát hiện bài gần trùng (NearDuplicateIndex), có thể dùng chung giữa các nguồn
+        self.dedup_index = dedup_index
+        # Bộ phân tích HTML dùng cho BeautifulSoup (xem PARSERS)
+        self.parser = self.resolve_parser(parser)
+        # Chỉ dựng cây cho các phần cần thiết của trang bài viết (parse_only trong spec)
+        self.targeted_parsing = targeted_parsing
+        # Chỉ số thời gian/bộ đếm theo nguồn và danh mục (MetricsRegistry)
+        self.metrics = metrics or REGISTRY
+        # In thông báo chi tiết cho từng request/bài viết; tắt đi khi crawl số lượng lớn
+        self.verbose = verbose
+        # Pool tiến trình phân tích trang bài viết (phân tích HTML tốn CPU, bị GIL giới hạn nếu chạy
+        # trong luồng tải); có thể dùng chung một pool giữa nhiều crawler. Không dùng pool nếu
+        # parse_workers = 0 và không truyền parse_pool
+        self._owns_parse_pool = parse_pool is None and parse_workers > 0
+        self.parse_pool = create_parse_pool(parse_workers) if self._owns_parse_pool else parse_pool
+        # Kho ảnh cục bộ (ImageStore): tải ảnh bài viết về máy và đổi URL ảnh sang đường dẫn cục bộ,
+        # None để giữ nguyên URL ảnh của trang nguồn
+        self.image_store = image_store
+        # Cách tìm bài viết của danh mục (xem DISCOVERY_MODES)
+        self.discovery = discovery
+
+    def create_session(self):
+        """Tạo session HTTP với connection pool và cơ chế thử lại"""
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=self.max_retries,
+            status=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            # 429/503 không tự thử lại ở đây: get_page_content thử lại qua bộ giới hạn tốc độ để
+            # mỗi phản hồi quá tải đều làm giảm tốc độ của host và lần gửi lại cũng phải chờ token
+            status_forcelist=(500, 502, 504),
+            # urllib3 vẫn tự thử lại 413/429/503 có header Retry-After nếu không tắt
+            respect_retry_after_header=False,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=max(self.max_workers, self.max_per_host),
+            max_retries=retry
+        )
+        session = requests.Session()
+        session.headers.update(self.headers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def close(self):
+        """Đóng session và giải phóng các kết nối đang mở"""
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+        if self._owns_parse_pool and self.parse_pool is not None:
+            self.parse_pool.shutdown(cancel_futures=True)
+            self.parse_pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def debug(self, message):
+        """In thông báo chi tiết khi bật verbose"""
+        if self.verbose:
+            print(message)
+
+    def category_label(self, category_id):
+        """Slug của danh mục, dùng làm nhãn cho chỉ số"""
+        for key, value in self.categories.items():
+            if value == category_id:
+                return key
+        return '' if category_id is None else str(category_id)
         
-    def get_page_content(self, url):
+    def get_page_content(self, url, category=''):
         """Tải nội dung trang web từ URL"""
+        metrics = self.metrics
         try:
-            print(f"Đang tải URL: {url}")
-            response = requests.get(url, headers=self.headers)
+            # Dùng bản lưu trong cache nếu còn hạn, nếu không thì hỏi lại server có điều kiện
+            entry = self.cache.get(url) if self.cache else None
+            if entry and self.cache.is_fresh(entry):
+                self.cache.record('hit')
+                metrics.cache.inc(source=self.source_name, result='hit')
+                self.debug(f"Lấy từ cache: {url}")
+                return entry['body']
+
+            self.debug(f"Đang tải URL: {url}")
+            if self.session is None:
+                self.session = self.create_session()
+            headers = self.cache.conditional_headers(entry) if entry else None
+            # Chờ tới lượt theo giới hạn tốc độ của host rồi báo lại phản hồi để tự điều chỉnh;
+            # server báo quá tải (429/503) thì thử lại sau khi bộ giới hạn đã giảm tốc độ và tạm dừng host
+            for attempt in range(self.max_retries + 1):
+                self.rate_limiter.acquire(url, self.rate_limit, self.rate_burst)
+                with metrics.fetch_seconds.time(source=self.source_name, category=category):
+                    response = self.session.get(url, timeout=self.timeout, headers=headers)
+                self.rate_limiter.feedback(url, response.status_code, response.headers.get('Retry-After'))
+                metrics.requests.inc(source=self.source_name, status=response.status_code)
+                if response.status_code not in AdaptiveRateLimiter.THROTTLE_STATUSES or attempt == self.max_retries:
+                    break
+                metrics.retries.inc(source=self.source_name)
+                self.debug(f"Server báo quá tải ({response.status_code}), thử lại: {url}")
+
+            retries = response.raw.retries if response.raw is not None else None
+            if retries is not None and retries.history:
+                metrics.retries.inc(len(retries.history), source=self.source_name)
+
+            if entry and response.status_code == 304:
+                self.cache.refresh(url, entry)
+                self.cache.record('revalidated')
+                metrics.cache.inc(source=self.source_name, result='revalidated')
+                self.debug(f"Trang không thay đổi (304), dùng bản lưu: {url}")
+                return entry['body']
+
             response.raise_for_status()
             
             # Hiển thị kích thước nội dung
-            content_length = len(response.text)
-            print(f"Đã tải thành công, kích thước: {content_length} bytes")
+            metrics.fetch_bytes.inc(len(response.content), source=self.source_name, category=category)
+            self.debug(f"Đã tải thành công, kích thước: {len(response.text)} bytes")
+
+            if self.cache:
+                self.cache.record('miss')
+                metrics.cache.inc(source=self.source_name, result='miss')
+                self.cache.store(url, response.text, response.headers)
             
             return response.text
         except requests.RequestException as e:
+            metrics.errors.inc(source=self.source_name, stage='fetch')
             print(f"Lỗi khi tải trang {url}: {e}")
             return None
             
+    @classmethod
+    def resolve_parser(cls, parser):
+        """Kiểm tra bộ phân tích HTML, quay về html.parser nếu thư viện chưa được cài"""
+        if parser not in cls.PARSERS:
+            raise ValueError(f"Bộ phân tích không hợp lệ: {parser}. Chọn một trong {', '.join(cls.PARSERS)}")
+        if parser != 'html.parser':
+            try:
+                BeautifulSoup('', parser)
+            except FeatureNotFound:
+                print(f"Chưa cài đặt {parser}, dùng html.parser thay thế")
+                return 'html.parser'
+        return parser
+
+    def make_soup(self, html_content, parse_only=None):
+        """Dựng cây BeautifulSoup bằng bộ phân tích đã chọn, chỉ các phần khớp parse_only nếu có"""
+        soup = BeautifulSoup(html_content, self.parser, parse_only=parse_only)
+        if self.parser == 'lxml':
+            # libxml2 không coi <source>, <track>, <wbr> là thẻ rỗng nên lồng các thẻ
+            # phía sau vào bên trong; đưa chúng ra ngoài để cây giống html.parser
+            for tag in soup.find_all(['source', 'track', 'wbr']):
+                for child in reversed(list(tag.contents)):
+                    tag.insert_after(child.extract())
+        return soup
+
     def parse_article_list(self, html_content, category_id):
         """Phân tích danh sách bài viết từ trang danh mục"""
-        raise NotImplementedError("Subclasses must implement this method")
+        if self.spec is None:
+            raise NotImplementedError("Subclasses must define spec or implement this method")
+        if not html_content:
+            self.debug("Không có nội dung HTML để phân tích")
+            return []
+        return self.spec.extract_list(self, self.make_soup(html_content), category_id)
         
     def parse_article_detail(self, url, category_id):
         """Phân tích chi tiết bài viết từ URL"""
-        raise NotImplementedError("Subclasses must implement this method")
+        html_content = self.get_page_content(url, self.category_label(category_id))
+        if not html_content:
+            return None
+        return self.parse_detail(html_content, url, category_id)
+
+    def parse_detail(self, html_content, url, category_id):
+        """Phân tích trang bài viết đã tải, trong pool tiến trình nếu có"""
+        category = self.category_label(category_id)
+        with self.metrics.parse_seconds.time(source=self.source_name, category=category, page='detail'):
+            if self.parse_pool is not None:
+                article, metrics_state = self.parse_pool.submit(
+                    parse_article_in_process, type(self), self.parser, self.base_url,
+                    html_content, url, category_id, self.targeted_parsing).result()
+                self.metrics.merge(metrics_state)
+            else:
+                article = self.parse_article_html(html_content, url, category_id)
+        if article is None:
+            self.metrics.errors.inc(source=self.source_name, stage='parse')
+        return article
+
+    def parse_article_html(self, html_content, url, category_id):
+        """Phân tích chi tiết bài viết từ nội dung HTML đã tải"""
+        if self.spec is None:
+            raise NotImplementedError("Subclasses must define spec or implement this method")
+        return self.spec.extract_detail(self, self.make_detail_soup(html_content), url, category_id)
+
+    def make_detail_soup(self, html_content):
+        """Dựng cây cho trang bài viết, bỏ qua menu, footer, quảng cáo... khi bật targeted_parsing"""
+        strainer = self.spec.strainer if self.spec is not None and self.targeted_parsing else None
+        return self.make_soup(html_content, strainer)
         
-    def crawl_category(self, category, num_pages=2, callback=None):
-        """Crawl dữ liệu từ một danh mục cụ thể"""
-        articles = []
+    def crawl_listing_page(self, category, page, callback=None):
+        """Tải và phân tích một trang danh mục"""
+        category_id = self.categories.get(category)
+        url = self.get_category_url(category, page)
+
+        message = f"Đang crawl trang {page} của danh mục {self.category_names.get(category_id, category)}..."
+        self.debug(message)
+        if callback:
+            callback(message)
+
+        # Trang danh mục được tải song song với trang chi tiết nên cũng phải giữ slot của host
+        with self._host_slot(url):
+            html_content = self.get_page_content(url, category)
+        with self.metrics.parse_seconds.time(source=self.source_name, category=category, page='list'):
+            return self.parse_article_list(html_content, category_id)
+
+    def crawl_feed(self, category, callback=None):
+        """Tải và đọc RSS/news sitemap của danh mục, None nếu nguồn không có hoặc không đọc được feed"""
+        url = self.get_feed_url(category)
+        if not url:
+            return None
         category_id = self.categories.get(category)
 
-        for page in range(1, num_pages + 1):
-            url = self.get_category_url(category, page)
+        message = f"Đang đọc feed của danh mục {self.category_names.get(category_id, category)}..."
+        self.debug(message)
+        if callback:
+            callback(message)
 
-            message = f"Đang crawl trang {page} của danh mục {self.category_names.get(category_id, category)}..."
-            print(message)
+        with self._host_slot(url):
+            content = self.get_page_content(url, category)
+        if not content:
+            return None
+        with self.metrics.parse_seconds.time(source=self.source_name, category=category, page='feed'):
+            try:
+                articles = parse_feed(content, self.base_url, category_id)
+            except ET.ParseError as e:
+                self.metrics.errors.inc(source=self.source_name, stage='parse')
+                print(f"Lỗi khi đọc feed {url}: {e}")
+                return None
+        self.debug(f"{self.source_name}: Đã tìm thấy {len(articles)} bài viết trong feed")
+        return articles
+
+    def iter_category(self, category, num_pages=2, callback=None, incremental=False):
+        """Trả về lần lượt các bài viết của danh mục, chỉ tải trang tiếp theo khi bên dùng cần thêm bài.
+
+        Bài đã xuất hiện ở trang trước (danh sách bị đẩy xuống khi có bài mới) không được trả về lại;
+        ở chế độ tăng dần, bài đã có trong chỉ mục URL đã crawl cũng bị bỏ qua. Trang không còn bài
+        nào mới thì các trang sau (cũ hơn) cũng vậy, nên dừng phân trang tại đó.
+
+        Với discovery='feed', bài viết lấy từ feed của danh mục (feed chỉ có một trang, bỏ qua num_pages);
+        feed không có bài nào thì đọc trang danh mục như bình thường.
+        """
+        if self.discovery == 'feed':
+            feed_articles = self.crawl_feed(category, callback)
+            if feed_articles:
+                if incremental:
+                    feed_articles = self.filter_new_articles(feed_articles, callback)
+                yield from feed_articles
+                return
+            message = "Không lấy được bài viết từ feed, chuyển sang tải trang danh mục"
+            self.debug(message)
             if callback:
                 callback(message)
 
-            html_content = self.get_page_content(url)
-
-            page_articles = self.parse_article_list(html_content, category_id)
+        seen_urls = set()
+        for page in range(1, num_pages + 1):
+            page_articles = self.crawl_listing_page(category, page, callback)
             if not page_articles:
-                break
+                return
 
-            articles.extend(page_articles)
+            new_articles = []
+            for article in page_articles:
+                if article['url'] not in seen_urls:
+                    seen_urls.add(article['url'])
+                    new_articles.append(article)
+            if incremental:
+                new_articles = self.filter_new_articles(new_articles, callback)
+
+            if not new_articles:
+                message = f"Trang {page} không có bài viết mới, dừng tải các trang tiếp theo"
+                self.debug(message)
+                if callback:
+                    callback(message)
+                return
 
-            # Tạm dừng để tránh gửi quá nhiều request
-            time.sleep(1)
+            yield from new_articles
 
-        return articles
+    def crawl_category(self, category, num_pages=2, callback=None, incremental=False):
+        """Crawl dữ liệu từ một danh mục cụ thể"""
+        return list(self.iter_category(category, num_pages, callback, incremental))
         
     def get_category_url(self, category, page):
         """Lấy URL cho trang danh mục"""
         raise NotImplementedError("Subclasses must implement this method")
+
+    def get_feed_url(self, category):
+        """Lấy URL RSS/news sitemap của danh mục, None nếu nguồn không có feed"""
+        return None
         
-    def crawl_article_details(self, articles, max_articles=10, callback=None):
-        """Crawl chi tiết các bài viết từ danh sách URL"""
-        detailed_articles = []
+    def _host_slot(self, url):
+        """Lấy semaphore giới hạn số request đồng thời tới cùng một host"""
+        host = urlparse(url).netloc
+        with self._host_slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_per_host)
+                self._host_slots[host] = slot
+            return slot
+
+    def _crawl_article_detail(self, article, index, total, callback=None):
+        """Crawl chi tiết một bài viết, chỉ giữ slot của host trong lúc tải"""
+        message = f"Đang crawl chi tiết bài viết {index}/{total}: {article['title']}"
+        self.debug(message)
+        if callback:
+            callback(message)
+
+        with self._host_slot(article['url']):
+            html_content = self.get_page_content(article['url'], self.category_label(article['category']))
+        article_detail = self.parse_detail(html_content, article['url'], article['category']) if html_content else None
+
+        if article_detail is None:
+            self.metrics.skipped.inc(source=self.source_name, reason='failed')
+            return None
+        self.metrics.articles.inc(source=self.source_name, category=self.category_label(article['category']))
 
-        for i, article in enumerate(articles[:max_articles]):
-            message = f"Đang crawl chi tiết bài viết {i + 1}/{min(len(articles), max_articles)}: {article['title']}"
-            print(message)
+        if self.dedup_index is not None:
+            self.dedup_index.tag(article_detail)
+
+        if self.seen_index is not None:
+            # Dấu vân tay của bài trên trang danh mục/feed, lần sau so với danh sách mới để phát hiện bài bị sửa
+            self.seen_index.add(self.source_name, article['url'], listing_fingerprint(article))
+
+        if self.image_store is not None:
+            self.image_store.localize(article_detail)
+
+        return article_detail
+
+    def filter_new_articles(self, articles, callback=None):
+        """Loại bỏ các bài viết đã có trong chỉ mục URL đã crawl, trừ bài có tiêu đề hoặc mô tả đã đổi (bị sửa)"""
+        if self.seen_index is None:
+            return articles
+
+        new_articles = [article for article in articles
+                        if self.seen_index.is_new(self.source_name, article['url'], listing_fingerprint(article))]
+        skipped = len(articles) - len(new_articles)
+        if skipped:
+            self.metrics.skipped.inc(skipped, source=self.source_name, reason='seen')
+            message = f"Bỏ qua {skipped} bài viết đã crawl trước đó"
+            self.debug(message)
             if callback:
                 callback(message)
+        return new_articles
+
+    def iter_article_details(self, articles, max_articles=10, callback=None, max_workers=None, incremental=False):
+        """Crawl chi tiết các bài viết, trả về lần lượt từng bài theo thứ tự đầu vào"""
+        max_workers = max_workers or self.max_workers
+        # Ở chế độ tăng dần, ngân sách max_articles chỉ dành cho bài mới
+        if incremental:
+            articles = self.filter_new_articles(list(articles), callback)
+        # Đầu vào có thể là danh sách hoặc một iterator (ví dụ hàng đợi của pipeline)
+        total = min(len(articles), max_articles) if hasattr(articles, '__len__') else max_articles
+        selected = islice(articles, max_articles)
+
+        if max_workers <= 1:
+            for i, article in enumerate(selected):
+                article_detail = self._crawl_article_detail(article, i + 1, total, callback)
+                if article_detail:
+                    yield article_detail
+            return
 
-            article_detail = self.parse_article_detail(article['url'], article['category'])
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        pending = deque()
+        try:
+            for i, article in enumerate(selected):
+                pending.append(executor.submit(self._crawl_article_detail, article, i + 1, total, callback))
+                # Trả về các bài đầu hàng đã xong, giữ tối đa 2 * max_workers bài đang xử lý
+                while pending and (pending[0].done() or len(pending) >= max_workers * 2):
+                    article_detail = pending.popleft().result()
+                    if article_detail:
+                        yield article_detail
+
+            # Lấy kết quả theo thứ tự gửi để giữ nguyên thứ tự bài viết
+            while pending:
+                article_detail = pending.popleft().result()
+                if article_detail:
+                    yield article_detail
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
-            if article_detail:
-                # Bỏ trường source
-                detailed_articles.append(article_detail)
+    def crawl_article_details(self, articles, max_articles=10, callback=None, max_workers=None, incremental=False):
+        """Crawl chi tiết các bài viết từ danh sách URL"""
+        return list(self.iter_article_details(articles, max_articles, callback, max_workers, incremental))
+        
+    def iter_crawl(self, category, num_pages=2, max_articles=10, callback=None, max_workers=None,
+                   incremental=False, should_stop=None, queue_size=None):
+        """Crawl danh mục theo dạng pipeline: bài viết của mỗi trang danh mục được tải chi tiết ngay"""
+        max_workers = max_workers or self.max_workers
+        stubs = queue.Queue(maxsize=queue_size or max_workers * 2)
+        stopped = threading.Event()
+        done = object()
+
+        def is_stopped():
+            return stopped.is_set() or (should_stop is not None and should_stop())
+
+        def put(item):
+            # Chờ chỗ trống trong hàng đợi nhưng vẫn dừng được khi bên tiêu thụ kết thúc
+            while not is_stopped():
+                try:
+                    stubs.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
 
-            # Tạm dừng để tránh gửi quá nhiều request
-            time.sleep(1)
+        def produce():
+            queued = 0
+            try:
+                for article in self.iter_category(category, num_pages, callback, incremental):
+                    if not put(article):
+                        return
+                    queued += 1
+                    # Đủ số bài cần lấy thì không tải thêm trang danh mục
+                    if queued >= max_articles:
+                        return
+            except Exception as e:
+                message = f"Lỗi khi crawl danh mục {category}: {e}"
+                print(message)
+                if callback:
+                    callback(message)
+            finally:
+                put(done)
+
+        def consume():
+            while not is_stopped():
+                try:
+                    item = stubs.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is done:
+                    return
+                yield item
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        try:
+            yield from self.iter_article_details(consume(), max_articles, callback, max_workers)
+        finally:
+            stopped.set()
+
+    def crawl_pipeline(self, category, num_pages=2, max_articles=10, callback=None, max_workers=None,
+                       incremental=False, should_stop=None):
+        """Crawl danh mục và chi tiết bài viết song song, trả về danh sách bài viết"""
+        return list(self.iter_crawl(category, num_pages, max_articles, callback, max_workers,
+                                    incremental, should_stop))
+
+    def enqueue_category(self, frontier, category, num_pages=2, callback=None, incremental=False):
+        """Tìm bài viết của danh mục và thêm vào frontier dùng chung, trả về số bài mới được thêm"""
+        articles = list(self.iter_category(category, num_pages, callback, incremental))
+        added = frontier.add(self.source_name, articles)
+        message = f"Đã thêm {added}/{len(articles)} bài viết vào frontier"
+        self.debug(message)
+        if callback:
+            callback(message)
+        return added
+
+    def iter_frontier(self, frontier, worker_id=None, batch_size=10, max_articles=None, callback=None,
+                      max_workers=None):
+        """Nhận từng lô bài viết của nguồn từ frontier, crawl chi tiết và trả về lần lượt từng bài.
+
+        Bài viết được xác nhận (ack) khi bên dùng lấy bài tiếp theo, tức là sau khi đã xử lý xong bài
+        trước đó; bài không crawl được được trả lại frontier để thử lại sau. Dừng khi frontier không còn
+        bài đang chờ của nguồn hoặc đã đủ max_articles bài.
+        """
+        worker_id = worker_id or default_worker_id()
+        max_workers = max_workers or self.max_workers
+        executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+        # URL đang giữ lease nhưng chưa xác nhận, được trả lại nếu bên dùng dừng giữa chừng
+        leased = []
+        crawled = 0
+        try:
+            while max_articles is None or crawled < max_articles:
+                limit = batch_size if max_articles is None else min(batch_size, max_articles - crawled)
+                batch = frontier.lease(worker_id, limit, source=self.source_name)
+                if not batch:
+                    return
+                leased = [article['url'] for article in batch]
+
+                def crawl(item):
+                    index, article = item
+                    return self._crawl_article_detail(article, index + 1, len(batch), callback)
+
+                items = enumerate(batch)
+                results = executor.map(crawl, items) if executor else map(crawl, items)
+                for article, article_detail in zip(batch, results):
+                    if article_detail is None:
+                        frontier.release(worker_id, [article['url']])
+                    else:
+                        crawled += 1
+                        yield article_detail
+                        frontier.ack(worker_id, [article['url']])
+                    leased.remove(article['url'])
+        finally:
+            if leased:
+                frontier.release(worker_id, leased)
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
 
-        return detailed_articles
-        
     def export_to_json(self, articles, filename, callback=None):
         """Xuất dữ liệu ra file JSON"""
         if not articles:
@@ -124,8 +640,50 @@ class NewsCrawler:
 
 
 class VnExpressCrawler(NewsCrawler):
-    def __init__(self):
-        super().__init__()
+    default_rate_limit = 4.0
+    default_rate_burst = 4
+    spec = SiteSpec(
+        listing={
+            'items': '.item-news',
+            'title': '.title-news a',
+            'description': '.description',
+            'thumbnail': [{'select': '.thumb-art img', 'attrs': ('data-src', 'src')}]
+        },
+        detail={
+            # h1.title-detail, p.description, .fig-picture, .fck_detail và meta og:image
+            'parse_only': {
+                'classes': ('title-detail', 'description', 'fig-picture', 'fck_detail'),
+                'meta_properties': ('og:image',)
+            },
+            'title': ['h1.title-detail'],
+            'excerpt': 'p.description',
+            # Ảnh đại diện theo thứ tự ưu tiên: ảnh đầu tiên trong .fig-picture, ảnh trong picture đầu tiên
+            # của .fig-picture, meta og:image, ảnh đầu tiên trong bài viết
+            'image': [
+                {'select': '.fig-picture img', 'attrs': ('data-src', 'src')},
+                {'select': '.fig-picture picture', 'find': 'img', 'attrs': ('data-src', 'src')},
+                {'select': 'meta[property="og:image"]', 'attrs': ('content',)},
+                {'select': '.fck_detail img', 'attrs': ('data-src', 'src')}
+            ],
+            # Nội dung theo định dạng CKEditor
+            'content': '.fck_detail',
+            'clean': {
+                'p': {},
+                'img': {'src_from': ('data-src',), 'keep': ('src', 'alt', 'width', 'height'), 'normalize': ('src',)},
+                'source': {'keep': ('srcset',), 'normalize': ('srcset',)},
+                'picture': {},
+                'figcaption': {'keep_values': {'itemprop': 'description'}, 'set': {'style': CAPTION_STYLE}}
+            },
+            'unwrap_figures': True,
+            'remove': '.fig-picture',
+            # Chỉ lấy p, picture, img ở cấp đầu (không lấy figure)
+            'collect': ('p', 'picture', 'img'),
+            'collect_children': True
+        }
+    )
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
         self.base_url = "https://vnexpress.net"
         self.source_name = "VnExpress"
         self.categories = {
@@ -156,6 +714,11 @@ class VnExpressCrawler(NewsCrawler):
             11: "Khoa học công nghệ",
             12: "Bất động sản"
         }
+        # Tên RSS của các danh mục có tên feed khác slug trang danh mục
+        self.feed_names = {
+            "doi-song": "gia-dinh",
+            "khoa-hoc-cong-nghe": "khoa-hoc"
+        }
         
     def get_category_url(self, category, page):
         """Lấy URL cho trang danh mục"""
@@ -164,256 +727,59 @@ class VnExpressCrawler(NewsCrawler):
             url += f"-p{page}"
         return url
 
-    def parse_article_list(self, html_content, category_id):
-        """Phân tích danh sách bài viết từ trang danh mục"""
-        if not html_content:
-            return []
-
-        soup = BeautifulSoup(html_content, 'html.parser')
-        articles = []
-
-        # Tìm các bài viết chính
-        article_items = soup.select('.item-news')
-        print(f"VnExpress: Đã tìm thấy {len(article_items)} phần tử bài viết")
-
-        for item in article_items:
-            try:
-                title_tag = item.select_one('.title-news a')
-                if not title_tag:
-                    continue
-
-                title = title_tag.text.strip()
-                url = title_tag.get('href')
-
-                # Kiểm tra xem URL có đầy đủ domain chưa
-                if url and not url.startswith('http'):
-                    url = self.base_url + url
-
-                description = ""
-                desc_tag = item.select_one('.description')
-                if desc_tag:
-                    description = desc_tag.text.strip()
-
-                # Cải thiện việc lấy ảnh thumbnail
-                thumbnail = ""
-                img_tag = item.select_one('.thumb-art img')
-                if img_tag:
-                    if img_tag.has_attr('data-src'):
-                        thumbnail = img_tag['data-src']
-                    elif img_tag.has_attr('src'):
-                        thumbnail = img_tag['src']
-                    
-                    # Đảm bảo URL ảnh là đầy đủ
-                    if thumbnail:
-                        if thumbnail.startswith('//'):
-                            thumbnail = 'https:' + thumbnail
-                        elif not thumbnail.startswith('http'):
-                            thumbnail = self.base_url + thumbnail
-
-                articles.append({
-                    'title': title,
-                    'url': url,
-                    'description': description,
-                    'thumbnail': thumbnail,
-                    'category': category_id
-                })
-            except Exception as e:
-                print(f"Lỗi khi xử lý bài viết: {e}")
-                continue
-
-        return articles
-
-    def parse_article_detail(self, url, category_id):
-        """Phân tích chi tiết bài viết từ URL"""
-        html_content = self.get_page_content(url)
-        if not html_content:
-            return None
-
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        def clean_tag(tag):
-            # Clean <p>
-            if tag.name == 'p':
-                for attr in list(tag.attrs):
-                    del tag[attr]
-            # Clean <img>
-            elif tag.name == 'img':
-                keep = ['src', 'alt', 'width', 'height']
-                # Ưu tiên data-src nếu có
-                if tag.has_attr('data-src'):
-                    tag['src'] = tag['data-src']
-                for attr in list(tag.attrs):
-                    if attr not in keep:
-                        del tag[attr]
-                # Chuẩn hóa src
-                if tag.has_attr('src'):
-                    src = tag['src']
-                    if src.startswith('//'):
-                        src = 'https:' + src
-                    elif not src.startswith('http'):
-                        src = self.base_url + src
-                    tag['src'] = src
-            # Clean <source>
-            elif tag.name == 'source':
-                keep = ['srcset']
-                for attr in list(tag.attrs):
-                    if attr not in keep:
-                        del tag[attr]
-                # Chuẩn hóa srcset
-                if tag.has_attr('srcset'):
-                    srcset = tag['srcset']
-                    parts = [part.strip() for part in srcset.split(',')]
-                    srcs = []
-                    for part in parts:
-                        url = part.split(' ')[0]
-                        if url.startswith('//'):
-                            url = 'https:' + url
-                        elif not url.startswith('http'):
-                            url = self.base_url + url
-                        suffix = ' ' + ' '.join(part.split(' ')[1:]) if len(part.split(' ')) > 1 else ''
-                        srcs.append(url + suffix)
-                    tag['srcset'] = ', '.join(srcs)
-            # Clean <picture>
-            elif tag.name == 'picture':
-                for attr in list(tag.attrs):
-                    del tag[attr]
-            # Format figcaption (căn giữa và chữ nghiêng)
-            elif tag.name == 'figcaption':
-                # Chỉ giữ lại description nếu có
-                itemprop = tag.get('itemprop') if tag.has_attr('itemprop') else None
-                for attr in list(tag.attrs):
-                    del tag[attr]
-                if itemprop == 'description':
-                    tag['itemprop'] = itemprop
-                # Thêm style để căn giữa và chữ nghiêng
-                tag['style'] = 'text-align:center; font-style:italic;'
-            return tag
-
-        try:
-            # Lấy tiêu đề
-            title = ""
-            title_tag = soup.select_one('h1.title-detail')
-            if title_tag:
-                title = title_tag.text.strip()
-                
-            # Hiển thị debug
-            print(f"Tiêu đề: {title}")
-
-            # Lấy mô tả/excerpt
-            excerpt = ""
-            desc_tag = soup.select_one('p.description')
-            if desc_tag:
-                excerpt = desc_tag.text.strip()
-
-            # Lấy ảnh chính của bài viết trước khi xử lý nội dung
-            image = ""
-            # Tìm ảnh đại diện theo thứ tự ưu tiên
-            # 1. Ảnh đầu tiên trong .fig-picture
-            main_img = soup.select_one('.fig-picture img')
-            if main_img:
-                if main_img.has_attr('data-src'):
-                    image = main_img['data-src']
-                elif main_img.has_attr('src'):
-                    image = main_img['src']
-
-            # 2. Ảnh trong picture đầu tiên của .fig-picture
-            if not image:
-                main_picture = soup.select_one('.fig-picture picture')
-                if main_picture:
-                    img = main_picture.find('img')
-                    if img:
-                        if img.has_attr('data-src'):
-                            image = img['data-src']
-                        elif img.has_attr('src'):
-                            image = img['src']
-
-            # 3. Ảnh đại diện có thể nằm trong meta tag
-            if not image:
-                meta_img = soup.select_one('meta[property="og:image"]')
-                if meta_img and meta_img.has_attr('content'):
-                    image = meta_img['content']
-
-            # 4. Nếu vẫn không có, thử lấy ảnh đầu tiên trong bài viết
-            if not image:
-                first_img = soup.select_one('.fck_detail img')
-                if first_img:
-                    if first_img.has_attr('data-src'):
-                        image = first_img['data-src']
-                    elif first_img.has_attr('src'):
-                        image = first_img['src']
-
-            # Đảm bảo URL ảnh là đầy đủ
-            if image:
-                if image.startswith('//'):
-                    image = 'https:' + image
-                elif not image.startswith('http'):
-                    image = self.base_url + image
-
-            # Lấy nội dung theo định dạng CKEditor
-            content_html = ""
-            content_div = soup.select_one('.fck_detail')
-            if content_div:
-                # Làm sạch tất cả các thẻ
-                for tag in content_div.find_all(['p', 'img', 'picture', 'source', 'figcaption'], recursive=True):
-                    clean_tag(tag)
-                
-                # Xử lý các figure > picture: lấy picture ra ngoài
-                for figure in content_div.find_all('figure'):
-                    picture = figure.find('picture')
-                    if picture:
-                        # Nếu có figcaption, chuyển thành p
-                        figcaption = figure.find('figcaption')
-                        if figcaption:
-                            p = soup.new_tag('p')
-                            p.string = figcaption.get_text()
-                            p['style'] = 'text-align:center; font-style:italic;'
-                            figure.insert_after(p)
-                        # Đưa picture ra sau figure
-                        figure.insert_after(picture)
-                        # Xóa figure
-                        figure.decompose()
-                
-                # Loại bỏ các thẻ fig-picture
-                for fig_picture in content_div.select('.fig-picture'):
-                    fig_picture.decompose()
-                
-                # Thu thập nội dung: lấy p, picture, img (không lấy figure)
-                content_parts = []
-                for tag in content_div.children:
-                    if tag.name in ['p', 'picture', 'img']:
-                        content_parts.append(str(tag))
-                content_html = ''.join(content_parts)
-                
-                # Nếu không có excerpt, lấy đoạn đầu tiên làm excerpt
-                if not excerpt and content_div:
-                    first_p = content_div.find('p')
-                    if first_p:
-                        excerpt = first_p.text.strip()
-                
-                # Hiển thị debug
-                print(f"Nội dung lấy được (dài {len(content_html)}): {content_html[:100]}...")
-                
-            # Hiển thị debug excerpt
-            print(f"Tóm tắt (dài: {len(excerpt)}): {excerpt[:50]}...")
-
-            article = {
-                'title': title,
-                'content': content_html,
-                'excerpt': excerpt,
-                'image': image,
-                'category': category_id,
-                'status': 'published'
-            }
-
-            return article
-        except Exception as e:
-            print(f"Lỗi khi phân tích bài viết {url}: {e}")
-            return None
+    def get_feed_url(self, category):
+        """Lấy URL RSS của danh mục"""
+        return f"{self.base_url}/rss/{self.feed_names.get(category, category)}.rss"
 
 
 class VietnamNetCrawler(NewsCrawler):
-    def __init__(self):
-        super().__init__()
+    default_rate_limit = 3.0
+    default_rate_burst = 3
+    spec = SiteSpec(
+        listing={
+            # Link tiêu đề nằm rải rác trong nhiều kiểu khối bài viết; mô tả và ảnh lấy từ khối cha gần nhất
+            'links': 'h1 a, h2 a, h3 a, a.title, .title a, a.cms-link, a.link-title',
+            'relative_links_only': True,
+            'description': '.sapo, .lead, .description, .des',
+            'thumbnail': [{'select': 'img', 'attrs': ('data-src', 'src', 'data-original')}],
+            'levels': 3
+        },
+        detail={
+            # Mọi thẻ h1 (h1.title, h1.cms-title... và tiêu đề dự phòng), các khối nội dung/tóm tắt và meta
+            # og:image. Giữ cả .detail-title, .content-detail, .detail-article, .article-body vì các selector
+            # ".detail-title h1", ".article-body .sapo"... cần thẻ tổ tiên
+            'parse_only': {
+                'names': ('h1',),
+                'classes': ('detail-title', 'content-detail', 'maincontent', 'content-detail__content',
+                            'ArticleContent', 'cms-body', 'detail-content', 'article-body', 'article-relate__summary',
+                            'content-detail__summary', 'ArticleLead', 'cms-desc', 'detail-article'),
+                'ids': ('maincontent',),
+                'meta_properties': ('og:image',)
+            },
+            # Không có tiêu đề cụ thể thì lấy thẻ h1 đầu tiên
+            'title': ['h1.title, h1.cms-title, h1.ArticleDetail, .detail-title h1, .content-detail h1', 'h1'],
+            'excerpt': '.article-relate__summary, .content-detail__summary, .ArticleLead, .cms-desc, '
+                       '.article-body .sapo, .detail-article .sapo',
+            'excerpt_after_content': True,
+            'image': [{'select': 'meta[property="og:image"]', 'attrs': ('content',)}],
+            # Khối nội dung chính, ưu tiên maincontent
+            'content': 'div.maincontent, div#maincontent, .content-detail__content, .ArticleContent, .cms-body, '
+                       '.detail-content, .article-body',
+            'clean': {
+                'p': {},
+                'img': {'src_from': ('data-src', 'data-original'), 'keep': ('src', 'alt', 'width', 'height'),
+                        'normalize': ('src',)},
+                'figure': {},
+                'figcaption': {'set': {'style': CAPTION_STYLE}}
+            },
+            'remove': '.VnnAdsBox, .ImageBox, .article__ads, .box-banner, .ads, .insert-wiki-content, '
+                      '.ck-cms-insert-neww-group',
+            'collect': ('p', 'figure')
+        }
+    )
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
         self.base_url = "https://vietnamnet.vn"
         self.source_name = "VietnamNet"
         # Category IDs start from 201 to differentiate from other sources
@@ -454,431 +820,12 @@ class VietnamNetCrawler(NewsCrawler):
             url = f"{self.base_url}/{category}"
         return url
 
-    def parse_article_list(self, html_content, category_id):
-        """Phân tích danh sách bài viết từ trang danh mục"""
-        if not html_content:
-            print("Không có nội dung HTML để phân tích")
-            return []
-
-        soup = BeautifulSoup(html_content, 'html.parser')
-        articles = []
-
-        # Tìm tất cả các link bài viết
-        title_links = soup.select('h1 a, h2 a, h3 a, a.title, .title a, a.cms-link, a.link-title')
-        print(f"VietnamNet: Đã tìm thấy {len(title_links)} link bài viết")
-        
-        # Tạo danh sách URL đã xử lý để tránh trùng lặp
-        processed_urls = set()
-
-        for title_tag in title_links:
-            try:
-                url = title_tag.get('href')
-                
-                # Bỏ qua các link không phải bài viết hoặc đã xử lý
-                if not url or not url.startswith('/') or url in processed_urls:
-                    continue
-                    
-                # Đảm bảo URL là đầy đủ
-                if url.startswith('/'):
-                    url = self.base_url + url
-                
-                processed_urls.add(url)
-                
-                title = title_tag.text.strip()
-                if not title:
-                    continue
-
-                # Tìm mô tả và ảnh từ phần tử cha
-                description = ""
-                thumbnail = ""
-                
-                # Tìm mô tả trong các phần tử xung quanh
-                parent = title_tag.parent
-                for i in range(3):  # Tìm trong 3 cấp cha
-                    if parent:
-                        desc_tag = parent.select_one('.sapo, .lead, .description, .des')
-                        if desc_tag:
-                            description = desc_tag.text.strip()
-                            break
-                        # Di chuyển lên phần tử cha tiếp theo
-                        parent = parent.parent
-
-                # Tìm ảnh trong các phần tử xung quanh
-                parent = title_tag.parent
-                for i in range(3):  # Tìm trong 3 cấp cha
-                    if parent:
-                        img_tag = parent.select_one('img')
-                        if img_tag:
-                            if img_tag.has_attr('data-src'):
-                                thumbnail = img_tag['data-src']
-                            elif img_tag.has_attr('src'):
-                                thumbnail = img_tag['src']
-                            elif img_tag.has_attr('data-original'):
-                                thumbnail = img_tag['data-original']
-                                
-                            if thumbnail:
-                                break
-                        # Di chuyển lên phần tử cha tiếp theo
-                        parent = parent.parent
-                
-                # Đảm bảo URL ảnh là đầy đủ
-                if thumbnail:
-                    if thumbnail.startswith('//'):
-                        thumbnail = 'https:' + thumbnail
-                    elif not thumbnail.startswith('http'):
-                        thumbnail = self.base_url + thumbnail
-
-                articles.append({
-                    'title': title,
-                    'url': url,
-                    'description': description,
-                    'thumbnail': thumbnail,
-                    'category': category_id
-                })
-            except Exception as e:
-                print(f"Lỗi khi xử lý bài viết: {e}")
-                continue
-
-        return articles
-
-    def parse_article_detail(self, url, category_id):
-        """Phân tích chi tiết bài viết từ URL"""
-        html_content = self.get_page_content(url)
-        if not html_content:
-            return None
-
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        def clean_tag(tag):
-            # Clean <p>
-            if tag.name == 'p':
-                for attr in list(tag.attrs):
-                    del tag[attr]
-            # Clean <img>
-            elif tag.name == 'img':
-                keep = ['src', 'alt', 'width', 'height']
-                # Ưu tiên data-src nếu có
-                if tag.has_attr('data-src'):
-                    tag['src'] = tag['data-src']
-                elif tag.has_attr('data-original'):
-                    tag['src'] = tag['data-original']
-                for attr in list(tag.attrs):
-                    if attr not in keep:
-                        del tag[attr]
-                # Chuẩn hóa src
-                if tag.has_attr('src'):
-                    src = tag['src']
-                    if src.startswith('//'):
-                        src = 'https:' + src
-                    elif not src.startswith('http'):
-                        src = self.base_url + src
-                    tag['src'] = src
-            # Clean <figure>
-            elif tag.name == 'figure':
-                for attr in list(tag.attrs):
-                    del tag[attr]
-            # Format figcaption
-            elif tag.name == 'figcaption':
-                for attr in list(tag.attrs):
-                    del tag[attr]
-                # Thêm style để căn giữa và chữ nghiêng
-                tag['style'] = 'text-align:center; font-style:italic;'
-            return tag
-
-        try:
-            # Lấy tiêu đề
-            title = ""
-            title_tag = soup.select_one('h1.title, h1.cms-title, h1.ArticleDetail, .detail-title h1, .content-detail h1')
-            if title_tag:
-                title = title_tag.text.strip()
-            else:
-                # Tìm thẻ h1 đầu tiên nếu không có title cụ thể
-                h1_tag = soup.find('h1')
-                if h1_tag:
-                    title = h1_tag.text.strip()
-                    
-            # Hiển thị debug
-            print(f"Tiêu đề: {title}")
-
-            # Lấy ảnh chính của bài viết
-            image = ""
-            # Tìm ảnh đại diện từ meta tag
-            meta_img = soup.select_one('meta[property="og:image"]')
-            if meta_img and meta_img.has_attr('content'):
-                image = meta_img['content']
-
-            # Lấy nội dung
-            content_html = ""
-            # Tìm div chứa nội dung chính - ưu tiên maincontent
-            content_div = soup.select_one('div.maincontent, div#maincontent, .content-detail__content, .ArticleContent, .cms-body, .detail-content, .article-body')
-            if content_div:
-                # Làm sạch các thẻ
-                for tag in content_div.find_all(['p', 'img', 'figure', 'figcaption'], recursive=True):
-                    clean_tag(tag)
-                
-                # Loại bỏ các phần không cần thiết
-                for div in content_div.select('.VnnAdsBox, .ImageBox, .article__ads, .box-banner, .ads, .insert-wiki-content, .ck-cms-insert-neww-group'):
-                    div.decompose()
-                
-                # Thu thập nội dung: lấy p, figure, img
-                content_parts = []
-                for tag in content_div.find_all(['p', 'figure']):
-                    content_parts.append(str(tag))
-                content_html = ''.join(content_parts)
-                
-                # Hiển thị debug
-                print(f"Nội dung lấy được (dài {len(content_html)}): {content_html[:100]}...")
-
-            # Lấy excerpt từ đoạn văn đầu tiên nếu không có sẵn excerpt
-            excerpt = ""
-            desc_tag = soup.select_one('.article-relate__summary, .content-detail__summary, .ArticleLead, .cms-desc, .article-body .sapo, .detail-article .sapo')
-            if desc_tag:
-                excerpt = desc_tag.text.strip()
-            
-            # Nếu không tìm thấy excerpt, lấy từ đoạn đầu tiên của nội dung
-            if not excerpt and content_div:
-                first_p = content_div.find('p')
-                if first_p:
-                    excerpt = first_p.text.strip()
-            
-            # Hiển thị debug
-            print(f"Tóm tắt (dài: {len(excerpt)}): {excerpt[:50]}...")
-
-            article = {
-                'title': title,
-                'content': content_html,
-                'excerpt': excerpt,
-                'image': image,
-                'category': category_id,
-                'status': 'published'
-            }
-
-            return article
-        except Exception as e:
-            print(f"Lỗi khi phân tích bài viết {url}: {e}")
-            return None
-
-
-class CrawlerGUI:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("News Crawler")
-        self.root.geometry("800x600")
-
-        # Khởi tạo các crawler
-        self.crawlers = {
-            "VnExpress": VnExpressCrawler(),
-            "VietnamNet": VietnamNetCrawler()
-        }
-        self.current_crawler = self.crawlers["VnExpress"]
-        self.setup_ui()
-
-    def setup_ui(self):
-        # Frame chính
-        main_frame = ttk.Frame(self.root, padding="10")
-        main_frame.pack(fill=tk.BOTH, expand=True)
-
-        # Tiêu đề
-        title_label = ttk.Label(main_frame, text="News Crawler", font=("Helvetica", 16, "bold"))
-        title_label.pack(pady=10)
-
-        # Frame cấu hình
-        config_frame = ttk.LabelFrame(main_frame, text="Cấu hình Crawler", padding="10")
-        config_frame.pack(fill=tk.X, pady=10)
-
-        # Chọn nguồn
-        source_frame = ttk.Frame(config_frame)
-        source_frame.pack(fill=tk.X, pady=5)
-
-        ttk.Label(source_frame, text="Nguồn:").pack(side=tk.LEFT, padx=5)
-
-        self.source_var = tk.StringVar(value="VnExpress")
-        self.source_combobox = ttk.Combobox(source_frame, textvariable=self.source_var, width=20)
-        self.source_combobox['values'] = list(self.crawlers.keys())
-        self.source_combobox.pack(side=tk.LEFT, padx=5)
-        self.source_combobox.bind("<<ComboboxSelected>>", self.update_categories)
-
-        # Chọn danh mục
-        category_frame = ttk.Frame(config_frame)
-        category_frame.pack(fill=tk.X, pady=5)
-
-        ttk.Label(category_frame, text="Danh mục:").pack(side=tk.LEFT, padx=5)
-
-        self.category_var = tk.StringVar()
-        self.category_combobox = ttk.Combobox(category_frame, textvariable=self.category_var, width=30)
-        self.category_combobox.pack(side=tk.LEFT, padx=5)
-
-        # Số trang và số bài viết
-        pages_frame = ttk.Frame(config_frame)
-        pages_frame.pack(fill=tk.X, pady=5)
-
-        ttk.Label(pages_frame, text="Số trang:").pack(side=tk.LEFT, padx=5)
-        self.pages_var = tk.StringVar(value="2")
-        pages_entry = ttk.Entry(pages_frame, textvariable=self.pages_var, width=5)
-        pages_entry.pack(side=tk.LEFT, padx=5)
-
-        ttk.Label(pages_frame, text="Số bài viết:").pack(side=tk.LEFT, padx=5)
-        self.articles_var = tk.StringVar(value="10")
-        articles_entry = ttk.Entry(pages_frame, textvariable=self.articles_var, width=5)
-        articles_entry.pack(side=tk.LEFT, padx=5)
-
-        # Thư mục xuất
-        output_frame = ttk.Frame(config_frame)
-        output_frame.pack(fill=tk.X, pady=5)
-
-        ttk.Label(output_frame, text="Thư mục xuất:").pack(side=tk.LEFT, padx=5)
-        self.output_var = tk.StringVar(value="news_data")
-        output_entry = ttk.Entry(output_frame, textvariable=self.output_var, width=30)
-        output_entry.pack(side=tk.LEFT, padx=5)
-
-        # Nút crawl
-        button_frame = ttk.Frame(main_frame)
-        button_frame.pack(fill=tk.X, pady=10)
-
-        self.crawl_button = ttk.Button(button_frame, text="Bắt đầu Crawl", command=self.start_crawling)
-        self.crawl_button.pack(side=tk.LEFT, padx=5)
-
-        self.stop_button = ttk.Button(button_frame, text="Dừng", command=self.stop_crawling, state=tk.DISABLED)
-        self.stop_button.pack(side=tk.LEFT, padx=5)
-
-        # Khu vực log
-        log_frame = ttk.LabelFrame(main_frame, text="Log", padding="10")
-        log_frame.pack(fill=tk.BOTH, expand=True, pady=10)
-
-        self.log_text = scrolledtext.ScrolledText(log_frame, wrap=tk.WORD, height=15)
-        self.log_text.pack(fill=tk.BOTH, expand=True)
-
-        # Thanh trạng thái
-        self.status_var = tk.StringVar(value="Sẵn sàng")
-        status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
-        status_bar.pack(fill=tk.X, side=tk.BOTTOM, pady=5)
-
-        # Biến để kiểm soát luồng
-        self.crawling = False
-        
-        # Cập nhật danh sách danh mục ban đầu
-        self.update_categories()
-
-    def update_categories(self, event=None):
-        """Cập nhật danh sách danh mục khi thay đổi nguồn"""
-        source = self.source_var.get()
-        self.current_crawler = self.crawlers[source]
-        
-        # Cập nhật combobox danh mục
-        categories = [f"{id}. {name}" for id, name in self.current_crawler.category_names.items()]
-        self.category_combobox['values'] = categories
-        if categories:
-            self.category_combobox.current(0)
-
-    def log(self, message):
-        self.log_text.configure(state=tk.NORMAL)
-        self.log_text.insert(tk.END, f"[{datetime.now().strftime('%H:%M:%S')}] {message}\n")
-        self.log_text.see(tk.END)
-        self.log_text.configure(state=tk.DISABLED)
-        self.status_var.set(message)
-        self.root.update_idletasks()
-
-    def start_crawling(self):
-        if self.crawling:
-            return
-
-        # Lấy thông tin cấu hình
-        source = self.source_var.get()
-        self.current_crawler = self.crawlers[source]
-        
-        category_selection = self.category_var.get()
-        if not category_selection:
-            messagebox.showerror("Lỗi", "Vui lòng chọn danh mục")
-            return
-        
-        category_id = int(category_selection.split('.')[0])
-        category_key = next((k for k, v in self.current_crawler.categories.items() if v == category_id), None)
-
-        if not category_key:
-            messagebox.showerror("Lỗi", "Danh mục không hợp lệ")
-            return
-
-        try:
-            num_pages = int(self.pages_var.get())
-            max_articles = int(self.articles_var.get())
-            output_dir = self.output_var.get()
-        except ValueError:
-            messagebox.showerror("Lỗi", "Số trang và số bài viết phải là số nguyên")
-            return
-
-        # Tạo thư mục xuất nếu chưa tồn tại
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-
-        # Cập nhật UI
-        self.crawl_button.configure(state=tk.DISABLED)
-        self.stop_button.configure(state=tk.NORMAL)
-        self.log_text.configure(state=tk.NORMAL)
-        self.log_text.delete(1.0, tk.END)
-        self.log_text.configure(state=tk.DISABLED)
-
-        # Bắt đầu crawl trong một luồng riêng
-        self.crawling = True
-        threading.Thread(target=self.crawl_process, args=(category_key, num_pages, max_articles, output_dir, source),
-                         daemon=True).start()
-
-    def crawl_process(self, category_key, num_pages, max_articles, output_dir, source):
-        try:
-            crawler = self.crawlers[source]
-            self.log(f"Bắt đầu crawl nguồn: {source}, danh mục: {crawler.category_names[crawler.categories[category_key]]}")
-
-            # Crawl danh sách bài viết
-            articles = crawler.crawl_category(category_key, num_pages, self.log)
-
-            if not self.crawling:
-                self.log("Đã dừng crawl theo yêu cầu")
-                self.finish_crawling()
-                return
-
-            self.log(f"Đã tìm thấy {len(articles)} bài viết")
-
-            if not articles:
-                self.log("Không tìm thấy bài viết nào. Kết thúc chương trình.")
-                self.finish_crawling()
-                return
-
-            # Crawl chi tiết bài viết
-            self.log(f"Đang crawl chi tiết {min(max_articles, len(articles))} bài viết...")
-            detailed_articles = crawler.crawl_article_details(articles, max_articles, self.log)
-
-            if not self.crawling:
-                self.log("Đã dừng crawl theo yêu cầu")
-                self.finish_crawling()
-                return
-
-            # Tạo tên file với timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            json_filename = os.path.join(output_dir, f"{source.lower()}_{category_key}_{timestamp}.json")
-
-            # Xuất dữ liệu ra file
-            crawler.export_to_json(detailed_articles, json_filename, self.log)
-
-            self.log("\nQuá trình crawl dữ liệu đã hoàn tất!")
-            self.log(f"Số bài viết đã crawl: {len(detailed_articles)}")
-            self.log(f"Dữ liệu đã được lưu vào: {json_filename}")
-
-        except Exception as e:
-            self.log(f"Lỗi: {str(e)}")
-        finally:
-            self.finish_crawling()
-
-    def stop_crawling(self):
-        self.crawling = False
-        self.log("Đang dừng crawl...")
-
-    def finish_crawling(self):
-        self.crawling = False
-        self.root.after(0, lambda: self.crawl_button.configure(state=tk.NORMAL))
-        self.root.after(0, lambda: self.stop_button.configure(state=tk.DISABLED))
-        self.root.after(0, lambda: self.status_var.set("Sẵn sàng"))
+    def get_feed_url(self, category):
+        """Lấy URL news sitemap của danh mục"""
+        return f"{self.base_url}/sitemap/news/{category}.xml"
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = CrawlerGUI(root)
-    root.mainloop()
\ No newline at end of file
+    # Giao diện tkinter nằm trong crawler_gui.py để các công cụ không giao diện không phải nạp tkinter
+    from crawler_gui import main
+    main()